@@ -1,8 +1,20 @@
 from datetime import timedelta
+import argparse
+import asyncio
 import os
 import io
+import sys
 import time
-from minizinc import Instance, Model, Status, Solver
+from minizinc import Instance, Model, Result, Status, Solver
+
+# shared modules (instance model, portfolio bounds)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "..", "..", "common"))
+from instance import stream_instances
+from bound import update_bounds
+from results import DB_PATH, default_run, record_run
+from instrumentation import collect, minizinc_statistics
+from patterns import position_domains
 
 # utility function to retireve data from txt files
 def get_data(res):
@@ -40,63 +52,29 @@ def get_data(res):
     return result_collector
 #---------------------END FUNCTION-------------------------
 
-# setting model, solver, input directory
-model_name = "GECODE.mzn" 
-solver_name = "gecode"
-input_dir = "instances_dzn"
-
-print("INSTANCE   --   TIME")
-
-n_files = len([f for f in os.listdir("./instances_dzn")
-               if os.path.isfile(os.path.join("./instances_dzn", f))])
-
-# running solver for each input instance
-for i in range(1, n_files+1):
-    
-    # 1) selecting input file
-    input_file = "ins-{}.dzn".format(i)
-    filename = "./" + input_dir + "/" + input_file
-    
-    # 2) setting model
-    model = Model("./" + model_name)
+# writes the skyline layout of a txt instance in the output format
+def write_fallback(txt_instance, output_file):
     
-    # 3) adding input file to the model
-    model.add_file(filename)
+    widths = txt_instance.widths.tolist()
+    heights = txt_instance.heights.tolist()
     
-    # 4) setting solver
-    solver = Solver.lookup(solver_name)
+    layout = txt_instance.skyline_layout()
+    output_file.write(str(txt_instance.max_width) + ' ' + str(layout["height"]) + '\n')
+    output_file.write(str(txt_instance.n_blocks) + '\n')
+    zipped_data = zip(widths, heights, layout["corner_x"], layout["corner_y"])
+    for (width, height, corner_x, corner_y) in zipped_data:
+        output_file.write(str(width) + " " +
+                          str(height) + " " +
+                          str(corner_x) + " " +
+                          str(corner_y) + "\n")
+#---------------------END FUNCTION-------------------------
+
+# writes a layout (as returned by get_data) in the output format; the file is
+# replaced at once, so it never holds half a layout
+def write_layout(result_data, output_path):
     
-    # 5) setting instance
-    instance = Instance(solver, model)
-    
-    # 6) measuring performances of the solver
-    start_time = time.time()
-    time_delta = timedelta(seconds=300)
-    res = instance.solve(timeout=time_delta)
-    end_time = time.time()
-    
-    # print time performances
-    time_spent = end_time-start_time
-    print(input_file + "\t" + "{:.2f}sec".format(time_spent))
-    
-    output_file = open("../out/out-{}.txt".format(i), "w")
-    
-    # CASE 0: TIMEOUT
-    if res.solution is None:
-        print("TIMEOUT")
-        output_file.write("TIMEOUT")
-        output_file.close()
-        continue
-    
-    # CASE 1: UNSATISFIABLE
-    if res.status is Status.UNSATISFIABLE:
-        print("UNSAT")
-        output_file.write("UNSAT")
-        output_file.close()
-        continue
-        
-    # CASE 2: SATISFIABLE
-    result_data = get_data(res)
+    temp_path = output_path + ".tmp"
+    output_file = open(temp_path, "w")
     output_file.write(str(result_data['max_width']) + ' ' +
                       str(result_data['max_height']) + '\n')
     output_file.write(str(result_data['n_blocks']) + '\n')
@@ -109,4 +87,195 @@ for i in range(1, n_files+1):
                           str(height) + " " +
                           str(corner_x) + " " +
                           str(corner_y) + "\n")
-    output_file.close()
\ No newline at end of file
+    output_file.close()
+    os.replace(temp_path, output_path)
+#---------------------END FUNCTION-------------------------
+
+# the data of a txt instance (instance.py) set directly in a MiniZinc
+# Instance, no .dzn file involved. Returns the number of blocks with a
+# fixed x position
+def add_data(instance, txt_instance, positions="normal"):
+    
+    instance["max_width"] = txt_instance.max_width
+    instance["n_blocks"] = txt_instance.n_blocks
+    instance["width"] = txt_instance.widths.tolist()
+    instance["height"] = txt_instance.heights.tolist()
+    
+    x_domain, y_domain = position_domains(txt_instance, positions)
+    instance["x_domain"] = x_domain
+    instance["y_domain"] = y_domain
+    instance["upper_bound"] = txt_instance.upper_bound
+    return sum(len(domain) == 1 for domain in x_domain)
+#---------------------END FUNCTION-------------------------
+
+# out-N.txt for instance ins-N, out-NAME.txt for any other name
+def output_filename(name):
+    
+    if name.startswith("ins-"):
+        name = name[len("ins-"):]
+    return "out-{}.txt".format(name)
+#---------------------END FUNCTION-------------------------
+
+# options of Instance.solve / Instance.solutions: parallel search on
+# "threads" threads (Gecode, OR-Tools CP-SAT, ...; Chuffed is sequential) and
+# free search (the solver may ignore the search annotations). minizinc-python
+# passes --parallel / --free-search whatever the solver, so a solver that
+# does not declare the flag (-p / -f in its stdFlags) raises a ValueError
+def solve_options(solver, threads=1, free_search=False):
+    
+    options = {}
+    if threads > 1:
+        if "-p" not in solver.stdFlags:
+            raise ValueError("{} has no parallel search (-p), use --threads 1"
+                             .format(solver.id))
+        options["processes"] = threads
+    if free_search:
+        if "-f" not in solver.stdFlags:
+            raise ValueError("{} has no free search (-f)".format(solver.id))
+        options["free_search"] = True
+    return options
+#---------------------END FUNCTION-------------------------
+
+# anytime solving: every improving solution reported by the solver is written
+# to output_path at once (and shared as upper bound), so the best layout found
+# so far survives a timeout or the process being killed. Returns a Result
+# like Instance.solve: final status, best solution, statistics
+async def solve_streaming(instance, timeout, output_path, bound_file=None,
+                          **options):
+    
+    status, best_solution, statistics = Status.UNKNOWN, None, {}
+    async for result in instance.solutions(time_limit=timeout,
+                                           intermediate_solutions=True,
+                                           **options):
+        status = result.status
+        statistics.update(result.statistics)
+        if result.solution is None:
+            continue
+        best_solution = result.solution
+        result_data = get_data(result)
+        write_layout(result_data, output_path)
+        update_bounds(bound_file, upper=result_data['max_height'])
+        print("height={} found".format(result_data['max_height']), flush=True)
+    
+    return Result(status, best_solution, statistics)
+#---------------------END FUNCTION-------------------------
+
+if __name__ == "__main__":
+    
+    # runtime options
+    parser = argparse.ArgumentParser(description="CP model for VLSI design")
+    parser.add_argument("inputs", nargs="*",
+                        help="directories, globs or ins-*.txt files, - for the "
+                             "instances on stdin (default: ./instances)")
+    parser.add_argument("--fallback", action="store_true",
+                        help="write the skyline layout instead of TIMEOUT")
+    parser.add_argument("--solver", default="gecode",
+                        help="MiniZinc solver tag: gecode, chuffed, cp-sat, ...")
+    parser.add_argument("--threads", type=int, default=1,
+                        help="parallel search threads (gecode, cp-sat)")
+    parser.add_argument("--free-search", action="store_true",
+                        help="let the solver ignore the search annotations")
+    parser.add_argument("--positions", default="normal", choices=["normal", "all"],
+                        help="coordinate domains: normal patterns or every position")
+    parser.add_argument("--stream", action="store_true",
+                        help="write every improving layout as soon as it is found")
+    parser.add_argument("--out-dir", default="../out",
+                        help="directory of the out-N.txt files")
+    parser.add_argument("--bound-file", default=None,
+                        help="height bounds shared with other approaches (portfolio)")
+    parser.add_argument("--results-db", default=DB_PATH,
+                        help='results database ("" to disable)')
+    parser.add_argument("--run", default=default_run(),
+                        help="label of this run in the results database")
+    parser.add_argument("--instances", nargs="+", type=int,
+                        help="instance numbers of ./instances to run (default: all)")
+    args = parser.parse_args()
+
+    # setting model, solver, input instances
+    model_name = "GECODE.mzn" 
+    solver_name = args.solver
+    sources = args.inputs or ["./instances"]
+    if args.instances:
+        sources = ["./instances/ins-{}.txt".format(i) for i in args.instances]
+
+    print("INSTANCE   --   TIME")
+
+    # model and solver are set once: every input instance is a branch of
+    # the same Instance, receiving only its data
+    model = Model("./" + model_name)
+    solver = Solver.lookup(solver_name)
+    options = solve_options(solver, args.threads, args.free_search)
+    base_instance = Instance(solver, model)
+
+    # running solver for each input instance, read one at a time
+    for txt_instance in stream_instances(sources):
+        
+        # 1) selecting the output file
+        output_path = os.path.join(args.out_dir, output_filename(txt_instance.name))
+        
+        # 2) branching the instance and setting its data
+        with base_instance.branch() as instance:
+            n_fixed = add_data(instance, txt_instance, args.positions)
+            if n_fixed:
+                print("{} blocks fixed at x=0 (their only normal position is 0)".format(n_fixed))
+            
+            # 3) measuring performances of the solver
+            start_time = time.time()
+            time_delta = timedelta(seconds=300)
+            if args.stream:
+                res = asyncio.run(solve_streaming(instance, time_delta,
+                                                  output_path, args.bound_file,
+                                                  **options))
+            else:
+                res = instance.solve(time_limit=time_delta, **options)
+            end_time = time.time()
+        
+        # print time performances
+        time_spent = end_time-start_time
+        print(txt_instance.name + "\t" + "{:.2f}sec".format(time_spent))
+        
+        # recording the run, flattening (MiniZinc statistics) as encoding time
+        status = {Status.OPTIMAL_SOLUTION: "OPTIMAL",
+                  Status.SATISFIED: "SAT",
+                  Status.UNSATISFIABLE: "UNSAT"}.get(res.status, "TIMEOUT")
+        flat_time = res.statistics.get("flatTime")
+        if isinstance(flat_time, timedelta):
+            flat_time = flat_time.total_seconds()
+        record_run(args.results_db, args.run, txt_instance,
+                   "CP", model_name[:-len(".mzn")] +
+                   ("/{}threads".format(args.threads) if args.threads > 1 else ""),
+                   solver_name,
+                   get_data(res)['max_height'] if res.solution is not None else None,
+                   status, time_spent, flat_time,
+                   None if flat_time is None else time_spent - flat_time,
+                   collect(minizinc_statistics(res)))
+        
+        # CASE 0: TIMEOUT
+        if res.solution is None and res.status is not Status.UNSATISFIABLE:
+            print("TIMEOUT")
+            output_file = open(output_path, "w")
+            if args.fallback:
+                write_fallback(txt_instance, output_file)
+            else:
+                output_file.write("TIMEOUT")
+            output_file.close()
+            continue
+        
+        # CASE 1: UNSATISFIABLE
+        if res.status is Status.UNSATISFIABLE:
+            print("UNSAT")
+            output_file = open(output_path, "w")
+            output_file.write("UNSAT")
+            output_file.close()
+            continue
+            
+        # CASE 2: SATISFIABLE
+        result_data = get_data(res)
+        
+        # bounds shared with other approaches (portfolio)
+        if res.status is Status.OPTIMAL_SOLUTION:
+            update_bounds(args.bound_file, lower=result_data['max_height'],
+                          upper=result_data['max_height'])
+        else:
+            update_bounds(args.bound_file, upper=result_data['max_height'])
+        write_layout(result_data, output_path)
\ No newline at end of file
@@ -0,0 +1,89 @@
+from datetime import timedelta
+import argparse, csv, math, os, sys, time
+from minizinc import Instance, Model, Status, Solver
+from run_model import add_data, solve_options
+
+# shared modules (instance model)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "..", "..", "common"))
+from instance import load_instance
+
+# Scaling report of the CP model: every instance is solved with each thread
+# count, the times are written to a CSV and the summary shows, for every
+# thread count, the instances solved to optimality, the total time and the
+# speedup against the first thread count (geometric mean over the instances
+# solved by both, and ratio of the total times).
+
+parser = argparse.ArgumentParser(description="CP parallel search scaling report")
+parser.add_argument("--model", default="GECODE.mzn")
+parser.add_argument("--solver", default="gecode",
+                    help="MiniZinc solver tag: gecode, chuffed, cp-sat, ...")
+parser.add_argument("--threads", nargs="+", type=int,
+                    default=[1, 2, 4, os.cpu_count()],
+                    help="thread counts, the first one is the reference")
+parser.add_argument("--free-search", action="store_true")
+parser.add_argument("--first", type=int, default=1, help="first instance")
+parser.add_argument("--last", type=int, default=40, help="last instance")
+parser.add_argument("--timeout", type=int, default=300,
+                    help="seconds per instance and thread count")
+parser.add_argument("--csv", default="scaling_report.csv")
+args = parser.parse_args()
+thread_counts = list(dict.fromkeys(args.threads))
+
+# model and solver set once, one branch per run; a sequential solver is
+# run with one thread only
+solver = Solver.lookup(args.solver)
+if "-p" not in solver.stdFlags and max(thread_counts) > 1:
+    print("{} has no parallel search (-p), thread counts {} skipped".format(
+        solver.id, [threads for threads in thread_counts if threads > 1]))
+    thread_counts = [1]
+base_instance = Instance(solver, Model("./" + args.model))
+
+rows = []
+print("INSTANCE   --   THREADS   --   STATUS   --   TIME")
+for i in range(args.first, args.last + 1):
+
+    filename = "./instances/ins-{}.txt".format(i)
+    if not os.path.isfile(filename):
+        continue
+    txt_instance = load_instance(filename)
+
+    for threads in thread_counts:
+        with base_instance.branch() as instance:
+            add_data(instance, txt_instance)
+            start_time = time.time()
+            res = instance.solve(time_limit=timedelta(seconds=args.timeout),
+                                 **solve_options(solver, threads, args.free_search))
+            time_spent = time.time() - start_time
+        optimal = res.status is Status.OPTIMAL_SOLUTION
+        print("ins-{}\t{}\t{}\t{:.2f}".format(i, threads, res.status, time_spent),
+              flush=True)
+        rows.append({"instance": i,
+                     "threads": threads,
+                     "status": str(res.status),
+                     "optimal": optimal,
+                     "time": round(time_spent, 3)})
+
+# csv with every run
+with open(args.csv, "w", newline="") as csv_file:
+    writer = csv.DictWriter(csv_file, fieldnames=list(rows[0].keys()))
+    writer.writeheader()
+    writer.writerows(rows)
+
+# summary: speedups against the reference thread count
+reference = {row["instance"]: row for row in rows if row["threads"] == thread_counts[0]}
+print("\nTHREADS   --   OPTIMAL   --   TOTAL TIME   --   SPEEDUP (GEOMEAN)   --   SPEEDUP (TOTAL)")
+for threads in thread_counts:
+    thread_rows = [row for row in rows if row["threads"] == threads]
+    ratios = [reference[row["instance"]]["time"] / row["time"]
+              for row in thread_rows
+              if row["optimal"] and reference[row["instance"]]["optimal"] and row["time"] > 0]
+    geomean = math.exp(sum(map(math.log, ratios)) / len(ratios)) if ratios else float("nan")
+    total = sum(row["time"] for row in thread_rows)
+    print("{}\t{}/{}\t{:.2f}\t{:.2f}x\t{:.2f}x".format(
+        threads,
+        sum(row["optimal"] for row in thread_rows),
+        len(thread_rows),
+        total,
+        geomean,
+        sum(row["time"] for row in reference.values()) / total if total > 0 else float("nan")))
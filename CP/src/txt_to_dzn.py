@@ -1,58 +1,35 @@
-import os
+import argparse, os, sys
 
-# need a context manager due to error while using "chdir" function
-class change_directory:
-    def __init__(self, path):
-        self.newPath = os.path.expanduser(path)
-                  
-    def __enter__(self):
-        self.savedPath = os.getcwd()
-        os.chdir(self.newPath)
+# shared modules (instance model, position domains)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "..", "..", "common"))
+from instance import stream_instances
+from patterns import domains_dzn
 
-    def __exit__(self, etype, value, traceback):
-        os.chdir(self.savedPath)
+# runtime options: the instances are found as in run_model.py (directories,
+# globs, txt files, - for stdin), in natural order
+parser = argparse.ArgumentParser(description="txt instances to dzn files")
+parser.add_argument("inputs", nargs="*",
+                    help="directories, globs or ins-*.txt files, - for the "
+                         "instances on stdin (default: ./instances)")
+parser.add_argument("--out-dir", default="./instances_dzn",
+                    help="directory of the dzn files")
+args = parser.parse_args()
 
-# selecting instances dirctory
-with change_directory("./instances"):
+# new directory to create
+if not os.path.exists(args.out_dir):
+    os.makedirs(args.out_dir)
 
-    # cycling over instances files
-    for i in range(1, 41):
-        
-        # opening file
-        filename = "ins-{}.txt".format(i)
-        file = open(filename, "r")
-        
-        # MAX width
-        MAX_width = file.readline().rstrip("\n")
-        
-        # N_blocks
-        N_blocks = file.readline().strip("\n")
-        
-        # Dimensions --> then splitting into "width" and "heights"
-        dimensions = [[int(value) for value in line.split()] for line in file]
-        widths = str([pair[0] for pair in dimensions])
-        heights = str([pair[1] for pair in dimensions])
-        
-        # closing resources
-        file.close()
-        
-        # new directory to create
-        dir_dzn = "../instances_dzn"
-        if not os.path.exists(dir_dzn):
-            os.makedirs(dir_dzn)
-        
-        # change directory --> instances_dzn
-        with change_directory(dir_dzn):
-            
-            # selecting filename and opening
-            filename = "ins-{}.dzn".format(i)
-            file = open(filename, "w")
-            
-            # writing values
-            file.write('max_width = {};\n'.format(MAX_width) +
-                     'n_blocks = {};\n'.format(N_blocks) + 
-                     'width = {};\n'.format(widths) +
-                     'height = {};\n'.format(heights))
-            
-            # closing resources
-            file.close()
\ No newline at end of file
+# cycling over instances, read one at a time: ins-N.txt -> ins-N.dzn
+for instance in stream_instances(args.inputs or ["./instances"]):
+
+    # selecting filename and opening
+    filename = os.path.join(args.out_dir, "{}.dzn".format(instance.name))
+    file = open(filename, "w")
+
+    # writing values
+    file.write(instance.to_dzn())
+    file.write(domains_dzn(instance))
+
+    # closing resources
+    file.close()
@@ -1,17 +1,136 @@
-import pulp, math, os, time, mosek
+import argparse, pulp, math, os, sys, tempfile, time
 import numpy as np
 
-def build_pulp_model(max_width, n_blocks, widths, heights):
+# shared modules (skyline heuristic, instance model, portfolio bounds)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "..", "..", "common"))
+from skyline import best_packing
+from instance import load_instances
+from bound import update_bounds
+from results import DB_PATH, default_run, record_run
+from instrumentation import collect, family, pulp_log_statistics
+from sparse_model import build_sparse_model, solve_sparse
+
+def constructive_packing(max_width, n_blocks, widths, heights):
+    
+    # IDEA: skyline packing (common/skyline.py). The biggest rectangle is
+    # placed first in (0,0), as required by the models
+    widths_arr = np.asarray(widths)
+    heights_arr = np.asarray(heights)
+    biggest_rect_idx = int(np.argmax(widths_arr * heights_arr))
+    return best_packing(max_width, widths, heights, first=biggest_rect_idx)
+
+# ------------------ END FUNCTION ----------------------------
+
+def set_warm_start(model, layout, widths, heights):
+    
+    # the layout becomes the initial value of every variable (MIP start)
+    variables = model.variablesDict()
+    corner_x, corner_y = layout["corner_x"], layout["corner_y"]
+    n_blocks = len(widths)
+    
+    variables["height"].setInitialValue(layout["height"])
+    for i in range(n_blocks):
+        variables["x_{}".format(i)].setInitialValue(corner_x[i])
+        variables["y_{}".format(i)].setInitialValue(corner_y[i])
+        if "rot_{}".format(i) in variables:
+            variables["rot_{}".format(i)].setInitialValue(0)
+    
+    # delta = 0 where the relative position holds in the layout
+    for i in range(n_blocks):
+        for j in range(n_blocks):
+            if i == j:
+                continue
+            x_free = corner_x[i] + widths[i] <= corner_x[j]
+            y_free = corner_y[i] + heights[i] <= corner_y[j]
+            for k, free in enumerate([x_free, y_free]):
+                name = "delta_{}_{}_{}".format(i, j, k)
+                if name in variables:
+                    variables[name].setInitialValue(0 if free else 1)
+
+# ------------------ END FUNCTION ----------------------------
+
+def order_identical(layout, instance):
     
+    # the layout with the positions of identical blocks exchanged so that
+    # they follow the order of pair_relations: (x, y) increasing with the
+    # index, or y increasing when two of them can not stay side by side
+    corner_x, corner_y = list(layout["corner_x"]), list(layout["corner_y"])
+    for group in instance.identical_groups:
+        blocks = group.tolist()
+        if 2 * instance.widths[blocks[0]] <= instance.max_width:
+            key = lambda b: (layout["corner_x"][b], layout["corner_y"][b])
+        else:
+            key = lambda b: layout["corner_y"][b]
+        for b, source in zip(blocks, sorted(blocks, key=key)):
+            corner_x[b], corner_y[b] = layout["corner_x"][source], layout["corner_y"][source]
+    return dict(layout, corner_x=corner_x, corner_y=corner_y)
+
+# ------------------ END FUNCTION ----------------------------
+
+def pair_relations(instance, upper_bound, fixed=()):
+    
+    # preprocessing of the non-overlap disjunctions: for every pair i < j
+    # the relative positions that are possible, each one as
+    # (first, second, axis, big-M) meaning "first ends before second starts
+    # along axis" (0: x, 1: y). Returns the relations and the identical
+    # pairs ordered along the axis (x_i <= x_j or y_i <= y_j).
+    #  - a pair too wide to stay side by side (Instance.no_side_by_side) or
+    #    too tall to be stacked within upper_bound loses the relations
+    #    along x (y)
+    #  - identical blocks (Instance.identical_groups) are interchangeable,
+    #    so within a group they are taken in lexicographic order of (x, y):
+    #    j never lies on the left of i (if the group can not stay side by
+    #    side, they are ordered by y and j never lies below i)
+    #  - big-M of "first before second": the largest violation allowed by
+    #    the bounds, ub(coord_first) + size_first - lb(coord_second); it is
+    #    max_width / upper_bound, smaller when a block is fixed (the biggest
+    #    one in (0, 0)): the blocks in fixed have coordinate upper bound 0
+    n_blocks = instance.n_blocks
+    widths, heights = instance.widths.tolist(), instance.heights.tolist()
+    no_side_by_side = set(map(tuple, instance.no_side_by_side.tolist()))
+    group_of = {b: g for g, group in enumerate(instance.identical_groups)
+                for b in group.tolist()}
+    sizes = (widths, heights)
+    dims = (instance.max_width, upper_bound)
+    relations, ordered = {}, []
+    for i in range(n_blocks):
+        for j in range(i + 1, n_blocks):
+            side = (i, j) not in no_side_by_side
+            stack = heights[i] + heights[j] <= upper_bound
+            options = []
+            for axis, possible in [(0, side), (1, stack)]:
+                if possible:
+                    options += [(i, j, axis), (j, i, axis)]
+            if i in group_of and group_of[i] == group_of.get(j) and options:
+                axis = 0 if side else 1
+                options.remove((j, i, axis))
+                ordered.append((i, j, axis))
+            relations[i, j] = [(first, second, axis,
+                                (0 if first in fixed else dims[axis] - sizes[axis][first]) +
+                                sizes[axis][first])
+                               for first, second, axis in options]
+    return relations, ordered
+
+# ------------------ END FUNCTION ----------------------------
+
+def build_pulp_model(instance, upper_bound=None, families=None, tighten=True):
+    
+    max_width, n_blocks = instance.max_width, instance.n_blocks
+    widths, heights = instance.widths.tolist(), instance.heights.tolist()
+
     # defining the model
     model = pulp.LpProblem("vlsi", pulp.LpMinimize)
+    n_constraints = lambda: len(model.constraints)
     
     # bounds for the height
     lower_bound = max(
         max(heights),
         math.ceil(sum([widths[i] * heights[i] for i in range(n_blocks)]) / max_width)
     )
-    upper_bound = int(sum(heights))
+    # the upper bound (also big-M of the y rows) may come from a heuristic
+    if upper_bound is None:
+        upper_bound = int(sum(heights))
 
     # defining height variable
     height = pulp.LpVariable("height",
@@ -34,17 +153,20 @@ def build_pulp_model(max_width, n_blocks, widths, heights):
                 for i in range(n_blocks)]
 
     # height constraint
-    for i in range(n_blocks):
-        model += y_coord[i] + heights[i] <= height, "height boundary r_{}".format(i)
+    with family(families, "height", n_constraints):
+        for i in range(n_blocks):
+            model += y_coord[i] + heights[i] <= height, "height boundary r_{}".format(i)
 
-    # delta value
-    delta = pulp.LpVariable.dicts(
-        "delta",
-        indices=(range(n_blocks), range(n_blocks), range(2)),
-        cat=pulp.LpBinary,
-        lowBound=0,
-        upBound=1,
-    )
+    # delta value (full n x n x 2 index set; with tighten only the needed
+    # ones are created)
+    if not tighten:
+        delta = pulp.LpVariable.dicts(
+            "delta",
+            indices=(range(n_blocks), range(n_blocks), range(2)),
+            cat=pulp.LpBinary,
+            lowBound=0,
+            upBound=1,
+        )
 
     # IDEA: trying to check whether placing the rectangle
     # with the biggest area in position (0,0) helps the solver
@@ -54,45 +176,86 @@ def build_pulp_model(max_width, n_blocks, widths, heights):
     model += x_coord[biggest_rect_idx] == 0, "biggest x_coord"
     model += y_coord[biggest_rect_idx] == 0, "biggest y_coord"
 
-    # non overlapping constraints
-    for i in range(n_blocks):
-        for j in range(n_blocks):
-            if i < j:
-                
-                # width constraint
-                if widths[i] + widths[j] > max_width:
-                    model += delta[i][j][0] == 1
-                    model += delta[j][i][0] == 1
-
-                # i-j non overlap x
-                model += x_coord[i] + widths[i] <= x_coord[j] + (delta[i][j][0]) * max_width
-                
-                # j-i non overlap x
-                model += x_coord[j] + widths[j] <= x_coord[i] + (delta[j][i][0]) * max_width
-                
-                # i-j non overlap y
-                model += y_coord[i] + heights[i] <= y_coord[j] + (delta[i][j][1]) * upper_bound
-                
-                # j-i non overlap y
-                model += y_coord[j] + heights[j] <= y_coord[i] + (delta[j][i][1]) * upper_bound
-                
-                # checking 4 conditions
-                model += (delta[i][j][0] + delta[j][i][0] + delta[i][j][1] + delta[j][i][1] <= 3 )
+    # non overlapping constraints, with the pair relations preprocessed
+    # (pair_relations): binaries only for the possible positions, a single
+    # position as plain row, big-M of each pair and direction
+    if tighten:
+        coords = (x_coord, y_coord)
+        relations, ordered = pair_relations(instance, upper_bound,
+                                            fixed=(biggest_rect_idx,))
+        with family(families, "non_overlap", n_constraints):
+            for (i, j), options in relations.items():
+                if len(options) == 1:
+                    first, second, axis, _ = options[0]
+                    model += (coords[axis][first] + [widths, heights][axis][first] <=
+                              coords[axis][second])
+                    continue
+                deltas = []
+                for first, second, axis, big_m in options:
+                    deltas.append(pulp.LpVariable("delta_{}_{}_{}".format(first, second, axis),
+                                                  cat=pulp.LpBinary))
+                    model += (coords[axis][first] + [widths, heights][axis][first] <=
+                              coords[axis][second] + deltas[-1] * big_m)
+                model += pulp.lpSum(deltas) <= len(deltas) - 1
+            for i, j, axis in ordered:
+                model += coords[axis][i] <= coords[axis][j]
+
+            # the x of a block no other block fits beside is left without
+            # rows: its width boundary keeps it in the model (and in the
+            # solution read by extract)
+            in_rows = set(block for options in relations.values()
+                          for first, second, axis, _ in options if axis == 0
+                          for block in (first, second))
+            for i in range(n_blocks):
+                if i not in in_rows and i != biggest_rect_idx:
+                    model += (x_coord[i] + widths[i] <= max_width,
+                              "width boundary r_{}".format(i))
+        return model
+    
+    with family(families, "non_overlap", n_constraints):
+        for i in range(n_blocks):
+            for j in range(n_blocks):
+                if i < j:
+                    
+                    # width constraint
+                    if widths[i] + widths[j] > max_width:
+                        model += delta[i][j][0] == 1
+                        model += delta[j][i][0] == 1
+
+                    # i-j non overlap x
+                    model += x_coord[i] + widths[i] <= x_coord[j] + (delta[i][j][0]) * max_width
+                    
+                    # j-i non overlap x
+                    model += x_coord[j] + widths[j] <= x_coord[i] + (delta[j][i][0]) * max_width
+                    
+                    # i-j non overlap y
+                    model += y_coord[i] + heights[i] <= y_coord[j] + (delta[i][j][1]) * upper_bound
+                    
+                    # j-i non overlap y
+                    model += y_coord[j] + heights[j] <= y_coord[i] + (delta[j][i][1]) * upper_bound
+                    
+                    # checking 4 conditions
+                    model += (delta[i][j][0] + delta[j][i][0] + delta[i][j][1] + delta[j][i][1] <= 3 )
 
     return model
 
 # ------------------ END FUNCTION ----------------------------
 
-def build_pulp_model_rot(max_width, n_blocks, widths, heights):
+def build_pulp_model_rot(instance, upper_bound=None, families=None):
     
+    max_width, n_blocks = instance.max_width, instance.n_blocks
+    widths, heights = instance.widths.tolist(), instance.heights.tolist()
+
     # define the model
     model = pulp.LpProblem("vlsi-with-rotation", pulp.LpMinimize)
+    n_constraints = lambda: len(model.constraints)
 
     # bounds for the height
     lower_bound = max(
         max([min(widths[i], heights[i]) for i in range(n_blocks)]),
         math.ceil(sum([widths[i] * heights[i] for i in range(n_blocks)]) / max_width))
-    upper_bound = int(sum([max(heights[i], widths[i]) for i in range(n_blocks)]))
+    if upper_bound is None:
+        upper_bound = int(sum([max(heights[i], widths[i]) for i in range(n_blocks)]))
 
     # defining height variable
     height = pulp.LpVariable("height",
@@ -133,16 +296,18 @@ def build_pulp_model_rot(max_width, n_blocks, widths, heights):
             rotation[i] = 0
 
     # width boundary constraint
-    for i in range(n_blocks):
-        model += (x_coord[i] + widths[i] * (1 - rotation[i]) +
-                  heights[i] * rotation[i] <= max_width,
-            "width boundary r_{}".format(i))
+    with family(families, "width", n_constraints):
+        for i in range(n_blocks):
+            model += (x_coord[i] + widths[i] * (1 - rotation[i]) +
+                      heights[i] * rotation[i] <= max_width,
+                "width boundary r_{}".format(i))
         
     # height boundary constraint
-    for i in range(n_blocks):
-        model += (y_coord[i] + heights[i] * (1 - rotation[i]) +
-                  widths[i] * rotation[i] <= height,
-            "height boundary r_{}".format(i))
+    with family(families, "height", n_constraints):
+        for i in range(n_blocks):
+            model += (y_coord[i] + heights[i] * (1 - rotation[i]) +
+                      widths[i] * rotation[i] <= height,
+                "height boundary r_{}".format(i))
 
     # delta value 
     delta = pulp.LpVariable.dicts(
@@ -162,113 +327,161 @@ def build_pulp_model_rot(max_width, n_blocks, widths, heights):
     model += y_coord[biggest_rect_idx] == 0, "biggest y_coord"
 
     # non overlapping constraints
-    for i in range(n_blocks):
-        for j in range(n_blocks):
-            if i < j:
-                
-                # 
-                if all([(u + v) > max_width
-                        for u in [widths[i], heights[i]]
-                        for v in [widths[j], heights[i]]]):
-                    model += delta[i][j][0] == 1
-                    model += delta[j][i][0] == 1
-
-                # x axis i-j
-                model += (x_coord[i] + widths[i] * (1 - rotation[i]) +
-                          heights[i] * rotation[i] <=
-                          x_coord[j] + delta[i][j][0] * max_width)
-                
-                # x axis j-i
-                model += (x_coord[j] + widths[j] * (1 - rotation[j]) +
-                          heights[j] * rotation[j] <=
-                          x_coord[i] + delta[j][i][0] * max_width)
-
-                # y axis i-j
-                model += (y_coord[i] + heights[i] * (1 - rotation[i]) +
-                          widths[i] * rotation[i] <=
-                          y_coord[j] + delta[i][j][1] * upper_bound)
-                
-                # y axis j-i
-                model += (y_coord[j] + heights[j] * (1 - rotation[j]) +
-                          widths[j] * rotation[j] <=
-                          y_coord[i] + delta[j][i][1] * upper_bound)
-
-                # checking 4 conditions
-                model += (delta[i][j][0] + delta[j][i][0] + delta[i][j][1] + delta[j][i][1] <= 3)
+    with family(families, "non_overlap", n_constraints):
+        for i in range(n_blocks):
+            for j in range(n_blocks):
+                if i < j:
+                    
+                    # 
+                    if all([(u + v) > max_width
+                            for u in [widths[i], heights[i]]
+                            for v in [widths[j], heights[i]]]):
+                        model += delta[i][j][0] == 1
+                        model += delta[j][i][0] == 1
 
-    return model
+                    # x axis i-j
+                    model += (x_coord[i] + widths[i] * (1 - rotation[i]) +
+                              heights[i] * rotation[i] <=
+                              x_coord[j] + delta[i][j][0] * max_width)
+                    
+                    # x axis j-i
+                    model += (x_coord[j] + widths[j] * (1 - rotation[j]) +
+                              heights[j] * rotation[j] <=
+                              x_coord[i] + delta[j][i][0] * max_width)
 
-# ------------------ END FUNCTION ----------------------------
+                    # y axis i-j
+                    model += (y_coord[i] + heights[i] * (1 - rotation[i]) +
+                              widths[i] * rotation[i] <=
+                              y_coord[j] + delta[i][j][1] * upper_bound)
+                    
+                    # y axis j-i
+                    model += (y_coord[j] + heights[j] * (1 - rotation[j]) +
+                              widths[j] * rotation[j] <=
+                              y_coord[i] + delta[j][i][1] * upper_bound)
 
-print("INSTANCE   --   TIME")
+                    # checking 4 conditions
+                    model += (delta[i][j][0] + delta[j][i][0] + delta[i][j][1] + delta[j][i][1] <= 3)
 
-n_files = len([f for f in os.listdir("./instances")
-               if os.path.isfile(os.path.join("./instances", f))])
+    return model
 
-# cycle over the list of input files
-for i in range(1, n_files+1):
-    
-    # opening file
-    filename = "./instances/ins-{}.txt".format(i)
-    file = open(filename)
+# ------------------ END FUNCTION ----------------------------
+
+def build_pulp_window_model(widths, heights, window, obstacles, min_height,
+                            layout=None):
     
-    # max_width
-    max_width = int(file.readline())
+    # sub-model of the large neighbourhood search (common/lns.py): the
+    # blocks given by widths/heights are placed again inside the window
+    # (x0, y0, x1, y1), around the obstacles (x, y, w, h) fixed by the rest
+    # of the layout. The objective is the height first (at least min_height,
+    # the top of the fixed blocks), then the sum of the y, pushing the blocks
+    # down to make room for the next moves. layout: current positions of the
+    # blocks (x and y lists), used as MIP start
+    x0, y0, x1, y1 = window
+    n_blocks = len(widths)
+    model = pulp.LpProblem("vlsi-window", pulp.LpMinimize)
     
-    # n_blocks
-    n_blocks = int(file.readline())
+    height = pulp.LpVariable("height", lowBound=min_height, upBound=y1,
+                             cat=pulp.LpInteger)
+    x_coord = [pulp.LpVariable("x_{}".format(i), lowBound=x0,
+                               upBound=x1 - widths[i], cat=pulp.LpInteger)
+               for i in range(n_blocks)]
+    y_coord = [pulp.LpVariable("y_{}".format(i), lowBound=y0,
+                               upBound=y1 - heights[i], cat=pulp.LpInteger)
+               for i in range(n_blocks)]
+    model += (n_blocks * y1 + 1) * height + pulp.lpSum(y_coord), "height"
     
-    # width and height
-    widths, heights = [], []
-    for line in file:
-        splitted = line.split()
-        widths.append(int(splitted[0]))
-        heights.append(int(splitted[1]))
-        
-    # model selection
-    model_name = "base" # base | rot
-    if model_name == "base":
-        model = build_pulp_model(max_width, n_blocks, widths, heights)
-    else:
-        model = build_pulp_model_rot(max_width, n_blocks, widths, heights)
-
-    # solver selection
-    solver_name = "mosek" # cplex | mosek
-    if solver_name == "cplex":
-        solver = pulp.CPLEX_CMD(mip=True,
-                                msg=False,
-                                timeLimit=300)
-    else:
-        solver = pulp.MOSEK(mip=True,
-                            msg=False,
-                            options={mosek.dparam.mio_max_time: 300})
+    for i in range(n_blocks):
+        model += y_coord[i] + heights[i] <= height, "height boundary r_{}".format(i)
     
-    # measuring performances of solve
-    start_time = time.time()
-    model.solve(solver)
-    end_time = time.time()
+    # non overlapping: one of the four relative positions holds. A position
+    # impossible inside the window is dropped, a single possible one needs
+    # no binary variable
+    def non_overlap(name, options):
+        options = [(lhs, rhs, big_m) for lhs, rhs, big_m, possible in options if possible]
+        if len(options) == 1:
+            lhs, rhs, _ = options[0]
+            model.addConstraint(lhs <= rhs, name)
+            return
+        delta = [pulp.LpVariable("delta_{}_{}".format(name, k), cat=pulp.LpBinary)
+                 for k in range(len(options))]
+        for k, (lhs, rhs, big_m) in enumerate(options):
+            model.addConstraint(lhs <= rhs + delta[k] * big_m)
+        model.addConstraint(pulp.lpSum(delta) <= len(options) - 1)
     
-    # printing time performances
-    time_spent = end_time - start_time
-    print("ins-{}".format(i) + "\t{:.2f}".format(time_spent))
+    big_x, big_y = x1 - x0, y1 - y0
+    for i in range(n_blocks):
+        for j in range(i + 1, n_blocks):
+            non_overlap("{}_{}".format(i, j), [
+                (x_coord[i] + widths[i], x_coord[j], big_x, widths[i] + widths[j] <= big_x),
+                (x_coord[j] + widths[j], x_coord[i], big_x, widths[i] + widths[j] <= big_x),
+                (y_coord[i] + heights[i], y_coord[j], big_y, heights[i] + heights[j] <= big_y),
+                (y_coord[j] + heights[j], y_coord[i], big_y, heights[i] + heights[j] <= big_y)])
+        for o, (o_x, o_y, o_w, o_h) in enumerate(obstacles):
+            non_overlap("{}_o{}".format(i, o), [
+                (x_coord[i] + widths[i], o_x, big_x, o_x - x0 >= widths[i]),
+                (o_x + o_w, x_coord[i], big_x, x1 - (o_x + o_w) >= widths[i]),
+                (y_coord[i] + heights[i], o_y, big_y, o_y - y0 >= heights[i]),
+                (o_y + o_h, y_coord[i], big_y, y1 - (o_y + o_h) >= heights[i])])
     
-    output_filename = "out-{}.txt".format(i)
-    output_path = "../out/" + output_filename
-    output_file = open(output_path, "w")
+    if layout is not None:
+        height.setInitialValue(max([min_height] +
+                                   [layout[1][i] + heights[i] for i in range(n_blocks)]))
+        for i in range(n_blocks):
+            x_coord[i].setInitialValue(layout[0][i])
+            y_coord[i].setInitialValue(layout[1][i])
     
-    result = {}
+    return model, x_coord, y_coord
+
+# ------------------ END FUNCTION ----------------------------
+
+def make_solver(solver_name, warm_start=False, log_path=None, seed=None,
+                time_limit=300):
     
-    # for var in model.variables():
-    #     print(f"{var.name}: {var.value()}")
-    #     print(pulp.value(model.objective))
+    # solver selection (MOSEK through PuLP does not accept a MIP start)
+    if solver_name == "cplex":
+        return pulp.CPLEX_CMD(mip=True,
+                              msg=False,
+                              timeLimit=time_limit,
+                              warmStart=warm_start,
+                              logPath=log_path,
+                              options=[] if seed is None else
+                                      ["set randomseed {}".format(seed)])
+    if solver_name == "cbc":
+        return pulp.PULP_CBC_CMD(mip=True,
+                                 msg=False,
+                                 timeLimit=time_limit,
+                                 warmStart=warm_start,
+                                 logPath=log_path,
+                                 options=[] if seed is None else
+                                         ["randomCbcSeed {}".format(seed)])
+    import mosek
+    options = {mosek.dparam.mio_max_time: time_limit}
+    if seed is not None:
+        options[mosek.iparam.mio_seed] = seed
+    return pulp.MOSEK(mip=True,
+                      msg=False,
+                      options=options)
+
+# ------------------ END FUNCTION ----------------------------
+
+def solution_status(model):
     
-    # checking results
-    if (pulp.value(model.objective) == None) or (time_spent > 300):
-        print(pulp.value(model.objective))
-        output_file.write("TIMEOUT")
-        continue
+    # status of the solution found: OPTIMAL only for a proven optimum. PuLP
+    # sets model.status to "Optimal" also when CBC stops on its time limit
+    # with an incumbent, only sol_status tells the two apart
+    if model.sol_status == pulp.LpSolutionOptimal:
+        return "OPTIMAL"
+    if model.sol_status == pulp.LpSolutionIntegerFeasible:
+        return "SAT"
+    if model.sol_status == pulp.LpSolutionInfeasible:
+        return "UNSAT"
+    return "TIMEOUT"
+
+# ------------------ END FUNCTION ----------------------------
+
+def extract(model, n_blocks):
     
-    result["height"] = round(pulp.value(model.objective))
+    # coordinates and rotations from the values of the variables
     rotation = [False] * n_blocks
     coordinates = {"x": [None] * n_blocks,
                    "y": [None] * n_blocks}
@@ -280,19 +493,174 @@ for i in range(1, n_files+1):
             coordinates["y"][int(var.name[2:])] = round(var.varValue)
         elif str(var.name).startswith("rot"):
             rotation[int(var.name[4:])] = bool(round(var.varValue))
+    
+    return coordinates, rotation
+
+# ------------------ END FUNCTION ----------------------------
 
-    result["coords"] = coordinates
-    result["rotation"] = rotation if model_name == "rot" else None
+if __name__ == "__main__":
+    
+    # runtime options: model, solver and heuristic warm start
+    parser = argparse.ArgumentParser(description="MIP model for VLSI design")
+    parser.add_argument("--model", default="base", choices=["base", "rot"])
+    parser.add_argument("--solver", default="mosek",
+                        choices=["mosek", "cplex", "cbc", "highs"],
+                        help="highs: sparse model solved with HiGHS (scipy), base model only")
+    parser.add_argument("--warm-start", action="store_true",
+                        help="start from a constructive packing, whose height "
+                             "also bounds the height and the y big-M")
+    parser.add_argument("--loose", action="store_true",
+                        help="base model without the pair preprocessing "
+                             "(global big-M, full delta index set)")
+    parser.add_argument("--fallback", action="store_true",
+                        help="write the skyline layout instead of TIMEOUT")
+    parser.add_argument("--out-dir", default="../out",
+                        help="directory of the out-N.txt files")
+    parser.add_argument("--bound-file", default=None,
+                        help="height bounds shared with other approaches (portfolio)")
+    parser.add_argument("--results-db", default=DB_PATH,
+                        help='results database ("" to disable)')
+    parser.add_argument("--run", default=default_run(),
+                        help="label of this run in the results database")
+    parser.add_argument("--instance-dir", default="./instances",
+                        help="directory of the ins-N.txt files (e.g. generated ones)")
+    parser.add_argument("--instances", nargs="+", type=int,
+                        help="instance numbers to run (default: all)")
+    args = parser.parse_args()
+    model_name = args.model
+    if args.solver == "highs" and model_name != "base":
+        parser.error("--solver highs supports only --model base")
+    
+    print("INSTANCE   --   TIME")
     
-    #print(result)
+    n_files = len([f for f in os.listdir(args.instance_dir)
+                   if f.startswith("ins-") and f.endswith(".txt")])
     
-    # printing output files
-    output_file.write(str(max_width) + ' ' + str(result["height"]) + '\n')
-    output_file.write(str(n_blocks) + '\n')
-    zipped_data = zip(widths, heights, result["coords"]["x"], result["coords"]["y"])
-    for(width, height, c_x, c_y) in zipped_data:
-        output_file.write(str(width) + ' ' +
-                          str(height) + ' ' +
-                          str(c_x) + ' ' +
-                          str(c_y) + '\n')
-    output_file.close()
\ No newline at end of file
+    # instances parsed (or taken from the cache) in a single pass
+    numbers = args.instances or range(1, n_files+1)
+    instances = load_instances([os.path.join(args.instance_dir, "ins-{}.txt".format(i))
+                                for i in numbers])
+    
+    # cycle over the list of input files
+    for i, instance in zip(numbers, instances):
+        
+        max_width, n_blocks = instance.max_width, instance.n_blocks
+        widths, heights = instance.widths.tolist(), instance.heights.tolist()
+        
+        # heuristic layout: upper bound and MIP start
+        layout, upper_bound = None, None
+        if args.warm_start:
+            layout = constructive_packing(max_width, n_blocks, widths, heights)
+            upper_bound = layout["height"]
+        
+        # HiGHS: sparse model, solved through scipy.optimize.milp
+        if args.solver == "highs":
+            encode_start = time.time()
+            families = {}
+            model = build_sparse_model(max_width, widths, heights, upper_bound,
+                                       families)
+            encode_time = time.time() - encode_start
+            
+            start_time = time.time()
+            res = solve_sparse(model)
+            end_time = time.time()
+            time_spent = end_time - start_time
+            print("ins-{}".format(i) + "\t{:.2f}".format(time_spent))
+            
+            status, found_height = res["status"], res["height"]
+            proven = status == "OPTIMAL"
+            coordinates = {"x": res["corner_x"], "y": res["corner_y"]}
+            statistics = collect(res["statistics"], families)
+        
+        else:
+            # model selection
+            encode_start = time.time()
+            families = {}
+            if model_name == "base":
+                model = build_pulp_model(instance, upper_bound, families,
+                                         tighten=not args.loose)
+                if layout is not None and not args.loose:
+                    layout = order_identical(layout, instance)
+            else:
+                model = build_pulp_model_rot(instance, upper_bound, families)
+            if layout is not None:
+                set_warm_start(model, layout, widths, heights)
+            
+            # solver log, read back for the statistics (nodes, gap, ...)
+            log_path = os.path.join(tempfile.gettempdir(),
+                                    "mip-{}-{}.log".format(os.getpid(), i))
+            solver = make_solver(args.solver, warm_start=args.warm_start,
+                                 log_path=log_path)
+            encode_time = time.time() - encode_start
+            
+            # measuring performances of solve
+            start_time = time.time()
+            model.solve(solver)
+            end_time = time.time()
+            
+            # printing time performances
+            time_spent = end_time - start_time
+            print("ins-{}".format(i) + "\t{:.2f}".format(time_spent))
+            
+            # status from the solution (sol_status), not from the wall time
+            status = solution_status(model)
+            objective = pulp.value(model.objective)
+            if objective is None and status in ("OPTIMAL", "SAT"):
+                status = "TIMEOUT"
+            found_height = round(objective) if status in ("OPTIMAL", "SAT") else None
+            proven = status == "OPTIMAL"
+            coordinates = extract(model, n_blocks)[0] if found_height is not None else None
+            statistics = collect(pulp_log_statistics(args.solver, log_path), families)
+            if os.path.isfile(log_path):
+                os.remove(log_path)
+        
+        record_run(args.results_db, args.run, instance, "MIP",
+                   model_name + ("+warm" if args.warm_start else "") +
+                   ("+loose" if args.loose else ""), args.solver,
+                   found_height, status, encode_time + time_spent, encode_time,
+                   time_spent, statistics)
+        
+        output_filename = "out-{}.txt".format(i)
+        output_path = os.path.join(args.out_dir, output_filename)
+        output_file = open(output_path, "w")
+        
+        # checking results
+        if found_height is None:
+            print(status)
+            if not args.fallback:
+                output_file.write("TIMEOUT")
+                output_file.close()
+                continue
+            
+            # CASE FALLBACK: the skyline layout is written
+            print("TIMEOUT, writing the skyline layout")
+            if layout is None:
+                layout = constructive_packing(max_width, n_blocks, widths, heights)
+            output_file.write(str(max_width) + ' ' + str(layout["height"]) + '\n')
+            output_file.write(str(n_blocks) + '\n')
+            zipped_data = zip(widths, heights, layout["corner_x"], layout["corner_y"])
+            for(width, height, c_x, c_y) in zipped_data:
+                output_file.write(str(width) + ' ' +
+                                  str(height) + ' ' +
+                                  str(c_x) + ' ' +
+                                  str(c_y) + '\n')
+            output_file.close()
+            continue
+        
+        # bounds shared with other approaches (portfolio): a lower bound only
+        # for a proven optimum, a time-limited incumbent is just a layout
+        if proven:
+            update_bounds(args.bound_file, lower=found_height, upper=found_height)
+        else:
+            update_bounds(args.bound_file, upper=found_height)
+        
+        # printing output files
+        output_file.write(str(max_width) + ' ' + str(found_height) + '\n')
+        output_file.write(str(n_blocks) + '\n')
+        zipped_data = zip(widths, heights, coordinates["x"], coordinates["y"])
+        for(width, height, c_x, c_y) in zipped_data:
+            output_file.write(str(width) + ' ' +
+                              str(height) + ' ' +
+                              str(c_x) + ' ' +
+                              str(c_y) + '\n')
+        output_file.close()
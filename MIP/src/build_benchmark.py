@@ -0,0 +1,72 @@
+import argparse, csv, os, tempfile, time
+from MIP import build_pulp_model
+from sparse_model import build_sparse_model
+from instance import load_instance
+
+# Compares the construction of the base model through PuLP (expression
+# objects, then the MPS file PuLP writes for the solver) with the sparse
+# builder (sparse_model.py, constraint matrix assembled directly as
+# scipy.sparse arrays). For each instance it reports the build time of both,
+# and the columns, rows and binaries of each model (both create only the
+# binaries of the relative positions that are possible; the PuLP model also
+# orders the identical blocks, see pair_relations in MIP.py).
+
+parser = argparse.ArgumentParser(description="MIP model build benchmark")
+parser.add_argument("--first", type=int, default=1, help="first instance")
+parser.add_argument("--last", type=int, default=40, help="last instance")
+parser.add_argument("--instance-dir", default="./instances",
+                    help="directory of the ins-N.txt files (e.g. generated ones)")
+parser.add_argument("--csv", default="build_benchmark.csv")
+args = parser.parse_args()
+
+rows = []
+print("INSTANCE   --   PULP (BUILD + MPS)   --   SPARSE   --   BINARIES PULP / SPARSE")
+for i in range(args.first, args.last + 1):
+
+    filename = os.path.join(args.instance_dir, "ins-{}.txt".format(i))
+    if not os.path.isfile(filename):
+        continue
+    instance = load_instance(filename)
+    max_width, n_blocks = instance.max_width, instance.n_blocks
+    widths, heights = instance.widths.tolist(), instance.heights.tolist()
+
+    # PuLP: expressions, then the MPS file handed to the solver
+    start_time = time.time()
+    model = build_pulp_model(instance, instance.upper_bound)
+    pulp_build = time.time() - start_time
+    with tempfile.TemporaryDirectory() as temp_dir:
+        start_time = time.time()
+        model.writeMPS(os.path.join(temp_dir, "model.mps"))
+        pulp_write = time.time() - start_time
+    pulp_binaries = sum(var.cat == "Integer" and var.upBound == 1 and var.lowBound == 0
+                        for var in model.variables())
+
+    # sparse: matrix and bounds ready for scipy.optimize.milp
+    start_time = time.time()
+    sparse = build_sparse_model(max_width, widths, heights, instance.upper_bound)
+    sparse_build = time.time() - start_time
+    matrix = sparse["constraints"].A
+
+    print("ins-{}\t{:.3f} + {:.3f}\t{:.3f}\t{} / {}".format(
+        i, pulp_build, pulp_write, sparse_build, pulp_binaries, sparse["n_binaries"]))
+    rows.append({"instance": i,
+                 "n_blocks": n_blocks,
+                 "pulp_build": round(pulp_build, 4),
+                 "pulp_write": round(pulp_write, 4),
+                 "pulp_columns": len(model.variables()),
+                 "pulp_rows": len(model.constraints),
+                 "pulp_binaries": pulp_binaries,
+                 "sparse_build": round(sparse_build, 4),
+                 "sparse_columns": matrix.shape[1],
+                 "sparse_rows": matrix.shape[0],
+                 "sparse_binaries": sparse["n_binaries"]})
+
+with open(args.csv, "w", newline="") as csv_file:
+    writer = csv.DictWriter(csv_file, fieldnames=list(rows[0].keys()))
+    writer.writeheader()
+    writer.writerows(rows)
+
+total_pulp = sum(row["pulp_build"] + row["pulp_write"] for row in rows)
+total_sparse = sum(row["sparse_build"] for row in rows)
+print("\ntotal\tPuLP {:.2f}s\tsparse {:.2f}s\tspeedup {:.1f}x".format(
+    total_pulp, total_sparse, total_pulp / max(total_sparse, 1e-9)))
@@ -0,0 +1,148 @@
+import math
+import numpy as np
+from scipy import sparse
+from scipy.optimize import Bounds, LinearConstraint, milp
+from instrumentation import family
+
+# The base MIP model (build_pulp_model in MIP.py) assembled directly as a
+# scipy.sparse constraint matrix, without PuLP expression objects, and solved
+# with HiGHS through scipy.optimize.milp (open source, no license needed).
+#
+# Variables (columns):
+#   height, x_0..x_{n-1}, y_0..y_{n-1}, then the binaries of the pairs i < j
+# Only the needed binaries are created: one per relative position that is
+# possible for the pair (i left of j, j left of i, i below j, j below i),
+# a position being impossible when the pair is too wide to stay side by side
+# or too tall to be stacked within the upper bound. A pair with a single
+# possible position gets a plain row, no binary. Rows (all "<= rhs"):
+#   y_i - height                <= -h_i                   (height)
+#   x_i - x_j - M * delta       <= -w_i                   (non_overlap)
+#   sum of the deltas of a pair <= number of deltas - 1   (non_overlap)
+
+def build_sparse_model(max_width, widths, heights, upper_bound=None,
+                       families=None):
+    # returns the model as a dictionary of milp arguments and column indices
+    widths = np.asarray(widths, dtype=np.int64)
+    heights = np.asarray(heights, dtype=np.int64)
+    n_blocks = len(widths)
+    lower_bound = max(int(heights.max()),
+                      math.ceil(int((widths * heights).sum()) / max_width))
+    if upper_bound is None:
+        upper_bound = int(heights.sum())
+
+    height_col = 0
+    x_col = 1 + np.arange(n_blocks)
+    y_col = 1 + n_blocks + np.arange(n_blocks)
+    n_cols = 1 + 2 * n_blocks
+
+    # the rows are gathered as COO triplets
+    rows, cols, values, rhs = [], [], [], []
+    n_rows = lambda: sum(len(r) for r in rhs)
+
+    def add_rows(row_cols, row_values, row_rhs):
+        # row_cols, row_values: (n_new_rows, k) arrays, row_rhs: (n_new_rows,)
+        first = n_rows()
+        row_index = first + np.arange(len(row_rhs))
+        rows.append(np.repeat(row_index, row_cols.shape[1]))
+        cols.append(row_cols.ravel())
+        values.append(row_values.ravel())
+        rhs.append(np.asarray(row_rhs, dtype=float))
+
+    with family(families, "height", n_rows):
+        add_rows(np.stack([y_col, np.full(n_blocks, height_col)], axis=1),
+                 np.tile([1, -1], (n_blocks, 1)), -heights)
+
+    with family(families, "non_overlap", n_rows):
+        i, j = np.triu_indices(n_blocks, k=1)
+        # the four relative positions: (first, second, coordinate columns,
+        # sizes, big-M, possible)
+        side = widths[i] + widths[j] <= max_width
+        stack = heights[i] + heights[j] <= upper_bound
+        positions = [(i, j, x_col, widths, max_width, side),
+                     (j, i, x_col, widths, max_width, side),
+                     (i, j, y_col, heights, upper_bound, stack),
+                     (j, i, y_col, heights, upper_bound, stack)]
+        n_options = 2 * side + 2 * stack
+
+        # one binary per possible position of the pairs with 2+ options
+        needs_binary = [possible & (n_options > 1) for *_, possible in positions]
+        delta_col = []
+        for needed in needs_binary:
+            delta_col.append(np.full(len(i), -1))
+            delta_col[-1][needed] = n_cols + np.arange(needed.sum())
+            n_cols += int(needed.sum())
+
+        for (first, second, coord, sizes, big_m, possible), delta in \
+                zip(positions, delta_col):
+            # with binary: coord_first - coord_second - M * delta <= -size_first
+            with_binary = delta >= 0
+            add_rows(np.stack([coord[first[with_binary]], coord[second[with_binary]],
+                               delta[with_binary]], axis=1),
+                     np.tile([1, -1, -big_m], (int(with_binary.sum()), 1)),
+                     -sizes[first[with_binary]])
+            # single option: coord_first - coord_second <= -size_first
+            hard = possible & (n_options == 1)
+            add_rows(np.stack([coord[first[hard]], coord[second[hard]]], axis=1),
+                     np.tile([1, -1], (int(hard.sum()), 1)),
+                     -sizes[first[hard]])
+
+        # at most all but one of the deltas of a pair are 1
+        pairs = np.flatnonzero(n_options > 1)
+        pair_deltas = np.stack([delta[pairs] for delta in delta_col], axis=1)
+        for k in range(2, 5):
+            subset = n_options[pairs] == k
+            if not subset.any():
+                continue
+            # columns of the existing deltas of these pairs (k of them each)
+            existing = pair_deltas[subset]
+            existing = existing[existing >= 0].reshape(-1, k)
+            add_rows(existing, np.ones_like(existing), np.full(len(existing), k - 1))
+
+    matrix = sparse.csr_array((np.concatenate(values).astype(float),
+                               (np.concatenate(rows), np.concatenate(cols))),
+                              shape=(n_rows(), n_cols))
+
+    # bounds: the biggest block is placed in (0, 0), as in the PuLP model
+    lower = np.zeros(n_cols)
+    upper = np.ones(n_cols)
+    lower[height_col], upper[height_col] = lower_bound, upper_bound
+    upper[x_col] = max_width - widths
+    upper[y_col] = upper_bound - heights
+    biggest = int(np.argmax(widths * heights))
+    upper[x_col[biggest]] = upper[y_col[biggest]] = 0
+
+    objective = np.zeros(n_cols)
+    objective[height_col] = 1
+    return {"c": objective,
+            "integrality": np.ones(n_cols),
+            "bounds": Bounds(lower, upper),
+            "constraints": LinearConstraint(matrix, -np.inf, np.concatenate(rhs)),
+            "height": height_col,
+            "x": x_col,
+            "y": y_col,
+            "n_binaries": n_cols - 1 - 2 * n_blocks}
+
+# ------------------ END FUNCTION --------------------
+
+def solve_sparse(model, time_limit=300):
+    # HiGHS through scipy.optimize.milp; returns status (OPTIMAL, SAT,
+    # UNSAT, TIMEOUT), height and corners (None without a solution) and the
+    # statistics of the search
+    res = milp(model["c"], integrality=model["integrality"],
+               bounds=model["bounds"], constraints=model["constraints"],
+               options={"time_limit": time_limit, "disp": False})
+    statistics = {"nodes": getattr(res, "mip_node_count", None),
+                  "dual_bound": getattr(res, "mip_dual_bound", None),
+                  "gap": getattr(res, "mip_gap", None)}
+    if res.x is None:
+        status = "UNSAT" if res.status == 2 else "TIMEOUT"
+        return {"status": status, "height": None, "corner_x": None,
+                "corner_y": None, "statistics": statistics}
+    solution = np.round(res.x).astype(np.int64)
+    return {"status": "OPTIMAL" if res.status == 0 else "SAT",
+            "height": int(solution[model["height"]]),
+            "corner_x": solution[model["x"]].tolist(),
+            "corner_y": solution[model["y"]].tolist(),
+            "statistics": statistics}
+
+# ------------------ END FUNCTION --------------------
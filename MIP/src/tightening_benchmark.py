@@ -0,0 +1,84 @@
+import argparse, csv, os, time
+import pulp
+from MIP import build_pulp_model, make_solver, solution_status
+from instance import load_instance
+
+# Measures the pair preprocessing of build_pulp_model (pair_relations: only
+# the possible relative positions, ordered identical blocks, big-M of each
+# pair) against the previous model (--loose in MIP.py). For each instance
+# and model it reports the size of the model (columns, binaries, rows), the
+# bound of the LP relaxation, and the height, status and time of the solve
+# (--timeout seconds, MIP start off, same solver).
+
+parser = argparse.ArgumentParser(description="MIP pair preprocessing benchmark")
+parser.add_argument("--solver", default="cbc", choices=["mosek", "cplex", "cbc"])
+parser.add_argument("--first", type=int, default=1, help="first instance")
+parser.add_argument("--last", type=int, default=40, help="last instance")
+parser.add_argument("--timeout", type=int, default=300,
+                    help="seconds per instance and model")
+parser.add_argument("--upper-bound", default="skyline", choices=["skyline", "sum"],
+                    help="height bound (and y big-M): skyline layout or sum of the heights")
+parser.add_argument("--instance-dir", default="./instances",
+                    help="directory of the ins-N.txt files (e.g. generated ones)")
+parser.add_argument("--csv", default="tightening_benchmark.csv")
+args = parser.parse_args()
+
+rows = []
+print("INSTANCE   --   MODEL   --   BINARIES   --   ROWS   --   LP BOUND   --   HEIGHT   --   TIME")
+for i in range(args.first, args.last + 1):
+
+    filename = os.path.join(args.instance_dir, "ins-{}.txt".format(i))
+    if not os.path.isfile(filename):
+        continue
+    instance = load_instance(filename)
+    upper_bound = instance.upper_bound if args.upper_bound == "skyline" else None
+
+    for name, tighten in [("loose", False), ("tight", True)]:
+        model = build_pulp_model(instance, upper_bound, tighten=tighten)
+        binaries = sum(var.cat == pulp.LpInteger and var.lowBound == 0 and var.upBound == 1
+                       for var in model.variables())
+        n_rows = len(model.constraints)
+
+        # LP relaxation: same model, solver run without integrality
+        solver = make_solver(args.solver, time_limit=args.timeout)
+        solver.mip = False
+        model.solve(solver)
+        lp_bound = pulp.value(model.objective)
+
+        start_time = time.time()
+        model.solve(make_solver(args.solver, time_limit=args.timeout))
+        time_spent = time.time() - start_time
+        objective = pulp.value(model.objective)
+        # proven optimum only (a CBC time limit with an incumbent is SAT)
+        status = solution_status(model)
+
+        print("ins-{}\t{}\t{}\t{}\t{:.2f}\t{}\t{:.2f}".format(
+            i, name, binaries, n_rows, lp_bound, objective, time_spent))
+        rows.append({"instance": i,
+                     "model": name,
+                     "columns": len(model.variables()),
+                     "binaries": binaries,
+                     "rows": n_rows,
+                     "lp_bound": lp_bound,
+                     "height": None if objective is None else round(objective),
+                     "optimal": status == "OPTIMAL",
+                     "time": round(time_spent, 3)})
+
+with open(args.csv, "w", newline="") as csv_file:
+    writer = csv.DictWriter(csv_file, fieldnames=list(rows[0].keys()))
+    writer.writeheader()
+    writer.writerows(rows)
+
+# summary: totals per model, speedup on the instances both solved
+print("\nMODEL   --   OPTIMAL   --   BINARIES   --   ROWS   --   TOTAL TIME")
+for name in ["loose", "tight"]:
+    model_rows = [row for row in rows if row["model"] == name]
+    print("{}\t{}/{}\t{}\t{}\t{:.2f}".format(
+        name, sum(row["optimal"] for row in model_rows), len(model_rows),
+        sum(row["binaries"] for row in model_rows),
+        sum(row["rows"] for row in model_rows),
+        sum(row["time"] for row in model_rows)))
+both = [(a, b) for a, b in zip(rows[0::2], rows[1::2]) if a["optimal"] and b["optimal"]]
+if both:
+    print("speedup on the {} instances solved by both: {:.2f}x".format(
+        len(both), sum(a["time"] for a, _ in both) / max(sum(b["time"] for _, b in both), 1e-9)))
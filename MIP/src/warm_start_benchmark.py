@@ -0,0 +1,112 @@
+import argparse, csv, os, re, time
+import pulp
+from MIP import (constructive_packing, set_warm_start, order_identical,
+                 build_pulp_model, build_pulp_model_rot, make_solver,
+                 solution_status)
+from instance import load_instance
+
+# Compares the current behaviour (no incumbent, sum(heights) as height bound
+# and y big-M) with the heuristic warm start (constructive packing as MIP
+# start, its height as bound and y big-M). For each instance and mode it
+# reports the time to the first incumbent and the time to optimality.
+#
+# The first incumbent time is read from the solver log (CBC, CPLEX). With the
+# warm start the constructive layout is already an incumbent, so its time is
+# the time spent by the heuristic.
+
+INCUMBENT_PATTERNS = {
+    "cbc": re.compile(r"Integer solution of \S+ found.*\(([\d.]+) seconds\)"),
+    "cplex": re.compile(r"Found incumbent of value \S+ after ([\d.]+) sec"),
+}
+
+def first_incumbent_time(solver_name, log_path):
+    if solver_name not in INCUMBENT_PATTERNS or not os.path.isfile(log_path):
+        return None
+    with open(log_path) as log_file:
+        match = INCUMBENT_PATTERNS[solver_name].search(log_file.read())
+    return float(match.group(1)) if match else None
+
+# ------------------ END FUNCTION ----------------------------
+
+parser = argparse.ArgumentParser(description="MIP warm start benchmark")
+parser.add_argument("--model", default="base", choices=["base", "rot"])
+parser.add_argument("--solver", default="cbc", choices=["mosek", "cplex", "cbc"])
+parser.add_argument("--first", type=int, default=1, help="first instance")
+parser.add_argument("--last", type=int, default=40, help="last instance")
+parser.add_argument("--csv", default="warm_start_benchmark.csv")
+args = parser.parse_args()
+
+build = build_pulp_model if args.model == "base" else build_pulp_model_rot
+log_path = "warm_start_benchmark.log"
+
+rows = []
+print("INSTANCE   --   MODE   --   HEIGHT   --   FIRST INCUMBENT   --   OPTIMAL")
+for i in range(args.first, args.last + 1):
+
+    filename = "./instances/ins-{}.txt".format(i)
+    if not os.path.isfile(filename):
+        continue
+    instance = load_instance(filename)
+    max_width, n_blocks = instance.max_width, instance.n_blocks
+    widths, heights = instance.widths.tolist(), instance.heights.tolist()
+
+    for mode in ["baseline", "warm"]:
+        first_incumbent = None
+        start_time = time.time()
+        if mode == "warm":
+            layout = constructive_packing(max_width, n_blocks, widths, heights)
+            first_incumbent = time.time() - start_time
+            model = build(instance, layout["height"])
+            # the base model orders the identical blocks (pair_relations)
+            if args.model == "base":
+                layout = order_identical(layout, instance)
+            set_warm_start(model, layout, widths, heights)
+        else:
+            model = build(instance)
+
+        if os.path.isfile(log_path):
+            os.remove(log_path)
+        solver = make_solver(args.solver, warm_start=(mode == "warm"),
+                             log_path=log_path)
+        solve_start = time.time()
+        model.solve(solver)
+        end_time = time.time()
+
+        if first_incumbent is None:
+            first_incumbent = first_incumbent_time(args.solver, log_path)
+        # proven optimum only (a CBC time limit with an incumbent is SAT)
+        optimal = solution_status(model) == "OPTIMAL"
+        height = pulp.value(model.objective)
+
+        row = {"instance": i,
+               "mode": mode,
+               "height": round(height) if height is not None else None,
+               "first_incumbent": None if first_incumbent is None
+                                  else round(first_incumbent, 3),
+               "optimal": round(end_time - start_time, 3) if optimal else None}
+        rows.append(row)
+        print("ins-{}\t{}\t{}\t{}\t{}".format(
+            i, mode, row["height"],
+            "-" if row["first_incumbent"] is None else row["first_incumbent"],
+            "-" if row["optimal"] is None else row["optimal"]))
+
+if os.path.isfile(log_path):
+    os.remove(log_path)
+
+with open(args.csv, "w", newline="") as csv_file:
+    writer = csv.DictWriter(csv_file, fieldnames=list(rows[0].keys()))
+    writer.writeheader()
+    writer.writerows(rows)
+
+# summary over the instances solved to optimality in both modes
+print("\nMODE   --   OPTIMAL   --   TIME TO OPTIMAL (common instances)")
+common = [i for i in {row["instance"] for row in rows}
+          if all(row["optimal"] is not None
+                 for row in rows if row["instance"] == i)]
+for mode in ["baseline", "warm"]:
+    mode_rows = [row for row in rows if row["mode"] == mode]
+    print("{}\t{}/{}\t{:.2f}".format(
+        mode,
+        sum(row["optimal"] is not None for row in mode_rows),
+        len(mode_rows),
+        sum(row["optimal"] for row in mode_rows if row["instance"] in common)))
@@ -1,237 +1,262 @@
-from z3 import *
-import os, math, time
+import argparse, os, sys, time
+from clause_generator import VariableLayout, generate_clauses
+from sat_backends import interruptible, make_backend
 
-def solve():
-    
-    # first: instantiate a solver
-    solver = Solver()
-    
-    # x_coord boolean variable (2-D matrix)
-    x_coord = [[Bool(f"x_coord_{i+1}_{w}")
-                for w in range(max_width)]
-               for i in range(n_blocks)]
-    
-    # y_coord boolean variable (2-D matrix)
-    y_coord = [[Bool(f"y_coord_{i+1}_{h}")
-                for h in range(min_height)] 
-               for i in range(n_blocks)]
-    
-    # variable to encode the relative x position of a rectangle w.r.t another
-    left = [[Bool(f"left_{i+1}_{j+1}")
-             if i!=j else 0 for j in range(n_blocks)] 
-            for i in range(n_blocks)]
-    
-    # variable to encode the relative y position of a rectangle w.r.t another
-    below = [[Bool(f"below_{i+1}_{j+1}")
-             if i!=j else 0 for j in range(n_blocks)] 
-            for i in range(n_blocks)]
-    
-    # order encoding constraints
-    for i in range(n_blocks):
-        # width
-        for w in range(max_width - widths[i], max_width):
-            solver.add(x_coord[i][w])
-        # height
-        for h in range(min_height - heights[i], min_height):
-            solver.add(y_coord[i][h])
-        # width
-        for w in range(0, max_width - widths[i]):
-            solver.add(Or(
-                Not(x_coord[i][w]),
-                x_coord[i][w+1])
-            )
-        # height
-        for h in range(0, min_height - heights[i]):
-            solver.add(Or(
-                Not(y_coord[i][h]),
-                y_coord[i][h+1])
-            )
-            
-    # IDEA: for each pair of rectangles, it must be true that one
-    # of the two must be on the left to the other (same for above/below)
-    for i in range(n_blocks):
-        for j in range(n_blocks):
-            # we consider comparisions only when i<j
-            if i >= j: continue
-            
-            solver.add(Or(
-                left[i][j],
-                left[j][i],
-                below[i][j],
-                below[j][i]
-            ))
-            
-    # non overlapping constraints x coord
-    def build_non_overlap_constraints_x_coord(i,j):
-        partial_clause = []
-        partial_clause.append([Not(x_coord[j][widths[i] - 1])])
-        for w in range(max_width - widths[i] - 1):
-            partial_clause.append([x_coord[i][w],
-                                   Not(x_coord[j][w + widths[i]])])
-        partial_clause.append([x_coord[i][max_width - widths[i] - 1]])
-        return partial_clause
-    
-    for i in range(n_blocks):
-        for j in range(i+1, n_blocks):
-            
-            # CONSTRAINT 1: if rect_i is on the right w.r.t rect_j, we
-            # must check if rect_j's x_coordinate does not overlap with rect_i
-            for literal in build_non_overlap_constraints_x_coord(i,j):
-                clause = [Not(left[i][j])] + literal
-                solver.add(Or(clause))
-            
-            # CONSTRAINT 2: same as CONSTRAINT 1, with i-j swapped
-            for literal in build_non_overlap_constraints_x_coord(j,i):
-                clause = [Not(left[j][i])] + literal
-                solver.add(Or(clause))
-    
-    # non overlapping constraints y coord
-    def build_non_overlap_constraints_y_coord(i,j):
-        partial_clause = []
-        partial_clause.append([Not(y_coord[j][heights[i] - 1])])
-        for h in range(min_height - heights[i] - 1):
-            partial_clause.append([y_coord[i][h],
-                                   Not(y_coord[j][h + heights[i]])])
-        partial_clause.append([y_coord[i][min_height - heights[i] - 1]])
-        return partial_clause
-    
-    for i in range(n_blocks):
-        for j in range(i+1, n_blocks):
-            
-            # CONSTRAINT 3: if rect_i is above rect_j, we
-            # must check if rect_j's y_coordinate does not overlap with rect_i
-            for literal in build_non_overlap_constraints_y_coord(i,j):
-                clause = [Not(below[i][j])] + literal
-                solver.add(Or(clause))
-            
-            # CONSTRAINT 4: same as CONSTRAINT 3, with i-j swapped
-            for literal in build_non_overlap_constraints_x_coord(j,i):
-                clause = [Not(below[j][i])] + literal
-                solver.add(Or(clause)) 
-    
-    # IDEA: preliminary check on pairs of rectangles, if x_coord_1 + x_coord_2 > max_width,
-    # then they cannot stay side by side (same for y_coords)
-    for i in range(n_blocks):
-        for j in range(i+1, n_blocks):
-            
-            # x_coord
-            if widths[i] + widths[j] > max_width:
-                solver.add(And(
-                    Not(left[i][j]),
-                    Not(left[j][i]))
-                )    
+# shared modules (instance model, portfolio bounds)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "..", "..", "common"))
+from instance import load_instances
+from bound import read_bounds, update_bounds
+from results import DB_PATH, default_run, record_run
+from instrumentation import collect, counted
+from patterns import normal_patterns
+from z3_config import CACHE_PATH, load_config, tuned_params
 
-            # y_coord
-            if heights[i] + heights[j] > min_height:
-                solver.add(And(
-                    Not(below[i][j]),
-                    Not(below[j][i]))
-                )
-    
-    # symmetry breaking constraints
-    for i in range(n_blocks):
-        for j in range(i+1, n_blocks):
-            
-            # if rect_1 and rect_2 have the same dimension, than we force rect_1
-            # to be on the left to eliminate symmetry (same for below)
-            if widths[i] == widths[j] and heights[i] == heights[j]:
-                solver.add(Not(left[j][i]))
-                solver.add(Or(
-                    left[i][j],
-                    Not(below[j][i]))
-                )
+# number of clauses handed to the backend at once
+BATCH_SIZE = 1 << 16
+
+def encode(instance, min_height, max_height, backend, families=None,
+           positions="normal"):
     
-    # setting timeout (300s)
-    solver.set("timeout", 300000)
+    # clauses are generated in bulk as NumPy literal arrays over a flat
+    # variable layout, and handed to the backend in batches. With a
+    # dictionary "families", clauses and generation time of every family
+    # are counted in it. positions="normal": the blocks are only placed on
+    # their normal patterns (sums of the other widths / heights), "all":
+    # on every position
+    max_width, widths, heights = instance.max_width, instance.widths, instance.heights
+    if positions == "normal":
+        layout = VariableLayout(len(widths), max_width, min_height, max_height,
+                                normal_patterns(widths, max_width),
+                                normal_patterns(heights, max_height))
+    else:
+        layout = VariableLayout(len(widths), max_width, min_height, max_height)
+    backend.new_vars(layout.n_vars)
     
-    if solver.check() != sat:
-        print(solver.check())
+    clause_families = generate_clauses(widths, heights, max_width,
+                                       min_height, max_height, layout,
+                                       instance.identical_groups,
+                                       instance.no_side_by_side)
+    for family, clauses in counted(clause_families, families):
+        for start in range(0, len(clauses), BATCH_SIZE):
+            backend.add_clauses(clauses[start:start + BATCH_SIZE])
     
-    if solver.check() == sat:
-        return {"solver": solver,
-                "x_coord": x_coord,
-                "y_coord": y_coord}
-    else: return {"solver": -1,
-                "x_coord": -1,
-                "y_coord": -1}
+    return layout
     
 # ------------------ END FUNCTION --------------------
 
-print("INSTANCE   --   TIME")
-
-n_files = len([f for f in os.listdir("./instances")
-               if os.path.isfile(os.path.join("./instances", f))])
-
-# cycle over the list of input files
-for i in range(1, n_files+1):
-    
-    # opening file
-    filename = "./instances/ins-{}.txt".format(i)
-    file = open(filename)
+def search(layout, min_height, max_height, backend, timeout, bound_file=None):
     
-    # max_width
-    max_width = int(file.readline())
-    
-    # n_blocks
-    n_blocks = int(file.readline())
-    
-    # width and height
-    widths, heights = [], []
-    for line in file:
-        splitted = line.split()
-        widths.append(int(splitted[0]))
-        heights.append(int(splitted[1]))
-        
-    # defining minimum possible height
-    areas = [widths[i] * heights[i] for i in range(n_blocks)]
-    min_height = int(math.ceil(sum(areas) / max_width))
-    
-    # measuring performances of solve
-    start_time = time.time()
-    res = solve()
-    end_time = time.time()
-    
-    # printing time performances
-    time_spent = end_time - start_time
-    print(filename + "\t{:.2f}".format(time_spent))
-    
-    output_filename = "out-{}.txt".format(i)
-    output_path = "../out/" + output_filename
-    output_file = open(output_path, "w")
+    # IDEA: step through the heights on the same solver, so that the
+    # clauses learned while refuting a height are reused for the next one.
+    # Returns the lowest satisfiable height, -1 if none was found
+    search_start = time.time()
+    h = min_height
+    while h <= max_height:
+        
+        # setting timeout
+        time_left = timeout - (time.time() - search_start)
+        if time_left <= 0:
+            break
+        
+        # bounds shared with other approaches (portfolio): heights proven
+        # too low are skipped, no need to go past a layout already found
+        shared = read_bounds(bound_file)
+        if shared["lower"] is not None and shared["lower"] > h:
+            h = shared["lower"]
+            continue
+        if shared["upper"] is not None and h >= shared["upper"]:
+            break
+        
+        status = backend.solve([layout.height_le(h)], time_left)
+        if status:
+            update_bounds(bound_file, lower=h, upper=h)
+            return h
+        if status is None:
+            break
+        update_bounds(bound_file, lower=h + 1)
+        print(f"height={h} is too low, let's try +1...")
+        h += 1
     
-    if res["solver"] == -1:
-        output_file.write("TIMEOUT")
-        continue
+    return -1
     
-    # extracting results
-    model = res["solver"].model()
-    x_coord = res["x_coord"]
-    y_coord = res["y_coord"]
+# ------------------ END FUNCTION --------------------
+
+def extract(layout, backend, n_blocks, max_width, height):
     
     # converting boolean variables into coordinates for the output
     corner_x, corner_y = [], []
     for r in range(n_blocks):
         x = 0
         while x < max_width:
-            if model.evaluate(x_coord[r][x]):
+            if backend.value(layout.x_coord(r, x)):
                 corner_x.append(x)
                 break
             x += 1
         
         y = 0
-        while y < min_height:
-            if model.evaluate(y_coord[r][y]):
+        while y < height:
+            if backend.value(layout.y_coord(r, y)):
                 corner_y.append(y)
                 break
             y += 1
-                
-    # printing output files
-    output_file.write(str(max_width) + ' ' + str(min_height) + '\n')
-    output_file.write(str(n_blocks) + '\n')
-    zipped_data = zip(widths, heights, corner_x, corner_y)
-    for(width, height, c_x, c_y) in zipped_data:
-        output_file.write(str(width) + ' ' +
-                          str(height) + ' ' +
-                          str(c_x) + ' ' +
-                          str(c_y) + '\n')
-    output_file.close()
\ No newline at end of file
+    
+    return corner_x, corner_y
+    
+# ------------------ END FUNCTION --------------------
+
+def solve(instance, min_height, max_height, backend, bound_file=None,
+          timeout=300, positions="normal"):
+    
+    encode_start = time.time()
+    families = {}
+    layout = encode(instance, min_height, max_height, backend, families, positions)
+    encode_time = time.time() - encode_start
+    
+    # timeout: 300s overall, encoding included
+    solve_start = time.time()
+    height = search(layout, min_height, max_height, backend,
+                    timeout - encode_time, bound_file)
+    
+    return {"solved": height != -1,
+            "layout": layout,
+            "height": height,
+            "encode_time": encode_time,
+            "solve_time": time.time() - solve_start,
+            "families": families}
+    
+# ------------------ END FUNCTION --------------------
+
+if __name__ == "__main__":
+    
+    # runtime options: backend and height search mode
+    parser = argparse.ArgumentParser(description="SAT model for VLSI design")
+    parser.add_argument("--backend", default="z3",
+                        choices=["z3", "pysat", "dimacs"],
+                        help="SAT backend receiving the integer clauses")
+    parser.add_argument("--pysat-solver", default="glucose4",
+                        help="pysat solver name (glucose4, maplesat, ...)")
+    parser.add_argument("--dimacs-solver", default="kissat",
+                        help="external solver command for the dimacs backend")
+    parser.add_argument("--dimacs-path", default=None,
+                        help="DIMACS file kept by the dimacs backend (default: a temporary file)")
+    parser.add_argument("--search", default="incremental",
+                        choices=["fixed", "incremental"],
+                        help="height search mode")
+    parser.add_argument("--positions", default="normal",
+                        choices=["normal", "all"],
+                        help="coordinates: normal patterns only, or every position")
+    parser.add_argument("--tuning", default=CACHE_PATH,
+                        help='z3 configs tuned per instance class by common/tuner.py ("" to disable)')
+    parser.add_argument("--fallback", action="store_true",
+                        help="write the skyline layout instead of TIMEOUT")
+    parser.add_argument("--out-dir", default="../out",
+                        help="directory of the out-N.txt files")
+    parser.add_argument("--bound-file", default=None,
+                        help="height bounds shared with other approaches (portfolio)")
+    parser.add_argument("--results-db", default=DB_PATH,
+                        help='results database ("" to disable)')
+    parser.add_argument("--run", default=default_run(),
+                        help="label of this run in the results database")
+    parser.add_argument("--instance-dir", default="./instances",
+                        help="directory of the ins-N.txt files (e.g. generated ones)")
+    parser.add_argument("--instances", nargs="+", type=int,
+                        help="instance numbers to run (default: all)")
+    args = parser.parse_args()
+    if args.backend == "pysat" and not interruptible(args.pysat_solver):
+        parser.error("--pysat-solver {} cannot be stopped at the timeout, run it with "
+                     "--backend dimacs --dimacs-solver".format(args.pysat_solver))
+
+    print("INSTANCE   --   TIME   --   ENCODE   --   SOLVE")
+
+    n_files = len([f for f in os.listdir(args.instance_dir)
+                   if f.startswith("ins-") and f.endswith(".txt")])
+
+    # instances parsed (or taken from the cache) in a single pass
+    numbers = args.instances or range(1, n_files+1)
+    instances = load_instances([os.path.join(args.instance_dir, "ins-{}.txt".format(i))
+                                for i in numbers])
+
+    # cycle over the list of input files
+    for i, instance in zip(numbers, instances):
+        
+        filename = os.path.join(args.instance_dir, "ins-{}.txt".format(i))
+        max_width, n_blocks = instance.max_width, instance.n_blocks
+        widths, heights = instance.widths.tolist(), instance.heights.tolist()
+            
+        # defining minimum possible height
+        min_height = instance.lower_bound
+        
+        # IDEA: the skyline heuristic gives a feasible height, used as the
+        # top of the height search (and as fallback output)
+        heuristic = instance.skyline_layout()
+        
+        # height search selection
+        if args.search == "incremental":
+            max_height = instance.upper_bound
+        else:
+            max_height = min_height
+        
+        # z3 backend: parameters tuned for the class of the instance, if any
+        tuned_class, config = None, None
+        if args.backend == "z3":
+            tuned_class, config = load_config("sat", instance, args.tuning)
+        
+        # measuring performances of solve
+        start_time = time.time()
+        with tuned_params(config):
+            backend = make_backend(args.backend,
+                                   pysat_solver=args.pysat_solver,
+                                   dimacs_solver=args.dimacs_solver,
+                                   dimacs_path=args.dimacs_path)
+            res = solve(instance, min_height, max_height, backend,
+                        args.bound_file, positions=args.positions)
+        end_time = time.time()
+        
+        # printing time performances (encoding and solving separately)
+        time_spent = end_time - start_time
+        print(filename + "\t{:.2f}\t{:.2f}\t{:.2f}".format(time_spent,
+                                                      res["encode_time"],
+                                                      res["solve_time"]))
+        
+        # the first height found is optimal: the lower ones were proven too low
+        statistics = collect(backend.statistics(), res["families"])
+        statistics["tuning"] = tuned_class
+        record_run(args.results_db, args.run, instance, "SAT", args.search,
+                   args.backend if args.backend != "pysat" else "pysat:" + args.pysat_solver,
+                   res["height"] if res["solved"] else None,
+                   "OPTIMAL" if res["solved"] else "TIMEOUT",
+                   time_spent, res["encode_time"], res["solve_time"],
+                   statistics)
+        
+        output_filename = "out-{}.txt".format(i)
+        output_path = os.path.join(args.out_dir, output_filename)
+        output_file = open(output_path, "w")
+        
+        if not res["solved"] and not args.fallback:
+            output_file.write("TIMEOUT")
+            output_file.close()
+            continue
+        
+        # CASE FALLBACK: no model found, the skyline layout is written
+        if not res["solved"]:
+            print("TIMEOUT, writing the skyline layout")
+            height = heuristic["height"]
+            corner_x, corner_y = heuristic["corner_x"], heuristic["corner_y"]
+        
+        # extracting results
+        else:
+            height = res["height"]
+            corner_x, corner_y = extract(res["layout"], backend, n_blocks,
+                                         max_width, height)
+        
+        # printing output files
+        output_file.write(str(max_width) + ' ' + str(height) + '\n')
+        output_file.write(str(n_blocks) + '\n')
+        zipped_data = zip(widths, heights, corner_x, corner_y)
+        for(width, height, c_x, c_y) in zipped_data:
+            output_file.write(str(width) + ' ' +
+                              str(height) + ' ' +
+                              str(c_x) + ' ' +
+                              str(c_y) + '\n')
+        output_file.close()
\ No newline at end of file
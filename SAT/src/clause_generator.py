@@ -0,0 +1,202 @@
+import numpy as np
+
+# Vectorized version of the SAT encoding: every clause family is built in
+# bulk as 2-D int32 arrays of literals (one clause per row, all the clauses
+# of an array have the same length), instead of one Python list per clause.
+#
+# Variables live in a flat index layout (DIMACS numbering, from 1):
+#   x_coord[i][w]  -> x_base + i * max_width + w      (x_i <= w)
+#   y_coord[i][h]  -> y_base + i * max_height + h     (y_i <= h)
+#   left[i][j]     -> left_base + i * n_blocks + j
+#   below[i][j]    -> below_base + i * n_blocks + j
+#   height_le[h]   -> height_base + h - min_height    (assumption literals)
+#
+# With the allowed positions of every block (x_allowed, y_allowed: boolean
+# matrices n_blocks x dim, e.g. the normal patterns of common/patterns.py)
+# only the allowed positions get a variable: x_coord[i][w] is then the
+# variable of the largest allowed position <= w, since x_i <= w holds
+# exactly when x_i is at most that position. The accessors hide this
+# (lookup tables), and the clauses between positions sharing a variable
+# are skipped.
+
+def position_table(base, allowed):
+    # variable of every (block, position): the one of the largest allowed
+    # position <= it; returns the table and the number of variables
+    ids = base + np.cumsum(allowed.ravel()).reshape(allowed.shape) - 1
+    last = np.maximum.accumulate(np.where(allowed, np.arange(allowed.shape[1]), 0), axis=1)
+    return np.take_along_axis(ids, last, axis=1).astype(np.int32), int(allowed.sum())
+
+# ------------------ END FUNCTION --------------------
+
+class VariableLayout:
+    def __init__(self, n_blocks, max_width, min_height, max_height,
+                 x_allowed=None, y_allowed=None):
+        self.n_blocks = n_blocks
+        self.max_width = max_width
+        self.min_height = min_height
+        self.max_height = max_height
+        self.x_allowed = x_allowed
+        self.y_allowed = y_allowed
+
+        self.x_base = 1
+        if x_allowed is None:
+            self.x_table, n_x = None, n_blocks * max_width
+        else:
+            self.x_table, n_x = position_table(self.x_base, x_allowed)
+        self.y_base = self.x_base + n_x
+        if y_allowed is None:
+            self.y_table, n_y = None, n_blocks * max_height
+        else:
+            self.y_table, n_y = position_table(self.y_base, y_allowed)
+        self.left_base = self.y_base + n_y
+        self.below_base = self.left_base + n_blocks * n_blocks
+        self.height_base = self.below_base + n_blocks * n_blocks
+        self.n_vars = self.height_base + max_height - min_height
+
+    # the accessors work both on integers and on NumPy index arrays
+    def x_coord(self, i, w):
+        if self.x_table is not None:
+            return self.x_table[i, w]
+        return self.x_base + i * self.max_width + w
+
+    def y_coord(self, i, h):
+        if self.y_table is not None:
+            return self.y_table[i, h]
+        return self.y_base + i * self.max_height + h
+
+    def left(self, i, j):
+        return self.left_base + i * self.n_blocks + j
+
+    def below(self, i, j):
+        return self.below_base + i * self.n_blocks + j
+
+    def height_le(self, h):
+        return self.height_base + h - self.min_height
+
+# ------------------ END CLASS --------------------
+
+def stack(*columns):
+    # builds a clause array from literal columns (scalars and index arrays
+    # of different shapes are broadcast together)
+    columns = np.broadcast_arrays(*[np.asarray(c, dtype=np.int32) for c in columns])
+    return np.stack(columns, axis=-1).reshape(-1, len(columns))
+
+# ------------------ END FUNCTION --------------------
+
+def ragged_range(lengths):
+    # for lengths [2, 3] returns owners [0, 0, 1, 1, 1] and values [0, 1, 0, 1, 2]
+    lengths = np.maximum(lengths, 0)
+    owners = np.repeat(np.arange(len(lengths)), lengths)
+    offsets = np.cumsum(lengths) - lengths
+    values = np.arange(lengths.sum()) - np.repeat(offsets, lengths)
+    return owners, values
+
+# ------------------ END FUNCTION --------------------
+
+def order_encoding(coord, sizes, dim, allowed=None):
+    # the tail of the encoding is forced: a block always ends within dim
+    # (with allowed positions the whole tail is one variable)
+    blocks, offset = ragged_range(sizes)
+    if allowed is not None:
+        blocks, offset = blocks[offset == 0], offset[offset == 0]
+    yield stack(coord(blocks, dim - sizes[blocks] + offset))
+
+    # coord[i][k] -> coord[i][k+1], only where k+1 has a variable of its own
+    blocks, k = ragged_range(dim - sizes)
+    if allowed is not None:
+        keep = allowed[blocks, k + 1]
+        blocks, k = blocks[keep], k[keep]
+    yield stack(-coord(blocks, k), coord(blocks, k + 1))
+
+# ------------------ END FUNCTION --------------------
+
+def non_overlap(coord, relation, sizes, dim, allowed=None):
+    # relation[i][j] -> block i ends before block j starts, for i != j
+    # (one batch per block i, vectorized over j and over the positions).
+    # With allowed positions, "coord_i > k" is the same for all the k up to
+    # the next allowed position: only the last of them (the strongest
+    # clause) is kept
+    blocks = np.arange(len(sizes), dtype=np.int32)
+    for i in blocks:
+        j = blocks[blocks != i]
+        size = sizes[i]
+        not_relation = -relation(i, j)
+
+        # coord_j >= size_i
+        yield stack(not_relation, -coord(j, size - 1))
+
+        # coord_j >= coord_i + size_i, on every position of i
+        k = np.arange(dim - size - 1, dtype=np.int32)
+        if allowed is not None:
+            k = k[allowed[i, k + 1]]
+        yield stack(not_relation[:, None],
+                    coord(i, k)[None, :],
+                    -coord(j[:, None], k[None, :] + size))
+
+        # block i is not the last one along the dimension
+        if dim - size - 1 >= 0:
+            yield stack(not_relation, coord(i, dim - size - 1))
+
+# ------------------ END FUNCTION --------------------
+
+def generate_clauses(widths, heights, max_width, min_height, max_height, layout,
+                     identical_groups, no_side_by_side):
+    # yields (family, clauses) pairs, clauses being an int32 array. The
+    # groups of identical blocks and the pairs too wide to sit side by side
+    # are the ones precomputed by the Instance (common/instance.py)
+    widths = np.asarray(widths, dtype=np.int32)
+    heights = np.asarray(heights, dtype=np.int32)
+    n_blocks = len(widths)
+
+    # order encoding constraints
+    for clauses in order_encoding(layout.x_coord, widths, max_width, layout.x_allowed):
+        yield "order_x", clauses
+    for clauses in order_encoding(layout.y_coord, heights, max_height, layout.y_allowed):
+        yield "order_y", clauses
+
+    # height constraints: height_le[h] forces the tail of the y order encoding
+    h, blocks = np.meshgrid(np.arange(min_height, max_height + 1),
+                            np.arange(n_blocks), indexing="ij")
+    h, blocks = h.ravel(), blocks.ravel()
+    yield "height", stack(-layout.height_le(h),
+                          layout.y_coord(blocks, h - heights[blocks]))
+    h = np.arange(min_height, max_height)
+    yield "height", stack(-layout.height_le(h), layout.height_le(h + 1))
+
+    # one of the two rectangles is on the left or below the other
+    i, j = np.triu_indices(n_blocks, k=1)
+    yield "relation", stack(layout.left(i, j), layout.left(j, i),
+                            layout.below(i, j), layout.below(j, i))
+
+    # non overlapping constraints
+    for clauses in non_overlap(layout.x_coord, layout.left, widths, max_width,
+                               layout.x_allowed):
+        yield "non_overlap_x", clauses
+    for clauses in non_overlap(layout.y_coord, layout.below, heights, max_height,
+                               layout.y_allowed):
+        yield "non_overlap_y", clauses
+
+    # pairs that cannot stay side by side
+    wide_i, wide_j = np.asarray(no_side_by_side, dtype=np.int32).reshape(-1, 2).T
+    yield "pairs", stack(-layout.left(wide_i, wide_j))
+    yield "pairs", stack(-layout.left(wide_j, wide_i))
+
+    # pairs that cannot be stacked, gated by the largest height forbidding it
+    stacked = heights[i] + heights[j]
+    too_tall = stacked > max_height
+    yield "pairs", stack(-layout.below(i[too_tall], j[too_tall]))
+    yield "pairs", stack(-layout.below(j[too_tall], i[too_tall]))
+    gated = ~too_tall & (stacked - 1 >= min_height)
+    gate = -layout.height_le(stacked[gated] - 1)
+    yield "pairs", stack(gate, -layout.below(i[gated], j[gated]))
+    yield "pairs", stack(gate, -layout.below(j[gated], i[gated]))
+
+    # symmetry breaking on rectangles with the same dimension (every pair
+    # i < j of a group)
+    pairs = [np.asarray(group)[np.stack(np.triu_indices(len(group), k=1))]
+             for group in identical_groups]
+    same_i, same_j = np.concatenate(pairs + [np.zeros((2, 0), dtype=np.int64)],
+                                    axis=1).astype(np.int32)
+    yield "symmetry", stack(-layout.left(same_j, same_i))
+    yield "symmetry", stack(layout.left(same_i, same_j),
+                            -layout.below(same_j, same_i))
@@ -0,0 +1,78 @@
+import argparse, os, sys, time, tracemalloc
+import numpy as np
+from clause_generator import VariableLayout, generate_clauses
+from sat_backends import make_backend
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "..", "..", "common"))
+from patterns import normal_patterns
+from instance import Instance
+
+# Measures the time and the peak memory needed to generate the clauses of a
+# synthetic instance (default: 200 blocks, max_width = 200). With --backend
+# the clauses are also handed to a SAT backend, timed separately.
+# --positions normal restricts the coordinates to the normal patterns (the
+# time to compute them is included).
+
+parser = argparse.ArgumentParser(description="SAT encoding benchmark")
+parser.add_argument("--n-blocks", type=int, default=200)
+parser.add_argument("--max-width", type=int, default=200)
+parser.add_argument("--max-side", type=int, default=20,
+                    help="widths and heights are drawn from 1..max-side")
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--backend", default="none",
+                    choices=["none", "z3", "pysat", "dimacs"])
+parser.add_argument("--positions", default="all", choices=["all", "normal"])
+args = parser.parse_args()
+
+# synthetic instance
+rng = np.random.default_rng(args.seed)
+n_blocks, max_width = args.n_blocks, args.max_width
+widths = rng.integers(1, min(args.max_side, max_width) + 1, n_blocks)
+heights = rng.integers(1, args.max_side + 1, n_blocks)
+# height range, identical groups and wide pairs computed once by the
+# Instance, as in SAT.py (lower bound, skyline upper bound)
+instance = Instance("synthetic", max_width, widths, heights)
+min_height, max_height = instance.lower_bound, instance.upper_bound
+
+# generating all the clause families
+tracemalloc.start()
+start_time = time.time()
+if args.positions == "normal":
+    layout = VariableLayout(n_blocks, max_width, min_height, max_height,
+                            normal_patterns(widths, max_width),
+                            normal_patterns(heights, max_height))
+else:
+    layout = VariableLayout(n_blocks, max_width, min_height, max_height)
+counts = {}
+for family, clauses in generate_clauses(widths, heights, max_width,
+                                        min_height, max_height, layout,
+                                        instance.identical_groups,
+                                        instance.no_side_by_side):
+    counts[family] = counts.get(family, 0) + len(clauses)
+time_spent = time.time() - start_time
+_, peak_memory = tracemalloc.get_traced_memory()
+tracemalloc.stop()
+
+# second pass (not traced): handing the batches to the backend
+if args.backend != "none":
+    backend = make_backend(args.backend)
+    backend.new_vars(layout.n_vars)
+    handoff_time = 0
+    for family, clauses in generate_clauses(widths, heights, max_width,
+                                            min_height, max_height, layout,
+                                            instance.identical_groups,
+                                            instance.no_side_by_side):
+        handoff_start = time.time()
+        backend.add_clauses(clauses)
+        handoff_time += time.time() - handoff_start
+
+print(f"n_blocks={n_blocks} max_width={max_width} heights={min_height}..{max_height} positions={args.positions}")
+print(f"variables\t{layout.n_vars}")
+for family, count in counts.items():
+    print(f"{family}\t{count}")
+print(f"clauses\t{sum(counts.values())}")
+print("time\t{:.3f}s".format(time_spent))
+if args.backend != "none":
+    print("hand-off ({})\t{:.3f}s".format(args.backend, handoff_time))
+print("peak memory\t{:.1f}MB".format(peak_memory / 2**20))
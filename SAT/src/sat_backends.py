@@ -0,0 +1,231 @@
+import os, re, subprocess, tempfile, threading
+
+# The SAT model is encoded with integer literals (DIMACS convention:
+# variables are numbered from 1, a negative number is a negated variable).
+# Every backend exposes the same small interface, so SAT.py never builds
+# solver specific objects:
+#   - new_var()                      -> fresh variable index
+#   - new_vars(count)                -> first index of a block of variables
+#   - add_clause(clause)             -> add a list of integer literals
+#   - add_clauses(clauses)           -> add a 2-D array of literals (one clause per row)
+#   - solve(assumptions, timeout)    -> True (sat), False (unsat), None (unknown)
+#   - value(var)                     -> truth value of var in the last model
+#   - statistics()                   -> dictionary of solver counters (conflicts, ...)
+
+class Backend:
+    def __init__(self):
+        self.n_vars = 0
+        self.n_clauses = 0
+
+    def new_var(self):
+        self.n_vars += 1
+        return self.n_vars
+
+    def new_vars(self, count):
+        first = self.n_vars + 1
+        self.n_vars += count
+        return first
+
+    def add_clauses(self, clauses):
+        for clause in clauses.tolist():
+            self.add_clause(clause)
+
+    def statistics(self):
+        return {"variables": self.n_vars, "clauses": self.n_clauses}
+
+# ------------------ END CLASS --------------------
+
+class Z3Backend(Backend):
+    def __init__(self, seed=None):
+        super().__init__()
+        import z3
+        self.z3 = z3
+        self.solver = z3.Solver()
+        if seed is not None:
+            self.solver.set("random_seed", seed)
+        self.bools = [None]
+        self.model = None
+
+    def new_var(self):
+        return self.new_vars(1)
+
+    def new_vars(self, count):
+        first = super().new_vars(count)
+        self.bools.extend(self.z3.Bool(f"v_{var}")
+                          for var in range(first, first + count))
+        return first
+
+    def literal(self, lit):
+        if lit > 0:
+            return self.bools[lit]
+        return self.z3.Not(self.bools[-lit])
+
+    def add_clause(self, clause):
+        self.n_clauses += 1
+        if len(clause) == 1:
+            self.solver.add(self.literal(clause[0]))
+        else:
+            self.solver.add(self.z3.Or([self.literal(lit) for lit in clause]))
+
+    def solve(self, assumptions, timeout):
+        self.solver.set("timeout", int(timeout * 1000))
+        result = self.solver.check([self.literal(lit) for lit in assumptions])
+        if result == self.z3.sat:
+            self.model = self.solver.model()
+            return True
+        if result == self.z3.unsat:
+            return False
+        return None
+
+    def value(self, var):
+        return self.z3.is_true(self.model.evaluate(self.bools[var],
+                                                   model_completion=True))
+
+    def statistics(self):
+        # conflicts, decisions, restarts, memory, ... of the z3 solver
+        statistics = super().statistics()
+        z3_statistics = self.solver.statistics()
+        statistics.update((key, z3_statistics.get_key_value(key))
+                          for key in z3_statistics.keys())
+        return statistics
+
+# ------------------ END CLASS --------------------
+
+# pysat solvers without solve_limited / interrupt: nothing stops them at the
+# timeout, they run as external solvers of the dimacs backend instead
+UNINTERRUPTIBLE = ("cadical", "kissat", "lingeling")
+
+def interruptible(name):
+    return not name.startswith(UNINTERRUPTIBLE)
+
+# ------------------ END FUNCTION --------------------
+
+class PySATBackend(Backend):
+    def __init__(self, name="glucose4"):
+        super().__init__()
+        if not interruptible(name):
+            raise ValueError("pysat solver {} cannot be interrupted at the timeout, "
+                             "use it through the dimacs backend".format(name))
+        from pysat.solvers import Solver as PySATSolver
+        self.solver = PySATSolver(name=name)
+        self.model = None
+
+    def add_clause(self, clause):
+        self.n_clauses += 1
+        self.solver.add_clause(clause)
+
+    def add_clauses(self, clauses):
+        self.n_clauses += len(clauses)
+        self.solver.append_formula(clauses.tolist())
+
+    def solve(self, assumptions, timeout):
+        # pysat has no native timeout: the search is interrupted by a timer
+        timer = threading.Timer(timeout, self.solver.interrupt)
+        timer.start()
+        result = self.solver.solve_limited(assumptions=assumptions,
+                                           expect_interrupt=True)
+        timer.cancel()
+        self.solver.clear_interrupt()
+        if result:
+            self.model = self.solver.get_model()
+        return result
+
+    def value(self, var):
+        return var <= len(self.model) and self.model[var - 1] > 0
+
+    def statistics(self):
+        # conflicts, decisions, propagations, restarts over all the calls
+        statistics = super().statistics()
+        statistics.update(self.solver.accum_stats() or {})
+        return statistics
+
+# ------------------ END CLASS --------------------
+
+class DimacsBackend(Backend):
+    def __init__(self, command, path=None):
+        super().__init__()
+        self.command = command.split()
+        self.path = path
+        self.lines = []
+        self.model = set()
+        self.counters = {}
+
+    def add_clause(self, clause):
+        self.n_clauses += 1
+        self.lines.append(" ".join(map(str, clause)) + " 0\n")
+
+    def add_clauses(self, clauses):
+        self.n_clauses += len(clauses)
+        self.lines.extend(" ".join(map(str, clause)) + " 0\n"
+                          for clause in clauses.tolist())
+
+    def write(self, path, assumptions=()):
+        # assumptions become unit clauses: the external solver is not incremental
+        with open(path, "w") as dimacs_file:
+            dimacs_file.write("p cnf {} {}\n".format(
+                self.n_vars, self.n_clauses + len(assumptions)))
+            dimacs_file.writelines(self.lines)
+            for lit in assumptions:
+                dimacs_file.write("{} 0\n".format(lit))
+
+    def solve(self, assumptions, timeout):
+        # without a given path the formula goes to a file of this solve call,
+        # removed afterwards: processes running in the same directory (batch,
+        # portfolio) never share it
+        if self.path is None:
+            with tempfile.NamedTemporaryFile(suffix=".cnf", delete=False) as dimacs_file:
+                path = dimacs_file.name
+        else:
+            path = self.path
+        try:
+            self.write(path, assumptions)
+            output = subprocess.run(self.command + [path],
+                                    capture_output=True,
+                                    text=True,
+                                    timeout=timeout).stdout
+        except subprocess.TimeoutExpired:
+            return None
+        finally:
+            if self.path is None:
+                os.remove(path)
+
+        # parsing the SAT competition output format
+        status, self.model = None, set()
+        for line in output.splitlines():
+            if line.startswith("s "):
+                if "UNSATISFIABLE" in line:
+                    status = False
+                elif "SATISFIABLE" in line:
+                    status = True
+            elif line.startswith("v "):
+                self.model.update(int(lit) for lit in line.split()[1:]
+                                  if int(lit) > 0)
+            else:
+                # "c conflicts: 1234 ..." statistics lines, summed over the calls
+                match = re.match(r"c\s+([a-z][\w-]*):\s+(\d+)\b", line)
+                if match:
+                    self.counters[match.group(1)] = (self.counters.get(match.group(1), 0)
+                                                     + int(match.group(2)))
+        return status
+
+    def value(self, var):
+        return var in self.model
+
+    def statistics(self):
+        statistics = super().statistics()
+        statistics.update(self.counters)
+        return statistics
+
+# ------------------ END CLASS --------------------
+
+def make_backend(name, pysat_solver="glucose4",
+                 dimacs_solver="kissat", dimacs_path=None, seed=None):
+    # the seed is only used by z3: the pysat solvers have no seed option and
+    # an external solver takes it in its own command (e.g. "kissat --seed=1")
+    if name == "z3":
+        return Z3Backend(seed)
+    if name == "pysat":
+        return PySATBackend(pysat_solver)
+    if name == "dimacs":
+        return DimacsBackend(dimacs_solver, dimacs_path)
+    raise ValueError(f"unknown SAT backend: {name}")
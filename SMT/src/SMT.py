@@ -1,147 +1,242 @@
 from z3 import *
-import time, math
-
-def solve(min_height):
-    
-    # need a solver (optimizer)
-    solver = Optimize()
-    
-    # setting timeout
-    solver.set("timeout", 300000)
-    
-    # x coordinates
-    x_coord = [Int("x_{}".format(i)) for i in range(n_blocks)]
-    
-    # y coordinates
-    y_coord = [Int("y_{}".format(i)) for i in range(n_blocks)]
-    
-    # constraint on minimum possible height
-    min_h = Int("min_height")
-    solver.add(min_h == min_height)
-    
-    # constraints on rectangles position (respecting max dim)
-    for i in range(n_blocks):
-        solver.add(x_coord[i] >= 0)
-        solver.add(y_coord[i] >= 0)
-        solver.add(x_coord[i] + widths[i] <= max_width)
-        solver.add(y_coord[i] + heights[i] <= min_h)
-        
-    # non overlapping constraint
-    for i in range(n_blocks):
-        for j in range(n_blocks):
-            if i != j:
-                solver.add(Or(
-                    Or(
-                        x_coord[i] + widths[i] <= x_coord[j],
-                        x_coord[j] + widths[j] <= x_coord[i]),
-                    Or(
-                        y_coord[i] + heights[i] <= y_coord[j],
-                        y_coord[j] + heights[j] <= y_coord[i]
-                    )
-                ))
-                
-    # symmetry breaking constraints
-    solver.add(Implies(
-        And(widths[i] == widths[j],
-            heights[i] == heights[j]),
-        And(x_coord[i] <= x_coord[j],
-            Implies(x_coord[i] == x_coord[j],
-                    y_coord[i] <= y_coord[j])
-            )
-        ))
-    # solver.add(Implies(
-    #     widths[i] + widths[j] > max_width,
-    #     And(x_coord[i] + widths[i] > x_coord[j],
-    #         x_coord[j] + widths[j] > x_coord[i])
-    #     ))
-    # solver.add(Implies(
-    #     heights[i] + heights[j] > min_height,
-    #     And(y_coord[i] + heights[i] > y_coord[j],
-    #         y_coord[j] + heights[j] > y_coord[i])
-    #     ))
-    
-    # we try to minimize the minimum possible height
-    solver.minimize(min_h)
-    
-    print(solver.check())
-    
-    if solver.check() == unsat or solver.check() == unknown:
-        return {"solver": -1,
-                "x_coord": -1,
-                "y_coord": -1}
-    
-    return {"solver": solver,
-            "x_coord": x_coord,
-            "y_coord": y_coord}   
-    
-    
-# ------------------ END FUNCTION --------------------
+import argparse, os, sys, time
+
+# shared modules (instance model, portfolio bounds, instrumentation)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "..", "..", "common"))
+from instance import load_instances
+from bound import read_bounds, update_bounds
+from results import DB_PATH, default_run, record_run
+from instrumentation import collect, z3_statistics
+from z3_config import CACHE_PATH, load_config, tuned_params
+from smt_encodings import THEORIES, build_encoding
+from smt_symmetry import add_symmetry
+
+def search(encoding, min_height, max_height, timeout=300, bound_file=None):
+
+    # IDEA: bisection on the height. Each probe "height <= mid" is guarded by
+    # a fresh literal passed as assumption, so nothing has to be rebuilt
+    # and the solver keeps what it learned between the probes.
+    # Returns the best model (None if none was found) and its optimality
+    solver = encoding["solver"]
+    height = encoding["height"]
+    value = encoding["value"]
 
-print("INSTANCE   --   TIME")
-
-n_files = len([f for f in os.listdir("./instances")
-               if os.path.isfile(os.path.join("./instances", f))])
-
-# cycle over the list of input files
-for i in range(1, n_files+1):
-    
-    # opening file
-    filename = "./instances/ins-{}.txt".format(i)
-    file = open(filename)
-    
-    # max_width
-    max_width = int(file.readline())
-    
-    # n_blocks
-    n_blocks = int(file.readline())
-    
-    # width and height
-    widths, heights = [], []
-    for line in file:
-        splitted = line.split()
-        widths.append(int(splitted[0]))
-        heights.append(int(splitted[1]))
-        
-    # defining minimum possible height
-    areas = [widths[i] * heights[i] for i in range(n_blocks)]
-    min_height = int(math.ceil(sum(areas) / max_width))
-    
-    # measuring performances of solve
     start_time = time.time()
-    res = solve(min_height)
-    end_time = time.time()
-    
-    # printing time performances
-    time_spent = end_time - start_time
-    print(filename + "\t{:.2f}".format(time_spent))
-    
-    # CASE 1: UNSAT (UNTIL TIMEOUT)
-    # here we try to solve using the minimum possible height ("min_height")
-    # that we increment of 1 unit at each iteration if we get UNSAT
-    while res["solver"] == -1 and (end_time-start_time) < 300:
-        print(f"min_height={min_height} is too low, let's try +1...")
-        min_height += 1
-        res = solve(min_height)
-        end_time = time.time()
-    
-    # opening output file
-    output_filename = "out-{}.txt".format(i)
-    output_path = "../out/" + output_filename
-    output_file = open(output_path, "w")
-    
-    # CASE 2: SAT
-    if res["solver"] != -1:
-        # printing output files
-        output_file.write(str(max_width) + ' ' + str(min_height) + '\n')
-        output_file.write(str(n_blocks) + '\n')
-        model = res["solver"].model()
-        for i in range(1, n_blocks+1):
-            output_file.write(str(widths[i-1]) + ' ' +
-                            str(heights[i-1]) + ' ' +
-                            str(model.evaluate(res["x_coord"][i-1])) + ' ' +
-                            str(model.evaluate(res["y_coord"][i-1])) + '\n')
-        output_file.close()
+    best_model, optimal = None, False
+    low, high = min_height, max_height
+    while low <= high:
+
+        # setting timeout (overall)
+        time_left = timeout - (time.time() - start_time)
+        if time_left <= 0:
+            break
+        solver.set("timeout", int(time_left * 1000))
+
+        # bounds shared with other approaches (portfolio)
+        shared = read_bounds(bound_file)
+        if shared["lower"] is not None:
+            low = max(low, shared["lower"])
+        if shared["upper"] is not None:
+            high = min(high, shared["upper"] - 1)
+        if low > high:
+            continue
+
+        mid = (low + high) // 2
+        probe = Bool("height_le_{}".format(mid))
+        solver.add(Implies(probe, encoding["height_le"](mid)))
+        # symmetry and dominance rules of this height bound (smt_symmetry.py)
+        if "bound_rules" in encoding:
+            rules = encoding["bound_rules"](mid)
+            if rules:
+                solver.add(Implies(probe, And(rules)))
+        result = solver.check(probe)
+
+        if result == sat:
+            # the model may be even better than mid
+            best_model = solver.model()
+            high = value(best_model, height) - 1
+            update_bounds(bound_file, upper=high + 1)
+        elif result == unsat:
+            low = mid + 1
+            update_bounds(bound_file, lower=low)
+        else:
+            break
     else:
-        print("TIMEOUT")
-        output_file.write("TIMEOUT")
-        output_file.close()
\ No newline at end of file
+        # with shared bounds the search may also close on a layout found
+        # by another approach: ours is optimal only if it meets the lower bound
+        optimal = best_model is not None and value(best_model, height) <= low
+
+    return best_model, optimal
+
+# ------------------ END FUNCTION --------------------
+
+def extract(encoding, model):
+
+    # height and corners of the model
+    value = encoding["value"]
+    return {"height": value(model, encoding["height"]),
+            "corner_x": [value(model, x) for x in encoding["x_coord"]],
+            "corner_y": [value(model, y) for y in encoding["y_coord"]]}
+
+# ------------------ END FUNCTION --------------------
+
+def solve(instance, min_height, max_height, theory="lia", timeout=300,
+          bound_file=None, seed=None, symmetry=True, config=None):
+
+    # one incremental solver for the whole height search, the height
+    # being a free variable bracketed by the bounds. config: z3 parameters
+    # and preprocessing tactics (common/z3_config.py), None for the defaults
+    # (the parameters are set, and reset, only for a config)
+    with tuned_params(config):
+        encode_start = time.time()
+        families = {}
+        encoding = build_encoding(theory, instance.max_width, instance.n_blocks,
+                                  instance.widths.tolist(), instance.heights.tolist(),
+                                  min_height, max_height, families,
+                                  config["tactics"] if config else None)
+        if symmetry:
+            add_symmetry(encoding, instance, max_height, families)
+        if seed is not None:
+            encoding["solver"].set("random_seed", seed)
+        encode_time = time.time() - encode_start
+
+        # timeout: 300s overall, encoding included
+        start_time = time.time()
+        best_model, optimal = search(encoding, min_height, max_height,
+                                     timeout - encode_time, bound_file)
+        solve_time = time.time() - start_time
+    statistics = collect(z3_statistics(encoding["solver"]), families)
+    statistics["symmetry"] = encoding.get("symmetry", {})
+
+    if best_model is None:
+        return {"height": -1,
+                "corner_x": -1,
+                "corner_y": -1,
+                "optimal": False,
+                "encode_time": encode_time,
+                "solve_time": solve_time,
+                "statistics": statistics}
+
+    result = extract(encoding, best_model)
+    result["optimal"] = optimal
+    result["encode_time"] = encode_time
+    result["solve_time"] = solve_time
+    result["statistics"] = statistics
+    return result
+
+# ------------------ END FUNCTION --------------------
+
+if __name__ == "__main__":
+
+    # runtime options: theory used to encode the model
+    parser = argparse.ArgumentParser(description="SMT model for VLSI design")
+    parser.add_argument("--theory", default="lia", choices=THEORIES,
+                        help="lia (Int), idl (difference logic), bv (bit-vectors)")
+    parser.add_argument("--no-symmetry", action="store_true",
+                        help="without the symmetry and dominance rules (smt_symmetry.py)")
+    parser.add_argument("--tuning", default=CACHE_PATH,
+                        help='z3 configs tuned per instance class by common/tuner.py ("" to disable)')
+    parser.add_argument("--fallback", action="store_true",
+                        help="write the skyline layout instead of TIMEOUT")
+    parser.add_argument("--out-dir", default="../out",
+                        help="directory of the out-N.txt files")
+    parser.add_argument("--bound-file", default=None,
+                        help="height bounds shared with other approaches (portfolio)")
+    parser.add_argument("--results-db", default=DB_PATH,
+                        help='results database ("" to disable)')
+    parser.add_argument("--run", default=default_run(),
+                        help="label of this run in the results database")
+    parser.add_argument("--instance-dir", default="./instances",
+                        help="directory of the ins-N.txt files (e.g. generated ones)")
+    parser.add_argument("--instances", nargs="+", type=int,
+                        help="instance numbers to run (default: all)")
+    args = parser.parse_args()
+
+    print("INSTANCE   --   TIME")
+
+    n_files = len([f for f in os.listdir(args.instance_dir)
+                   if f.startswith("ins-") and f.endswith(".txt")])
+
+    # instances parsed (or taken from the cache) in a single pass
+    numbers = args.instances or range(1, n_files+1)
+    instances = load_instances([os.path.join(args.instance_dir, "ins-{}.txt".format(i))
+                                for i in numbers])
+
+    # cycle over the list of input files
+    for i, instance in zip(numbers, instances):
+
+        filename = os.path.join(args.instance_dir, "ins-{}.txt".format(i))
+        max_width, n_blocks = instance.max_width, instance.n_blocks
+        widths, heights = instance.widths.tolist(), instance.heights.tolist()
+
+        # defining minimum possible height
+        min_height = instance.lower_bound
+
+        # IDEA: the skyline heuristic gives a feasible height, used as the
+        # top of the bisection (and as fallback output)
+        heuristic = instance.skyline_layout()
+        max_height = instance.upper_bound
+
+        # z3 config tuned for the class of the instance, if any
+        tuned_class, config = load_config("smt:" + args.theory, instance, args.tuning)
+
+        # measuring performances of solve
+        start_time = time.time()
+        res = solve(instance, min_height, max_height, theory=args.theory,
+                    bound_file=args.bound_file, symmetry=not args.no_symmetry,
+                    config=config)
+        res["statistics"]["tuning"] = tuned_class
+        end_time = time.time()
+
+        # printing time performances
+        time_spent = end_time - start_time
+        print(filename + "\t{:.2f}".format(time_spent))
+
+        if res["height"] == -1:
+            status = "TIMEOUT"
+        else:
+            status = "OPTIMAL" if res["optimal"] else "SAT"
+        variant = args.theory + ("+nosym" if args.no_symmetry else "")
+        record_run(args.results_db, args.run, instance, "SMT", variant, "z3",
+                   None if res["height"] == -1 else res["height"], status,
+                   time_spent, res["encode_time"], res["solve_time"],
+                   res["statistics"])
+
+        # opening output file
+        output_filename = "out-{}.txt".format(i)
+        output_path = os.path.join(args.out_dir, output_filename)
+        output_file = open(output_path, "w")
+
+        # CASE 1: SAT (the best model found, optimal unless the timeout hit)
+        if res["height"] != -1:
+            if not res["optimal"]:
+                print(f"height={res['height']} is not proven optimal")
+            # printing output files
+            output_file.write(str(max_width) + ' ' + str(res["height"]) + '\n')
+            output_file.write(str(n_blocks) + '\n')
+            zipped_data = zip(widths, heights, res["corner_x"], res["corner_y"])
+            for (width, height, c_x, c_y) in zipped_data:
+                output_file.write(str(width) + ' ' +
+                                  str(height) + ' ' +
+                                  str(c_x) + ' ' +
+                                  str(c_y) + '\n')
+            output_file.close()
+        # CASE 2: TIMEOUT before any model, the skyline layout is written
+        elif args.fallback:
+            print("TIMEOUT, writing the skyline layout")
+            output_file.write(str(max_width) + ' ' + str(heuristic["height"]) + '\n')
+            output_file.write(str(n_blocks) + '\n')
+            zipped_data = zip(widths, heights,
+                              heuristic["corner_x"], heuristic["corner_y"])
+            for (width, height, c_x, c_y) in zipped_data:
+                output_file.write(str(width) + ' ' +
+                                  str(height) + ' ' +
+                                  str(c_x) + ' ' +
+                                  str(c_y) + '\n')
+            output_file.close()
+        # CASE 3: TIMEOUT before any model
+        else:
+            print("TIMEOUT")
+            output_file.write("TIMEOUT")
+            output_file.close()
\ No newline at end of file
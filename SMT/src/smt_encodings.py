@@ -0,0 +1,191 @@
+from z3 import *
+from instrumentation import family
+
+# The same SMT model written in three theories:
+#   - "lia": unbounded Int coordinates, generic linear integer arithmetic
+#   - "idl": Int coordinates, every atom written as a difference "a - b <= k"
+#            so that z3 can use its difference logic engine
+#   - "bv":  BitVec coordinates sized on max_width and the height upper
+#            bound, compared unsigned, so that the model is bit-blasted
+#
+# build_encoding returns a dictionary with the solver, the coordinates, the
+# height term and the helpers used by the height search and by the
+# symmetry breaking (smt_symmetry.py):
+#   - height_le(bound): formula "height <= bound"
+#   - value(model, term): integer value of a term in a model
+#   - before(a, b, k): formula "a + k <= b" (the non overlap atoms are built
+#     with it, so other constraints on "a + size <= b" share their atoms)
+#   - at_most(a, k): formula "a <= k"
+# With a dictionary "families", the assertions and the time of every
+# constraint family are counted in it (see common/instrumentation.py).
+# With "tactics" (preprocessing tactic names, e.g. from the configs tuned by
+# common/tuner.py) the solver runs them before the "smt" tactic.
+
+THEORIES = ["lia", "idl", "bv"]
+
+def make_solver(logic, tactics=None):
+    # the solver of the logic, or the tactics followed by the smt core
+    if tactics:
+        return Then(*tactics, "smt").solver()
+    return SolverFor(logic)
+
+# ------------------ END FUNCTION --------------------
+
+def build_lia(max_width, n_blocks, widths, heights, min_height, max_height,
+              families=None, tactics=None):
+
+    solver = make_solver("QF_LIA", tactics)
+    n_assertions = lambda: len(solver.assertions())
+    x_coord = [Int("x_{}".format(i)) for i in range(n_blocks)]
+    y_coord = [Int("y_{}".format(i)) for i in range(n_blocks)]
+    height = Int("height")
+    before = lambda a, b, k: a + k <= b
+
+    # bounds of the height
+    with family(families, "height", n_assertions):
+        solver.add(height >= min_height)
+        solver.add(height <= max_height)
+
+    # constraints on rectangles position (respecting max dim)
+    with family(families, "position", n_assertions):
+        for i in range(n_blocks):
+            solver.add(x_coord[i] >= 0)
+            solver.add(y_coord[i] >= 0)
+            solver.add(x_coord[i] + widths[i] <= max_width)
+            solver.add(y_coord[i] + heights[i] <= height)
+
+    # non overlapping constraint
+    with family(families, "non_overlap", n_assertions):
+        for i in range(n_blocks):
+            for j in range(i+1, n_blocks):
+                solver.add(Or(
+                    before(x_coord[i], x_coord[j], widths[i]),
+                    before(x_coord[j], x_coord[i], widths[j]),
+                    before(y_coord[i], y_coord[j], heights[i]),
+                    before(y_coord[j], y_coord[i], heights[j])
+                ))
+
+    return {"solver": solver,
+            "x_coord": x_coord,
+            "y_coord": y_coord,
+            "height": height,
+            "height_le": lambda bound: height <= bound,
+            "before": before,
+            "at_most": lambda a, k: a <= k,
+            "value": lambda model, term: model.evaluate(
+                term, model_completion=True).as_long()}
+
+# ------------------ END FUNCTION --------------------
+
+def build_idl(max_width, n_blocks, widths, heights, min_height, max_height,
+              families=None, tactics=None):
+
+    solver = make_solver("QF_IDL", tactics)
+    n_assertions = lambda: len(solver.assertions())
+    x_coord = [Int("x_{}".format(i)) for i in range(n_blocks)]
+    y_coord = [Int("y_{}".format(i)) for i in range(n_blocks)]
+    height = Int("height")
+
+    # a reference point: every bound is a difference w.r.t. "zero"
+    zero = Int("zero")
+    solver.add(zero == 0)
+    before = lambda a, b, k: a - b <= -k
+
+    # bounds of the height
+    with family(families, "height", n_assertions):
+        solver.add(zero - height <= -min_height)
+        solver.add(height - zero <= max_height)
+
+    # constraints on rectangles position (respecting max dim)
+    with family(families, "position", n_assertions):
+        for i in range(n_blocks):
+            solver.add(zero - x_coord[i] <= 0)
+            solver.add(zero - y_coord[i] <= 0)
+            solver.add(x_coord[i] - zero <= max_width - widths[i])
+            solver.add(y_coord[i] - height <= -heights[i])
+
+    # non overlapping constraint
+    with family(families, "non_overlap", n_assertions):
+        for i in range(n_blocks):
+            for j in range(i+1, n_blocks):
+                solver.add(Or(
+                    before(x_coord[i], x_coord[j], widths[i]),
+                    before(x_coord[j], x_coord[i], widths[j]),
+                    before(y_coord[i], y_coord[j], heights[i]),
+                    before(y_coord[j], y_coord[i], heights[j])
+                ))
+
+    return {"solver": solver,
+            "x_coord": x_coord,
+            "y_coord": y_coord,
+            "height": height,
+            "height_le": lambda bound: height - zero <= bound,
+            "before": before,
+            "at_most": lambda a, k: a - zero <= k,
+            "value": lambda model, term: model.evaluate(
+                term, model_completion=True).as_long()}
+
+# ------------------ END FUNCTION --------------------
+
+def build_bv(max_width, n_blocks, widths, heights, min_height, max_height,
+              families=None, tactics=None):
+
+    # enough bits to hold any coordinate plus any block side (no overflow)
+    n_bits = (2 * max(max_width, max_height)).bit_length()
+
+    solver = make_solver("QF_BV", tactics)
+    n_assertions = lambda: len(solver.assertions())
+    x_coord = [BitVec("x_{}".format(i), n_bits) for i in range(n_blocks)]
+    y_coord = [BitVec("y_{}".format(i), n_bits) for i in range(n_blocks)]
+    height = BitVec("height", n_bits)
+
+    def const(value):
+        return BitVecVal(value, n_bits)
+
+    def before(a, b, k):
+        return ULE(a + k, b)
+
+    # bounds of the height
+    with family(families, "height", n_assertions):
+        solver.add(UGE(height, const(min_height)))
+        solver.add(ULE(height, const(max_height)))
+
+    # constraints on rectangles position (respecting max dim), the lower
+    # bound 0 comes for free with unsigned values and the upper bounds
+    # keep every sum below 2^n_bits
+    with family(families, "position", n_assertions):
+        for i in range(n_blocks):
+            solver.add(ULE(x_coord[i], const(max_width - widths[i])))
+            solver.add(ULE(y_coord[i], const(max_height - heights[i])))
+            solver.add(ULE(y_coord[i] + heights[i], height))
+
+    # non overlapping constraint
+    with family(families, "non_overlap", n_assertions):
+        for i in range(n_blocks):
+            for j in range(i+1, n_blocks):
+                solver.add(Or(
+                    before(x_coord[i], x_coord[j], widths[i]),
+                    before(x_coord[j], x_coord[i], widths[j]),
+                    before(y_coord[i], y_coord[j], heights[i]),
+                    before(y_coord[j], y_coord[i], heights[j])
+                ))
+
+    return {"solver": solver,
+            "x_coord": x_coord,
+            "y_coord": y_coord,
+            "height": height,
+            "height_le": lambda bound: ULE(height, const(bound)),
+            "before": before,
+            "at_most": lambda a, k: ULE(a, const(k)),
+            "value": lambda model, term: model.evaluate(
+                term, model_completion=True).as_long()}
+
+# ------------------ END FUNCTION --------------------
+
+def build_encoding(theory, max_width, n_blocks, widths, heights,
+                   min_height, max_height, families=None, tactics=None):
+    builders = {"lia": build_lia, "idl": build_idl, "bv": build_bv}
+    if theory not in builders:
+        raise ValueError(f"unknown SMT theory: {theory}")
+    return builders[theory](max_width, n_blocks, widths, heights,
+                            min_height, max_height, families, tactics)
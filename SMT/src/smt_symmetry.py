@@ -0,0 +1,108 @@
+import math
+from z3 import *
+from instrumentation import family
+
+# Symmetry breaking and dominance rules added on top of an encoding of
+# smt_encodings.py (any theory: the formulas are built with its before and
+# at_most helpers). Every rule keeps at least one optimal layout:
+#   - lex: identical blocks are interchangeable, so within every group the
+#     corners are in lexicographic order, (x_i, y_i) <= (x_j, y_j) for i < j
+#     (consecutive blocks of the group, the order is transitive)
+#   - quadrant: a layout mirrored left-right (or top-bottom within its
+#     height) is still a layout, so the biggest block with no twin is put in
+#     the bottom-left quadrant: 2 x_b + w_b <= max_width, and under the
+#     height probe "height <= bound" 2 y_b + h_b <= bound. A block with a
+#     twin would clash with the lex order, so only unique blocks are taken
+#   - wide: a pair wider than max_width can not stay side by side, the two
+#     "left" disjuncts of its non overlap are asserted false
+#   - tall: a pair taller than the height bound can not be stacked, the two
+#     "below" disjuncts are false; for max_height they are asserted once,
+#     for the bound of a probe they are guarded by the probe literal
+# add_symmetry asserts the static rules and leaves in the encoding the
+# rules of a height bound ("bound_rules", used by SMT.search) and the
+# pruning statistics ("symmetry").
+
+def quadrant_block(instance):
+    # biggest block whose dimensions are unique, None if every block has a twin
+    twins = set(b for group in instance.identical_groups for b in group.tolist())
+    unique = [b for b in range(instance.n_blocks) if b not in twins]
+    if not unique:
+        return None
+    return max(unique, key=lambda b: instance.widths[b] * instance.heights[b])
+
+# ------------------ END FUNCTION --------------------
+
+def add_symmetry(encoding, instance, max_height, families=None):
+
+    # the groups of identical blocks and the pairs wider than max_width are
+    # the ones precomputed by the Instance (common/instance.py)
+    solver = encoding["solver"]
+    before, at_most = encoding["before"], encoding["at_most"]
+    x_coord, y_coord = encoding["x_coord"], encoding["y_coord"]
+    max_width, n_blocks = instance.max_width, instance.n_blocks
+    widths, heights = instance.widths.tolist(), instance.heights.tolist()
+    n_assertions = lambda: len(solver.assertions())
+
+    groups = [group.tolist() for group in instance.identical_groups]
+    block = quadrant_block(instance)
+    wide = instance.no_side_by_side.tolist()
+    tall = [(i, j) for i in range(n_blocks) for j in range(i+1, n_blocks)
+            if heights[i] + heights[j] > max_height]
+
+    # lexicographic order within the groups of identical blocks
+    with family(families, "symmetry_lex", n_assertions):
+        for blocks in groups:
+            for i, j in zip(blocks, blocks[1:]):
+                solver.add(Or(
+                    before(x_coord[i], x_coord[j], 1),
+                    And(before(x_coord[i], x_coord[j], 0),
+                        before(x_coord[j], x_coord[i], 0),
+                        before(y_coord[i], y_coord[j], 0))
+                ))
+
+    # biggest unique block in the left half (the bottom half is per probe)
+    with family(families, "symmetry_quadrant", n_assertions):
+        if block is not None:
+            solver.add(at_most(x_coord[block], (max_width - widths[block]) // 2))
+
+    # pairs that can not stay side by side / be stacked within max_height
+    with family(families, "dominance_pairs", n_assertions):
+        for i, j in wide:
+            solver.add(Not(before(x_coord[i], x_coord[j], widths[i])))
+            solver.add(Not(before(x_coord[j], x_coord[i], widths[j])))
+        for i, j in tall:
+            solver.add(Not(before(y_coord[i], y_coord[j], heights[i])))
+            solver.add(Not(before(y_coord[j], y_coord[i], heights[j])))
+
+    # pruning: symmetric layouts removed (log10, k! orderings of a group of
+    # k identical blocks, 4 mirrorings) and non overlap disjuncts removed
+    statistics = {"identical_groups": len(groups),
+                  "lex_pairs": sum(len(blocks) - 1 for blocks in groups),
+                  "quadrant_block": -1 if block is None else block,
+                  "symmetries_log10": round(
+                      sum(math.lgamma(len(blocks) + 1) for blocks in groups) / math.log(10) +
+                      (math.log10(4) if block is not None else 0), 2),
+                  "wide_pairs": len(wide),
+                  "tall_pairs": len(tall),
+                  "disjuncts_removed": 2 * (len(wide) + len(tall)),
+                  "probe_tall_pairs": 0,
+                  "disjuncts": 4 * n_blocks * (n_blocks - 1) // 2}
+    encoding["symmetry"] = statistics
+
+    def bound_rules(bound):
+        # the rules valid under "height <= bound", to be guarded by the probe
+        rules = []
+        if block is not None:
+            rules.append(at_most(y_coord[block], (bound - heights[block]) // 2))
+        for i in range(n_blocks):
+            for j in range(i+1, n_blocks):
+                if bound < heights[i] + heights[j] <= max_height:
+                    rules.append(Not(before(y_coord[i], y_coord[j], heights[i])))
+                    rules.append(Not(before(y_coord[j], y_coord[i], heights[j])))
+                    statistics["probe_tall_pairs"] += 1
+        return rules
+
+    encoding["bound_rules"] = bound_rules
+    return encoding
+
+# ------------------ END FUNCTION --------------------
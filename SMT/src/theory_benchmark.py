@@ -0,0 +1,64 @@
+import argparse, csv, os, time
+from SMT import solve
+from smt_encodings import THEORIES
+from instance import load_instance
+
+# Runs the SMT model with every theory encoding (lia, idl, bv) over the
+# instances, writes one CSV row per (instance, theory) and prints a summary:
+# instances solved to optimality, total time and number of wins (fastest
+# optimal answer) of each theory.
+
+parser = argparse.ArgumentParser(description="SMT theory encodings benchmark")
+parser.add_argument("--theories", nargs="+", default=THEORIES, choices=THEORIES)
+parser.add_argument("--first", type=int, default=1, help="first instance")
+parser.add_argument("--last", type=int, default=40, help="last instance")
+parser.add_argument("--timeout", type=int, default=300,
+                    help="seconds per instance and theory")
+parser.add_argument("--csv", default="theory_benchmark.csv")
+args = parser.parse_args()
+
+rows = []
+print("INSTANCE   --   THEORY   --   HEIGHT   --   TIME")
+for i in range(args.first, args.last + 1):
+
+    filename = "./instances/ins-{}.txt".format(i)
+    if not os.path.isfile(filename):
+        continue
+    instance = load_instance(filename)
+    min_height, max_height = instance.lower_bound, instance.upper_bound
+
+    for theory in args.theories:
+        start_time = time.time()
+        res = solve(instance, min_height, max_height, theory=theory,
+                    timeout=args.timeout)
+        time_spent = time.time() - start_time
+        print("ins-{}\t{}\t{}\t{:.2f}".format(i, theory, res["height"], time_spent))
+        rows.append({"instance": i,
+                     "theory": theory,
+                     "height": res["height"],
+                     "optimal": res["optimal"],
+                     "time": round(time_spent, 3)})
+
+# csv with every run
+with open(args.csv, "w", newline="") as csv_file:
+    writer = csv.DictWriter(csv_file, fieldnames=list(rows[0].keys()))
+    writer.writeheader()
+    writer.writerows(rows)
+
+# summary: the winner of an instance is the fastest optimal run
+wins = {theory: 0 for theory in args.theories}
+for i in sorted({row["instance"] for row in rows}):
+    optimal_rows = [row for row in rows
+                    if row["instance"] == i and row["optimal"]]
+    if optimal_rows:
+        wins[min(optimal_rows, key=lambda row: row["time"])["theory"]] += 1
+
+print("\nTHEORY   --   OPTIMAL   --   TOTAL TIME   --   WINS")
+for theory in args.theories:
+    theory_rows = [row for row in rows if row["theory"] == theory]
+    print("{}\t{}/{}\t{:.2f}\t{}".format(
+        theory,
+        sum(row["optimal"] for row in theory_rows),
+        len(theory_rows),
+        sum(row["time"] for row in theory_rows),
+        wins[theory]))
@@ -0,0 +1,157 @@
+import argparse, csv, os, shlex, signal, subprocess, sys, time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from results import default_run
+
+# Parallel batch runner: every (approach, instance) pair is a job, run as
+# "<script> --instances N" inside <approach>/src, exactly as by hand, so the
+# scripts write their own ../out/out-N.txt. Jobs are dispatched to a pool of
+# workers; a job running past the hard wall-clock limit is killed together
+# with its solver processes and its output becomes TIMEOUT.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+APPROACHES = {"CP": "run_model.py",
+              "SAT": "SAT.py",
+              "SMT": "SMT.py",
+              "MIP": "MIP.py"}
+
+def parse_instances(text):
+    # "1-10,15,20-22" -> [1, ..., 10, 15, 20, 21, 22]
+    instances = []
+    for part in text.split(","):
+        if "-" in part:
+            first, last = part.split("-")
+            instances.extend(range(int(first), int(last) + 1))
+        else:
+            instances.append(int(part))
+    return instances
+
+# ------------------ END FUNCTION --------------------
+
+def output_path(approach, instance):
+    return os.path.join(ROOT, approach, "out", "out-{}.txt".format(instance))
+
+# ------------------ END FUNCTION --------------------
+
+def read_result(approach, instance, since=0):
+    # height written in the output file, or its status (TIMEOUT, UNSAT);
+    # None when the file was not written after "since"
+    path = output_path(approach, instance)
+    if not os.path.isfile(path) or os.path.getmtime(path) < since:
+        return None
+    with open(path) as file:
+        first_line = file.readline().split()
+    if len(first_line) == 2:
+        return int(first_line[1])
+    return " ".join(first_line) or None
+
+# ------------------ END FUNCTION --------------------
+
+def script_time(stdout, instance):
+    # time printed by the script itself ("<instance>\t<time>...")
+    names = ["ins-{}".format(instance), "ins-{}.txt".format(instance),
+             "ins-{}.dzn".format(instance)]
+    for line in stdout.splitlines():
+        fields = line.split("\t")
+        if len(fields) > 1 and os.path.basename(fields[0]) in names:
+            try:
+                return float(fields[1].replace("sec", ""))
+            except ValueError:
+                return None
+    return None
+
+# ------------------ END FUNCTION --------------------
+
+def run_job(approach, instance, timeout, extra_args=()):
+    command = [sys.executable, APPROACHES[approach],
+               "--instances", str(instance)] + list(extra_args)
+
+    # new session: on timeout the whole process group (solvers included) is killed
+    start_time = time.time()
+    process = subprocess.Popen(command,
+                               cwd=os.path.join(ROOT, approach, "src"),
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE,
+                               text=True,
+                               start_new_session=True)
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
+        status = "done" if process.returncode == 0 else "error"
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        stdout, stderr = process.communicate()
+        status = "killed"
+        with open(output_path(approach, instance), "w") as output_file:
+            output_file.write("TIMEOUT")
+    wall_time = time.time() - start_time
+
+    return {"approach": approach,
+            "instance": instance,
+            "status": status,
+            "wall_time": round(wall_time, 3),
+            "script_time": script_time(stdout, instance),
+            "result": read_result(approach, instance, start_time),
+            "stdout": stdout,
+            "stderr": stderr}
+
+# ------------------ END FUNCTION --------------------
+
+def run_batch(jobs, workers, timeout, extra_args=None, on_done=None):
+    # runs the (approach, instance) jobs on a pool of workers, returns the
+    # results in the order of the jobs
+    extra_args = extra_args or {}
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_job, approach, instance, timeout,
+                               extra_args.get(approach, [])): (approach, instance)
+                   for approach, instance in jobs}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+            if on_done is not None:
+                on_done(results[futures[future]])
+    return [results[job] for job in jobs]
+
+# ------------------ END FUNCTION --------------------
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="parallel batch runner")
+    parser.add_argument("--approaches", nargs="+", default=list(APPROACHES),
+                        choices=list(APPROACHES))
+    parser.add_argument("--instances", default="1-40",
+                        help="e.g. 1-40 or 1,5,10-12")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(),
+                        help="number of jobs running at the same time")
+    parser.add_argument("--timeout", type=float, default=360,
+                        help="hard wall-clock limit per job (seconds)")
+    parser.add_argument("--run", default=default_run(),
+                        help="run label shared by the jobs in the results database")
+    parser.add_argument("--args", nargs="*", default=[], metavar="APPROACH=ARGS",
+                        help='extra script options, e.g. SAT="--backend pysat"')
+    parser.add_argument("--csv", default="batch_results.csv")
+    args = parser.parse_args()
+
+    extra_args = {approach: ["--run", args.run] for approach in APPROACHES}
+    for item in args.args:
+        approach, options = item.split("=", 1)
+        extra_args[approach] += shlex.split(options)
+
+    jobs = [(approach, instance)
+            for approach in args.approaches
+            for instance in parse_instances(args.instances)]
+
+    def report(result):
+        print("{}\tins-{}\t{}\t{:.2f}\t{}".format(
+            result["approach"], result["instance"], result["status"],
+            result["wall_time"], result["result"]), flush=True)
+
+    print("APPROACH   --   INSTANCE   --   STATUS   --   TIME   --   RESULT")
+    start_time = time.time()
+    results = run_batch(jobs, args.jobs, args.timeout, extra_args, report)
+    print("total\t{:.2f}".format(time.time() - start_time))
+
+    fields = ["approach", "instance", "status", "wall_time", "script_time", "result"]
+    with open(args.csv, "w", newline="") as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(results)
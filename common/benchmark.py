@@ -0,0 +1,299 @@
+import argparse, csv, gc, os, statistics, sys, tempfile, time
+from contextlib import contextmanager
+from datetime import timedelta
+from batch import ROOT, parse_instances
+from instance import Instance
+
+# Benchmark suite timing the phases of every approach separately:
+#   parse    txt file -> Instance (uncached: the whole parsing and precomputing)
+#   build    model / encoding construction in Python
+#   write    model handed over to the solver (MIP: MPS / LP file written by
+#            PuLP for the command line solvers, CP: flattening to FlatZinc);
+#            it happens inside the solver call and is subtracted from solve
+#   solve    solver time (whole height search for SAT and SMT)
+#   extract  layout read back from the solution
+# The approaches run in this process (the solver processes of MIP and CP are
+# children), so they all share the CPU affinity set with --cpus. Each
+# (approach, instance) gets --warmup untimed runs, then --trials runs for
+# every seed of --seeds. The runs are written to --csv and summarized by
+# their median; with --baseline the medians are compared with a previous CSV
+# and the regressions beyond --tolerance are reported (exit status 1).
+
+PHASES = ["parse", "build", "write", "solve", "extract"]
+
+for approach in ["SAT", "SMT", "MIP", "CP"]:
+    sys.path.append(os.path.join(ROOT, approach, "src"))
+
+@contextmanager
+def timed(times, phase):
+    start_time = time.perf_counter()
+    yield
+    times[phase] = times.get(phase, 0) + time.perf_counter() - start_time
+
+# ------------------ END FUNCTION --------------------
+
+def bench_sat(instance, options, seed, timeout, times):
+    import SAT
+    backend = SAT.make_backend(options.sat_backend,
+                               pysat_solver=options.pysat_solver, seed=seed)
+    with timed(times, "build"):
+        layout = SAT.encode(instance, instance.lower_bound, instance.upper_bound,
+                            backend, positions=options.sat_positions)
+    with timed(times, "solve"):
+        height = SAT.search(layout, instance.lower_bound, instance.upper_bound,
+                            backend, timeout)
+    if height == -1:
+        return None, "TIMEOUT"
+    with timed(times, "extract"):
+        SAT.extract(layout, backend, instance.n_blocks, instance.max_width, height)
+    return height, "OPTIMAL"
+
+# ------------------ END FUNCTION --------------------
+
+def bench_smt(instance, options, seed, timeout, times):
+    import SMT
+    widths, heights = instance.widths.tolist(), instance.heights.tolist()
+    with timed(times, "build"):
+        encoding = SMT.build_encoding(options.smt_theory, instance.max_width,
+                                      instance.n_blocks, widths, heights,
+                                      instance.lower_bound, instance.upper_bound)
+        SMT.add_symmetry(encoding, instance, instance.upper_bound)
+        encoding["solver"].set("random_seed", seed)
+    with timed(times, "solve"):
+        model, optimal = SMT.search(encoding, instance.lower_bound,
+                                    instance.upper_bound, timeout)
+    if model is None:
+        return None, "TIMEOUT"
+    with timed(times, "extract"):
+        height = SMT.extract(encoding, model)["height"]
+    return height, "OPTIMAL" if optimal else "SAT"
+
+# ------------------ END FUNCTION --------------------
+
+# file written by PuLP before calling the command line solvers, MOSEK gets
+# the model in memory
+SOLVER_FILES = {"cbc": "mps", "cplex": "lp"}
+
+def bench_mip(instance, options, seed, timeout, times):
+    import MIP, pulp
+    widths, heights = instance.widths.tolist(), instance.heights.tolist()
+    if options.mip_solver == "highs":
+        # sparse model, no PuLP expressions and no MPS file
+        with timed(times, "build"):
+            model = MIP.build_sparse_model(instance.max_width, widths, heights)
+        with timed(times, "solve"):
+            res = MIP.solve_sparse(model, time_limit=timeout)
+        return res["height"], res["status"]
+    build = MIP.build_pulp_model if options.mip_model == "base" else MIP.build_pulp_model_rot
+    with timed(times, "build"):
+        model = build(instance)
+        solver = MIP.make_solver(options.mip_solver, seed=seed, time_limit=timeout)
+    file_format = SOLVER_FILES.get(options.mip_solver)
+    if file_format is not None:
+        # the same file written once more outside the solve, to time it
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with timed(times, "write"):
+                path = os.path.join(temp_dir, "model." + file_format)
+                if file_format == "mps":
+                    model.writeMPS(path)
+                else:
+                    model.writeLP(path)
+    with timed(times, "solve"):
+        model.solve(solver)
+    times["solve"] = max(0, times["solve"] - times["write"])
+    # sol_status: a CBC time limit with an incumbent is SAT, not OPTIMAL
+    status = MIP.solution_status(model)
+    if status not in ("OPTIMAL", "SAT") or pulp.value(model.objective) is None:
+        return None, "UNSAT" if status == "UNSAT" else "TIMEOUT"
+    with timed(times, "extract"):
+        MIP.extract(model, instance.n_blocks)
+    return round(pulp.value(model.objective)), status
+
+# ------------------ END FUNCTION --------------------
+
+def bench_cp(instance, options, seed, timeout, times):
+    import minizinc, run_model
+    with timed(times, "build"):
+        model = minizinc.Model(os.path.join(ROOT, "CP", "src", "GECODE.mzn"))
+        solver = minizinc.Solver.lookup(options.cp_solver)
+        cp_instance = minizinc.Instance(solver, model)
+        run_model.add_data(cp_instance, instance)
+    with timed(times, "solve"):
+        res = cp_instance.solve(time_limit=timedelta(seconds=timeout), random_seed=seed,
+                                **run_model.solve_options(solver, options.cp_threads))
+    flat_time = res.statistics.get("flatTime")
+    if isinstance(flat_time, timedelta):
+        times["write"] = flat_time.total_seconds()
+        times["solve"] = max(0, times["solve"] - times["write"])
+    if res.solution is None:
+        return None, "UNSAT" if res.status is minizinc.Status.UNSATISFIABLE else "TIMEOUT"
+    with timed(times, "extract"):
+        height = run_model.get_data(res)["max_height"]
+    return height, "OPTIMAL" if res.status is minizinc.Status.OPTIMAL_SOLUTION else "SAT"
+
+# ------------------ END FUNCTION --------------------
+
+BENCHES = {"SAT": bench_sat, "SMT": bench_smt, "MIP": bench_mip, "CP": bench_cp}
+
+def variant(approach, options):
+    return {"SAT": options.sat_backend + ("/" + options.pysat_solver
+                                          if options.sat_backend == "pysat" else ""),
+            "SMT": options.smt_theory,
+            # HiGHS solves the sparse base model, --mip-model does not apply
+            "MIP": ("sparse" if options.mip_solver == "highs" else options.mip_model) +
+                   "/" + options.mip_solver,
+            "CP": options.cp_solver + ("/{}threads".format(options.cp_threads)
+                                       if options.cp_threads > 1 else "")}[approach]
+
+# ------------------ END FUNCTION --------------------
+
+def run_trial(approach, filename, options, seed, timeout):
+    times = {phase: 0.0 for phase in PHASES}
+    gc.collect()
+    with timed(times, "parse"):
+        with open(filename) as file:
+            instance = Instance.from_text(file.read())
+    height, status = BENCHES[approach](instance, options, seed, timeout, times)
+    times["total"] = sum(times[phase] for phase in PHASES)
+    return times, height, status
+
+# ------------------ END FUNCTION --------------------
+
+def summarize(rows):
+    # median of every phase over the trials of each (approach, variant, instance)
+    groups = {}
+    for row in rows:
+        groups.setdefault((row["approach"], row["variant"], row["instance"]), []).append(row)
+    summary = {}
+    for key, group in groups.items():
+        summary[key] = {phase: statistics.median(float(row[phase]) for row in group)
+                        for phase in PHASES + ["total"]}
+        summary[key]["status"] = group[-1]["status"]
+        summary[key]["height"] = group[-1]["height"]
+    return summary
+
+# ------------------ END FUNCTION --------------------
+
+def regressions(summary, baseline, tolerance, min_delta):
+    # (key, phase, old, new) where the median grew beyond the tolerance (and
+    # by more than min_delta seconds, below which timing is noise); a solved
+    # instance no longer solved is reported with phase "status"
+    found = []
+    for key, new in summary.items():
+        if key not in baseline:
+            continue
+        old = baseline[key]
+        if old["status"] in ("OPTIMAL", "UNSAT") and new["status"] not in ("OPTIMAL", "UNSAT"):
+            found.append((key, "status", old["status"], new["status"]))
+        for phase in PHASES + ["total"]:
+            if new[phase] > old[phase] * (1 + tolerance) and new[phase] - old[phase] > min_delta:
+                found.append((key, phase, old[phase], new[phase]))
+    return found
+
+# ------------------ END FUNCTION --------------------
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="phase benchmark of the approaches")
+    parser.add_argument("--approaches", nargs="+", default=["SAT", "SMT", "MIP"],
+                        choices=list(BENCHES))
+    parser.add_argument("--instances", default="1-10", help="e.g. 1-40 or 1,5,10-12")
+    parser.add_argument("--instance-dir", default=os.path.join(ROOT, "CP", "src", "instances"),
+                        help="directory of the ins-N.txt files (e.g. generated ones)")
+    parser.add_argument("--trials", type=int, default=3, help="timed runs per seed")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs first")
+    parser.add_argument("--seeds", nargs="+", type=int, default=[0],
+                        help="solver random seeds")
+    parser.add_argument("--cpus", default=None,
+                        help="CPU affinity, e.g. 0 or 0-3 (default: unchanged)")
+    parser.add_argument("--timeout", type=float, default=300, help="solver seconds per run")
+    parser.add_argument("--sat-backend", default="pysat", choices=["z3", "pysat"])
+    parser.add_argument("--pysat-solver", default="glucose4")
+    parser.add_argument("--sat-positions", default="normal", choices=["normal", "all"])
+    parser.add_argument("--smt-theory", default="lia", choices=["lia", "idl", "bv"])
+    parser.add_argument("--mip-model", default="base", choices=["base", "rot"])
+    parser.add_argument("--mip-solver", default="cbc",
+                        choices=["mosek", "cplex", "cbc", "highs"])
+    parser.add_argument("--cp-solver", default="gecode")
+    parser.add_argument("--cp-threads", type=int, default=1)
+    parser.add_argument("--csv", default="benchmark.csv")
+    parser.add_argument("--baseline", default=None, help="CSV of a previous benchmark")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="relative slowdown allowed before a regression")
+    parser.add_argument("--min-delta", type=float, default=0.05,
+                        help="slowdowns below this many seconds are ignored")
+    args = parser.parse_args()
+
+    if args.cpus is not None:
+        os.sched_setaffinity(0, parse_instances(args.cpus))
+
+    fields = ["approach", "variant", "instance", "seed", "trial"] + PHASES + \
+             ["total", "height", "status"]
+    rows = []
+    print("APPROACH   --   INSTANCE   --   SEED   --   TRIAL   --   " +
+          "   --   ".join(phase.upper() for phase in PHASES) + "   --   STATUS")
+    for approach in args.approaches:
+        for i in parse_instances(args.instances):
+            filename = os.path.join(args.instance_dir, "ins-{}.txt".format(i))
+            if not os.path.isfile(filename):
+                continue
+            for _ in range(args.warmup):
+                run_trial(approach, filename, args, args.seeds[0], args.timeout)
+            for seed in args.seeds:
+                for trial in range(args.trials):
+                    times, height, status = run_trial(approach, filename, args,
+                                                      seed, args.timeout)
+                    rows.append(dict({"approach": approach,
+                                      "variant": variant(approach, args),
+                                      "instance": "ins-{}".format(i),
+                                      "seed": seed,
+                                      "trial": trial,
+                                      "height": height,
+                                      "status": status},
+                                     **{phase: round(times[phase], 6)
+                                        for phase in PHASES + ["total"]}))
+                    print("{}\tins-{}\t{}\t{}\t".format(approach, i, seed, trial) +
+                          "\t".join("{:.4f}".format(times[phase]) for phase in PHASES) +
+                          "\t{} {}".format(status, height), flush=True)
+
+    with open(args.csv, "w", newline="") as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    # summary: medians per instance, then per approach
+    summary = summarize(rows)
+    print("\nMEDIANS (seconds)")
+    print("APPROACH   --   VARIANT   --   INSTANCE   --   " +
+          "   --   ".join(phase.upper() for phase in PHASES + ["total"]))
+    for (approach, variant_name, instance), medians in summary.items():
+        print("{}\t{}\t{}\t".format(approach, variant_name, instance) +
+              "\t".join("{:.4f}".format(medians[phase]) for phase in PHASES + ["total"]))
+    print("\nAPPROACH   --   SHARE OF THE TOTAL TIME PER PHASE")
+    for approach in args.approaches:
+        medians = [m for key, m in summary.items() if key[0] == approach]
+        total = sum(m["total"] for m in medians)
+        if total > 0:
+            print(approach + "\t" + "\t".join(
+                "{} {:.1%}".format(phase, sum(m[phase] for m in medians) / total)
+                for phase in PHASES))
+
+    # regressions against the baseline
+    if args.baseline is not None:
+        with open(args.baseline, newline="") as csv_file:
+            baseline = summarize(list(csv.DictReader(csv_file)))
+        found = regressions(summary, baseline, args.tolerance, args.min_delta)
+        print("\nREGRESSIONS against {} (tolerance {:.0%})".format(args.baseline,
+                                                                 args.tolerance))
+        for (approach, variant_name, instance), phase, old, new in found:
+            if phase == "status":
+                print("{}\t{}\t{}\tstatus {} -> {}".format(approach, variant_name,
+                                                           instance, old, new))
+            else:
+                print("{}\t{}\t{}\t{} {:.4f} -> {:.4f} (+{:.0%})".format(
+                    approach, variant_name, instance, phase, old, new,
+                    new / old - 1 if old > 0 else float("inf")))
+        if not found:
+            print("none")
+        else:
+            sys.exit(1)
@@ -0,0 +1,43 @@
+import fcntl, json
+
+# Height bounds shared between approaches racing on the same instance
+# (see portfolio.py). The bound file holds a JSON object
+#   {"lower": L, "upper": U}
+# where U is the best height of a layout found so far and L the highest
+# height proven to be needed. Updates are done under an exclusive lock, and
+# only ever tighten the bounds. With path None every call is a no-op, so
+# the approaches can use these functions unconditionally.
+
+def parse_bounds(text):
+    bounds = json.loads(text) if text.strip() else {}
+    return {"lower": bounds.get("lower"), "upper": bounds.get("upper")}
+
+# ------------------ END FUNCTION --------------------
+
+def read_bounds(path):
+    if path is None:
+        return {"lower": None, "upper": None}
+    try:
+        with open(path) as file:
+            fcntl.flock(file, fcntl.LOCK_SH)
+            return parse_bounds(file.read())
+    except FileNotFoundError:
+        return {"lower": None, "upper": None}
+
+# ------------------ END FUNCTION --------------------
+
+def update_bounds(path, lower=None, upper=None):
+    if path is None:
+        return {"lower": None, "upper": None}
+    with open(path, "a+") as file:
+        fcntl.flock(file, fcntl.LOCK_EX)
+        file.seek(0)
+        bounds = parse_bounds(file.read())
+        if lower is not None and (bounds["lower"] is None or lower > bounds["lower"]):
+            bounds["lower"] = lower
+        if upper is not None and (bounds["upper"] is None or upper < bounds["upper"]):
+            bounds["upper"] = upper
+        file.seek(0)
+        file.truncate()
+        file.write(json.dumps(bounds))
+    return bounds
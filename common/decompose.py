@@ -0,0 +1,219 @@
+import argparse, math, os, shlex, shutil, signal, subprocess, sys, tempfile, time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from batch import ROOT, APPROACHES
+from instance import Instance, load_instances
+from results import DB_PATH, default_run, record_run
+from skyline import best_packing
+from lns import lns, valid_layout
+
+# Strip decomposition for instances too large for a monolithic model (the
+# pairwise non-overlap constraints grow quadratically with the blocks).
+# The blocks are sorted by height and cut into consecutive groups of about
+# the same area, so every group fills a horizontal strip of the full width
+# with blocks of similar height. Each strip is a sub-instance solved on its
+# own, in parallel, by any approach (the scripts are run as by hand, on a
+# temporary instance directory) or by the skyline heuristic; a strip whose
+# run fails or times out gets its skyline layout. The strips are stacked
+# into one layout, which can be compacted:
+#   gravity  every block drops down as far as the blocks below allow
+#   lns      gravity, then lns.py starting from it (--compact-time seconds)
+
+COMPACTIONS = ["none", "gravity", "lns"]
+
+def partition(instance, n_strips):
+    # indices of the blocks of each strip (tallest blocks in the first strip)
+    order = np.lexsort((-instance.widths, -instance.heights))
+    areas = np.cumsum((instance.widths * instance.heights)[order])
+    # strip of a block: the share of the total area reached before it
+    strip = np.minimum((areas - 1) * n_strips // areas[-1], n_strips - 1)
+    return [order[strip == s] for s in range(n_strips) if (strip == s).any()]
+
+# ------------------ END FUNCTION --------------------
+
+def read_layout(path, n_blocks):
+    # (corner_x, corner_y) of an output file, None for TIMEOUT / UNSAT
+    if not os.path.isfile(path):
+        return None
+    with open(path) as file:
+        lines = [line.split() for line in file if line.strip()]
+    if not lines or len(lines[0]) != 2 or len(lines) < n_blocks + 2:
+        return None
+    corners = np.array([line[2:4] for line in lines[2:2 + n_blocks]], dtype=np.int64)
+    return corners[:, 0], corners[:, 1]
+
+# ------------------ END FUNCTION --------------------
+
+def solve_strip(approach, strip, work_dir, timeout, extra_args=()):
+    # layout (corner_x, corner_y) of the strip number strip, written in
+    # work_dir as ins-<strip>.txt; None when the run gave no layout
+    if approach == "skyline":
+        with open(os.path.join(work_dir, "ins-{}.txt".format(strip))) as file:
+            instance = Instance.from_text(file.read())
+        layout = best_packing(instance.max_width, instance.widths, instance.heights)
+        return np.array(layout["corner_x"]), np.array(layout["corner_y"])
+
+    out_dir = os.path.join(work_dir, "out")
+    filename = os.path.join(work_dir, "ins-{}.txt".format(strip))
+    if approach == "CP":
+        command = [sys.executable, APPROACHES[approach], filename]
+    else:
+        command = [sys.executable, APPROACHES[approach],
+                   "--instance-dir", work_dir, "--instances", str(strip)]
+    command += ["--out-dir", out_dir, "--results-db", "", "--fallback"] + list(extra_args)
+
+    # new session: on timeout the whole process group (solvers included) is killed
+    process = subprocess.Popen(command,
+                               cwd=os.path.join(ROOT, approach, "src"),
+                               stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL,
+                               start_new_session=True)
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+        return None
+    with open(filename) as file:
+        n_blocks = Instance.from_text(file.read()).n_blocks
+    return read_layout(os.path.join(out_dir, "out-{}.txt".format(strip)), n_blocks)
+
+# ------------------ END FUNCTION --------------------
+
+def gravity(instance, corner_x, corner_y):
+    # blocks taken bottom-up, each one dropped on the highest top below it
+    # (a block never moves up, and two blocks overlapping in x stay in the
+    # same vertical order, so the layout stays valid)
+    skyline = np.zeros(instance.max_width, dtype=np.int64)
+    new_y = np.empty_like(corner_y)
+    for b in np.argsort(corner_y, kind="stable"):
+        x, width = corner_x[b], instance.widths[b]
+        new_y[b] = skyline[x:x + width].max()
+        skyline[x:x + width] = new_y[b] + instance.heights[b]
+    return new_y
+
+# ------------------ END FUNCTION --------------------
+
+def decompose(instance, approach="skyline", n_strips=None, strip_blocks=25,
+              jobs=None, timeout=60, compaction="gravity", compact_time=60,
+              extra_args=()):
+    # returns the layout {"height", "corner_x", "corner_y"} and statistics
+    # by default about strip_blocks blocks per strip, but no strip lower than
+    # twice the tallest block: the space above the ragged top of every strip
+    # is lost, so thin strips waste most of the height
+    n_strips = n_strips or max(1, min(math.ceil(instance.n_blocks / strip_blocks),
+                                      instance.area_bound // (2 * instance.max_block_height)))
+    strips = partition(instance, n_strips)
+    work_dir = tempfile.mkdtemp(prefix="decompose-")
+    for s, blocks in enumerate(strips, start=1):
+        with open(os.path.join(work_dir, "ins-{}.txt".format(s)), "w") as file:
+            file.write("{}\n{}\n".format(instance.max_width, len(blocks)))
+            file.write("".join("{} {}\n".format(instance.widths[b], instance.heights[b])
+                               for b in blocks))
+
+    start_time = time.time()
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        layouts = list(pool.map(lambda s: solve_strip(approach, s, work_dir,
+                                                      timeout, extra_args),
+                                range(1, len(strips) + 1)))
+    solve_time = time.time() - start_time
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    # stacking: each strip starts at the top of the previous one
+    corner_x = np.zeros(instance.n_blocks, dtype=np.int64)
+    corner_y = np.zeros(instance.n_blocks, dtype=np.int64)
+    offset, failed = 0, 0
+    for blocks, layout in zip(strips, layouts):
+        if layout is None:
+            failed += 1
+            layout = best_packing(instance.max_width, instance.widths[blocks],
+                                  instance.heights[blocks])
+            layout = np.array(layout["corner_x"]), np.array(layout["corner_y"])
+        corner_x[blocks] = layout[0]
+        corner_y[blocks] = layout[1] + offset
+        offset = int((corner_y[blocks] + instance.heights[blocks]).max())
+    stacked_height = offset
+
+    if compaction != "none":
+        corner_y = gravity(instance, corner_x, corner_y)
+    layout = {"height": int((corner_y + instance.heights).max()),
+              "corner_x": corner_x.tolist(),
+              "corner_y": corner_y.tolist()}
+    if compaction == "lns":
+        layout, _ = lns(instance, budget=compact_time, layout=layout)
+
+    return layout, {"strips": len(strips),
+                    "failed_strips": failed,
+                    "stacked_height": stacked_height,
+                    "solve_time": solve_time}
+
+# ------------------ END FUNCTION --------------------
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="strip decomposition")
+    parser.add_argument("--approach", default="skyline",
+                        choices=["skyline"] + list(APPROACHES),
+                        help="approach solving the strips")
+    parser.add_argument("--strips", type=int, default=None,
+                        help="number of strips (default: n_blocks / --strip-blocks, strips at "
+                             "least twice as tall as the tallest block)")
+    parser.add_argument("--strip-blocks", type=int, default=25,
+                        help="blocks per strip, when --strips is not given")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(),
+                        help="strips solved at the same time")
+    parser.add_argument("--timeout", type=float, default=60,
+                        help="hard wall-clock limit per strip (seconds)")
+    parser.add_argument("--compact", default="gravity", choices=COMPACTIONS)
+    parser.add_argument("--compact-time", type=float, default=60,
+                        help="seconds of LNS with --compact lns")
+    parser.add_argument("--args", default="",
+                        help='extra options of the approach script, e.g. "--backend pysat"')
+    parser.add_argument("--instance-dir", default=os.path.join(ROOT, "CP", "src", "instances"),
+                        help="directory of the ins-N.txt files (e.g. generated ones)")
+    parser.add_argument("--instances", nargs="+", type=int,
+                        help="instance numbers to run (default: all)")
+    parser.add_argument("--out-dir", default=os.path.join(ROOT, "common", "out", "decompose"))
+    parser.add_argument("--results-db", default=DB_PATH,
+                        help='results database ("" to disable)')
+    parser.add_argument("--run", default=default_run(),
+                        help="label of this run in the results database")
+    args = parser.parse_args()
+
+    n_files = len([f for f in os.listdir(args.instance_dir)
+                   if f.startswith("ins-") and f.endswith(".txt")])
+    numbers = args.instances or range(1, n_files + 1)
+    instances = load_instances([os.path.join(args.instance_dir, "ins-{}.txt".format(i))
+                                for i in numbers])
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    print("INSTANCE   --   STRIPS   --   STACKED   --   HEIGHT   --   LOWER BOUND   --   TIME")
+    for i, instance in zip(numbers, instances):
+        start_time = time.time()
+        layout, statistics = decompose(instance, args.approach, args.strips,
+                                       args.strip_blocks, args.jobs, args.timeout,
+                                       args.compact, args.compact_time,
+                                       shlex.split(args.args))
+        time_spent = time.time() - start_time
+        print("ins-{}\t{}\t{}\t{}\t{}\t{:.2f}".format(
+            i, statistics["strips"], statistics["stacked_height"], layout["height"],
+            instance.lower_bound, time_spent))
+
+        if not valid_layout(instance.max_width, instance.widths, instance.heights,
+                            layout["corner_x"], layout["corner_y"]):
+            raise RuntimeError("ins-{}: invalid layout".format(i))
+
+        record_run(args.results_db, args.run, instance, "DECOMPOSE",
+                   "{}/{}strips/{}".format(args.approach, statistics["strips"], args.compact),
+                   args.approach, layout["height"],
+                   "OPTIMAL" if layout["height"] == instance.lower_bound else "SAT",
+                   time_spent, solve_time=statistics["solve_time"],
+                   statistics=statistics)
+
+        with open(os.path.join(args.out_dir, "out-{}.txt".format(i)), "w") as output_file:
+            output_file.write(str(instance.max_width) + ' ' + str(layout["height"]) + '\n')
+            output_file.write(str(instance.n_blocks) + '\n')
+            for b in range(instance.n_blocks):
+                output_file.write("{} {} {} {}\n".format(
+                    instance.widths[b], instance.heights[b],
+                    layout["corner_x"][b], layout["corner_y"][b]))
@@ -0,0 +1,130 @@
+import argparse, csv, heapq, os, sys
+import numpy as np
+
+# Synthetic instances with a known optimal height. A W x H rectangle is cut
+# recursively by guillotine cuts into n_blocks pieces: the pieces tile the
+# rectangle exactly, so the optimal height is H (it is also the area bound,
+# total area / W). The output is the usual txt format.
+#
+# At each step one of the largest pieces (area with random jitter) is cut:
+#   - the direction depends on the aspect distribution: "square" always
+#     cuts the longer side (squarish blocks), "mixed" picks it at random
+#     weighted by the side lengths, "flat" prefers horizontal cuts (wide,
+#     low blocks, like standard cells); pieces beyond --max-aspect are
+#     always cut across their longer side
+#   - with probability duplicate_rate the cut is in the middle, so the two
+#     halves are identical blocks; otherwise the position is uniform
+
+ASPECTS = ["square", "mixed", "flat"]
+
+def cut_direction(width, height, aspect, max_aspect, rng):
+    # True: vertical cut (splits the width), False: horizontal cut
+    if width < 2:
+        return False
+    if height < 2:
+        return True
+    if max(width, height) > max_aspect * min(width, height) or aspect == "square":
+        return width >= height
+    if aspect == "mixed":
+        return rng.random() < width / (width + height)
+    return rng.random() < 0.2
+
+# ------------------ END FUNCTION --------------------
+
+def generate(n_blocks, width, height, aspect="mixed", duplicate_rate=0.0,
+             max_aspect=8.0, seed=0):
+    # list of (w, h) blocks tiling width x height, in random order
+    if n_blocks > width * height:
+        raise ValueError("{} blocks do not fit in {}x{} unit squares".format(
+            n_blocks, width, height))
+    rng = np.random.default_rng(seed)
+
+    # heap of pieces by decreasing jittered area (unit squares cannot be cut)
+    pieces = [(-width * height, width, height)]
+    units = []
+    while len(pieces) + len(units) < n_blocks:
+        _, w, h = heapq.heappop(pieces)
+        if w * h == 1:
+            units.append((w, h))
+            continue
+        vertical = cut_direction(w, h, aspect, max_aspect, rng)
+        side = w if vertical else h
+        if rng.random() < duplicate_rate and side % 2 == 0:
+            cut = side // 2
+        else:
+            cut = int(rng.integers(1, side))
+        if vertical:
+            halves = [(cut, h), (w - cut, h)]
+        else:
+            halves = [(w, cut), (w, h - cut)]
+        for piece_w, piece_h in halves:
+            jitter = rng.uniform(0.5, 1.5)
+            heapq.heappush(pieces, (-piece_w * piece_h * jitter, piece_w, piece_h))
+
+    blocks = [(w, h) for _, w, h in pieces] + units
+    order = rng.permutation(len(blocks))
+    return [blocks[b] for b in order]
+
+# ------------------ END FUNCTION --------------------
+
+def instance_text(width, blocks):
+    return "{}\n{}\n".format(width, len(blocks)) + \
+           "".join("{} {}\n".format(w, h) for w, h in blocks)
+
+# ------------------ END FUNCTION --------------------
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="guillotine-cut instance generator")
+    parser.add_argument("--n-blocks", nargs="+", type=int, default=[100],
+                        help="block counts of the sweep")
+    parser.add_argument("--width", type=int, default=100)
+    parser.add_argument("--height", type=int, default=None,
+                        help="optimal height (default: the width)")
+    parser.add_argument("--aspect", default="mixed", choices=ASPECTS)
+    parser.add_argument("--max-aspect", type=float, default=8.0,
+                        help="longest/shortest side above which a block is always cut")
+    parser.add_argument("--duplicate-rate", type=float, default=0.0,
+                        help="probability of a cut in the middle (identical blocks)")
+    parser.add_argument("--count", type=int, default=1,
+                        help="instances per block count")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out-dir", default="generated",
+                        help="directory of the ins-N.txt files and of optimum.csv")
+    parser.add_argument("--stdout", action="store_true",
+                        help="write the instances back to back on stdout "
+                             "(e.g. | python run_model.py -)")
+    args = parser.parse_args()
+    height = args.height or args.width
+
+    if not args.stdout:
+        os.makedirs(args.out_dir, exist_ok=True)
+    rows = []
+    number = 0
+    for n_blocks in args.n_blocks:
+        for k in range(args.count):
+            number += 1
+            seed = args.seed + number
+            blocks = generate(n_blocks, args.width, height, args.aspect,
+                              args.duplicate_rate, args.max_aspect, seed)
+            text = instance_text(args.width, blocks)
+            if args.stdout:
+                sys.stdout.write(text)
+                continue
+            with open(os.path.join(args.out_dir, "ins-{}.txt".format(number)), "w") as file:
+                file.write(text)
+            rows.append({"instance": "ins-{}".format(number),
+                         "n_blocks": n_blocks,
+                         "width": args.width,
+                         "optimal_height": height,
+                         "aspect": args.aspect,
+                         "duplicate_rate": args.duplicate_rate,
+                         "seed": seed})
+
+    # known optimum of every instance
+    if not args.stdout:
+        with open(os.path.join(args.out_dir, "optimum.csv"), "w", newline="") as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
+        print("{} instances written to {}".format(len(rows), args.out_dir))
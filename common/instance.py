@@ -0,0 +1,185 @@
+import glob, hashlib, math, os, pickle, re, sys
+import numpy as np
+from skyline import best_packing
+
+# Instance model shared by CP (txt_to_dzn), SAT, SMT and MIP. The ins-N.txt
+# file is parsed once into NumPy arrays, and the data every encoder needs is
+# computed once as well: height bounds, the skyline layout giving the upper
+# bound, groups of identical blocks and the pairs too wide to sit side by
+# side. Instances are cached in a binary file keyed by the hash of the txt
+# contents, so a whole instance set is loaded with a single read.
+# stream_instances reads any number of instances (directories, globs, files,
+# stdin) lazily and without the cache, in constant memory.
+
+CACHE_VERSION = 2
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "instance_cache.pkl")
+
+class Instance:
+
+    __slots__ = ["name", "digest", "max_width", "n_blocks", "widths", "heights",
+                 "area", "area_bound", "max_block_height", "lower_bound",
+                 "upper_bound", "skyline_x", "skyline_y",
+                 "identical_groups", "no_side_by_side"]
+
+    def __init__(self, name, max_width, widths, heights):
+        self.name = name
+        self.digest = None
+        self.max_width = int(max_width)
+        self.widths = np.asarray(widths, dtype=np.int64)
+        self.heights = np.asarray(heights, dtype=np.int64)
+        self.n_blocks = len(self.widths)
+
+        # height bounds: the area and the tallest block bound it from below,
+        # the skyline layout from above
+        self.area = int((self.widths * self.heights).sum())
+        self.area_bound = int(math.ceil(self.area / self.max_width))
+        self.max_block_height = int(self.heights.max())
+        self.lower_bound = max(self.area_bound, self.max_block_height)
+        layout = best_packing(self.max_width, self.widths, self.heights)
+        self.upper_bound = max(self.lower_bound, int(layout["height"]))
+        self.skyline_x = np.asarray(layout["corner_x"], dtype=np.int64)
+        self.skyline_y = np.asarray(layout["corner_y"], dtype=np.int64)
+
+        # blocks with the same dimensions (only groups of two or more)
+        dimensions = np.stack([self.widths, self.heights], axis=1)
+        _, group_of = np.unique(dimensions, axis=0, return_inverse=True)
+        group_of = group_of.ravel()
+        self.identical_groups = [np.flatnonzero(group_of == g)
+                                 for g in range(group_of.max() + 1)
+                                 if np.count_nonzero(group_of == g) > 1]
+
+        # pairs i < j that cannot be placed side by side
+        i, j = np.triu_indices(self.n_blocks, k=1)
+        too_wide = self.widths[i] + self.widths[j] > self.max_width
+        self.no_side_by_side = np.stack([i[too_wide], j[too_wide]], axis=1)
+
+    @classmethod
+    def from_text(cls, text, name=""):
+        # "max_width\nn_blocks\nw h\n..." -> Instance
+        values = np.array(text.split(), dtype=np.int64)
+        n_blocks = int(values[1])
+        dimensions = values[2:2 + 2 * n_blocks].reshape(n_blocks, 2)
+        return cls(name, values[0], dimensions[:, 0], dimensions[:, 1])
+
+    def skyline_layout(self):
+        # the layout of the upper bound, as returned by best_packing
+        return {"height": self.upper_bound,
+                "corner_x": self.skyline_x.tolist(),
+                "corner_y": self.skyline_y.tolist()}
+
+    def to_dzn(self):
+        return ('max_width = {};\n'.format(self.max_width) +
+                'n_blocks = {};\n'.format(self.n_blocks) +
+                'width = {};\n'.format(self.widths.tolist()) +
+                'height = {};\n'.format(self.heights.tolist()))
+
+    def __repr__(self):
+        return "Instance({}, max_width={}, n_blocks={})".format(
+            self.name, self.max_width, self.n_blocks)
+
+# ------------------ END CLASS --------------------
+
+def parse_instance(text, name=""):
+    # Instance of the contents of a txt file, with their hash (not cached)
+    instance = Instance.from_text(text, name)
+    instance.digest = hashlib.sha1(text.encode()).hexdigest()
+    return instance
+
+# ------------------ END FUNCTION --------------------
+
+# cache of the current process, read from CACHE_PATH at the first load
+_cache = None
+
+def read_cache(cache_path):
+    # cache_path None: no cache, a fresh dictionary that is never written
+    global _cache
+    if cache_path is None:
+        return {}
+    if _cache is None:
+        try:
+            with open(cache_path, "rb") as file:
+                _cache = pickle.load(file)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            _cache = {}
+    return _cache
+
+# ------------------ END FUNCTION --------------------
+
+def write_cache(cache_path):
+    # written to a temporary file and renamed: processes running in parallel
+    # (batch.py, portfolio.py) never see a half-written cache
+    if cache_path is None:
+        return
+    temp_path = "{}.{}".format(cache_path, os.getpid())
+    with open(temp_path, "wb") as file:
+        pickle.dump(_cache, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, cache_path)
+
+# ------------------ END FUNCTION --------------------
+
+def load_instances(filenames, cache_path=CACHE_PATH):
+    # Instance objects of the txt files, in order. Files already seen (same
+    # contents) come from the cache, the others are parsed and added to it
+    cache = read_cache(cache_path)
+    instances, changed = [], False
+    for filename in filenames:
+        with open(filename, "rb") as file:
+            text = file.read()
+        key = (CACHE_VERSION, hashlib.sha1(text).hexdigest())
+        if key not in cache:
+            cache[key] = parse_instance(text.decode())
+            changed = True
+        instance = cache[key]
+        instance.name = os.path.splitext(os.path.basename(filename))[0]
+        instances.append(instance)
+    if changed:
+        write_cache(cache_path)
+    return instances
+
+# ------------------ END FUNCTION --------------------
+
+def load_instance(filename, cache_path=CACHE_PATH):
+    return load_instances([filename], cache_path)[0]
+
+# ------------------ END FUNCTION --------------------
+
+def natural_key(path):
+    # "ins-2.txt" before "ins-10.txt"
+    return [int(part) if part.isdigit() else part
+            for part in re.split(r"(\d+)", os.path.basename(path))]
+
+# ------------------ END FUNCTION --------------------
+
+def split_stream(lines):
+    # instance texts written back to back (max_width, n_blocks, one line
+    # per block, blank lines ignored), read one instance at a time
+    lines = (line for line in lines if line.strip())
+    for first_line in lines:
+        n_blocks_line = next(lines)
+        block_lines = [next(lines) for _ in range(int(n_blocks_line))]
+        yield "".join([first_line, n_blocks_line] + block_lines)
+
+# ------------------ END FUNCTION --------------------
+
+def stream_instances(sources):
+    # Instance objects, one at a time, from a list of sources: a directory
+    # (its ins-*.txt files), a glob pattern, a txt file, or "-" for the
+    # instances written back to back on stdin (named stdin-1, stdin-2, ...)
+    for source in sources:
+        if source == "-":
+            for n, text in enumerate(split_stream(sys.stdin), start=1):
+                yield parse_instance(text, "stdin-{}".format(n))
+            continue
+        if os.path.isdir(source):
+            filenames = glob.glob(os.path.join(source, "ins-*.txt"))
+        elif os.path.isfile(source):
+            filenames = [source]
+        else:
+            filenames = glob.glob(source)
+        for filename in sorted(filenames, key=natural_key):
+            with open(filename) as file:
+                text = file.read()
+            yield parse_instance(text, os.path.splitext(os.path.basename(filename))[0])
+
+# ------------------ END FUNCTION --------------------
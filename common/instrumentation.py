@@ -0,0 +1,117 @@
+import re, resource, time
+from contextlib import contextmanager
+from datetime import timedelta
+
+# Solver statistics and Python-side counters, collected after every solve and
+# recorded with the run in the results database (results.py). Every function
+# returns a flat dictionary of numbers (or strings), so that the statistics
+# of a run are a JSON object:
+#   {"solver":   native statistics (z3, pysat, PuLP log, MiniZinc),
+#    "families": {family: {"count": constraints emitted, "time": seconds}},
+#    "memory":   peak memory of this process and of its children (MB)}
+# The family counters take stats=None to do nothing, so the encoders can use
+# them unconditionally.
+
+# ------------------ constraint families ------------------
+
+def add_family(stats, name, count, seconds):
+    entry = stats.setdefault(name, {"count": 0, "time": 0.0})
+    entry["count"] += int(count)
+    entry["time"] += seconds
+
+# ------------------ END FUNCTION --------------------
+
+@contextmanager
+def family(stats, name, count):
+    # constraints emitted (count() after - count() before) and time spent
+    # inside the block, e.g. with family(stats, "non_overlap", n_assertions)
+    if stats is None:
+        yield
+        return
+    start_count, start_time = count(), time.perf_counter()
+    yield
+    add_family(stats, name, count() - start_count, time.perf_counter() - start_time)
+
+# ------------------ END FUNCTION --------------------
+
+def counted(families, stats):
+    # wraps a generator of (family, clauses): counts the clauses of every
+    # family and the time spent generating them (not the time of the caller)
+    if stats is None:
+        yield from families
+        return
+    start_time = time.perf_counter()
+    for name, clauses in families:
+        add_family(stats, name, len(clauses), time.perf_counter() - start_time)
+        yield name, clauses
+        start_time = time.perf_counter()
+
+# ------------------ END FUNCTION --------------------
+
+# ------------------ native statistics ------------------
+
+def z3_statistics(solver):
+    # conflicts, decisions, restarts, memory, ... of a z3 Solver
+    statistics = solver.statistics()
+    return {key: statistics.get_key_value(key) for key in statistics.keys()}
+
+# ------------------ END FUNCTION --------------------
+
+def minizinc_statistics(result):
+    # Result.statistics of minizinc-python (failures, propagations, nodes,
+    # flatTime, ...), durations in seconds
+    return {key: value.total_seconds() if isinstance(value, timedelta) else value
+            for key, value in result.statistics.items()}
+
+# ------------------ END FUNCTION --------------------
+
+LOG_PATTERNS = {
+    "cbc": {"nodes": r"Enumerated nodes:\s+(\d+)",
+            "iterations": r"Total iterations:\s+(\d+)",
+            "objective": r"Objective value:\s+([-\d.e+]+)",
+            "best_bound": r"Lower bound:\s+([-\d.e+]+)",
+            "gap": r"Gap:\s+([-\d.e+]+)",
+            "cpu_time": r"Time \(CPU seconds\):\s+([\d.]+)"},
+    "cplex": {"nodes": r"Nodes = (\d+)",
+              "iterations": r"Iterations = (\d+)",
+              "objective": r"Objective =\s+([-\d.e+]+)",
+              "best_bound": r"best bound = ([-\d.e+]+)",
+              "gap": r"gap = [-\d.e+]+, ([\d.]+)%",
+              "cpu_time": r"Solution time =\s+([\d.]+)"}}
+
+def pulp_log_statistics(solver_name, log_path):
+    # nodes, iterations, objective, bound and gap read from the solver log
+    # written by PuLP (logPath); MOSEK through PuLP writes no log
+    if solver_name not in LOG_PATTERNS or log_path is None:
+        return {}
+    try:
+        with open(log_path) as log_file:
+            log = log_file.read()
+    except FileNotFoundError:
+        return {}
+    statistics = {}
+    for key, pattern in LOG_PATTERNS[solver_name].items():
+        matches = re.findall(pattern, log)
+        if matches:
+            statistics[key] = float(matches[-1])
+    return statistics
+
+# ------------------ END FUNCTION --------------------
+
+def memory():
+    # peak resident memory (MB) of this process and of its finished children
+    # (CBC, CPLEX, MiniZinc run as child processes)
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return {"max_rss_mb": round(own / 1024, 1),
+            "children_max_rss_mb": round(children / 1024, 1)}
+
+# ------------------ END FUNCTION --------------------
+
+def collect(solver=None, families=None):
+    # the statistics of a run, as recorded in the results database
+    return {"solver": solver or {},
+            "families": families or {},
+            "memory": memory()}
+
+# ------------------ END FUNCTION --------------------
@@ -0,0 +1,260 @@
+import argparse, os, sys, time
+from datetime import timedelta
+import numpy as np
+from batch import ROOT
+from instance import load_instances
+from results import DB_PATH, default_run, record_run
+
+# Large neighbourhood search for the instances out of reach of the exact
+# models. Starting from an incumbent layout (the skyline one), every step
+# frees a neighbourhood of blocks, keeps all the other ones fixed and places
+# the free blocks again with a small exact model (MIP: build_pulp_window_model,
+# CP: LNS.mzn) under a short time limit:
+#   band     the blocks lying above a level (a top band of the layout),
+#            placed again in the whole width above the level
+#   cluster  a random block and its nearest ones, placed again in their
+#            bounding box extended up to the current height
+# The fixed blocks crossing the window become obstacles of the sub-model and
+# the height can not go below the top of the fixed blocks. A new layout is
+# kept when it is not higher; the number of free blocks grows when the
+# sub-models are solved to optimality and shrinks when they time out.
+# The search stops at the time budget or at the lower bound.
+
+for approach in ["MIP", "CP"]:
+    sys.path.append(os.path.join(ROOT, approach, "src"))
+
+ENGINES = ["mip", "cp"]
+NEIGHBOURHOODS = ["band", "cluster"]
+
+def valid_layout(max_width, widths, heights, corner_x, corner_y):
+    # every block inside the strip and no pair overlapping
+    corner_x, corner_y = np.asarray(corner_x), np.asarray(corner_y)
+    if (corner_x < 0).any() or (corner_y < 0).any() or \
+       (corner_x + widths > max_width).any():
+        return False
+    overlap_x = (corner_x[:, None] < corner_x[None, :] + widths[None, :]) & \
+                (corner_x[None, :] < corner_x[:, None] + widths[:, None])
+    overlap_y = (corner_y[:, None] < corner_y[None, :] + heights[None, :]) & \
+                (corner_y[None, :] < corner_y[:, None] + heights[:, None])
+    overlap = overlap_x & overlap_y
+    np.fill_diagonal(overlap, False)
+    return not overlap.any()
+
+# ------------------ END FUNCTION --------------------
+
+def neighbourhood(kind, instance, corner_x, corner_y, n_free, rng):
+    # free blocks and window (x0, y0, x1, y1) of a move
+    widths, heights = instance.widths, instance.heights
+    tops = corner_y + heights
+    height = int(tops.max())
+    if kind == "band":
+        # random size, so that consecutive bands do not always coincide
+        size = int(rng.integers(max(2, n_free // 2), n_free + 1))
+        level = np.sort(corner_y)[::-1][size - 1]
+        free = np.flatnonzero(corner_y >= level)
+        window = (0, int(level), instance.max_width, height)
+    else:
+        seed = int(rng.integers(instance.n_blocks))
+        center_x, center_y = corner_x + widths / 2, corner_y + heights / 2
+        distance = np.abs(center_x - center_x[seed]) + np.abs(center_y - center_y[seed])
+        free = np.argsort(distance, kind="stable")[:n_free]
+        window = (int(corner_x[free].min()), int(corner_y[free].min()),
+                  int((corner_x[free] + widths[free]).max()), height)
+    return np.sort(free), window
+
+# ------------------ END FUNCTION --------------------
+
+def obstacles(instance, corner_x, corner_y, free, window):
+    # fixed blocks crossing the window, as (x, y, w, h)
+    x0, y0, x1, y1 = window
+    fixed = np.ones(instance.n_blocks, dtype=bool)
+    fixed[free] = False
+    widths, heights = instance.widths, instance.heights
+    crossing = fixed & (corner_x < x1) & (corner_x + widths > x0) & \
+               (corner_y < y1) & (corner_y + heights > y0)
+    return [(int(corner_x[b]), int(corner_y[b]), int(widths[b]), int(heights[b]))
+            for b in np.flatnonzero(crossing)]
+
+# ------------------ END FUNCTION --------------------
+
+def reoptimize_mip(widths, heights, window, fixed, min_height, layout,
+                   step_time, seed):
+    # returns (x, y, optimal), None when no layout was found in time
+    import pulp
+    from MIP import build_pulp_window_model, make_solver
+    model, x_coord, y_coord = build_pulp_window_model(widths, heights, window,
+                                                      fixed, min_height, layout)
+    model.solve(make_solver("cbc", warm_start=True, seed=seed,
+                            time_limit=step_time))
+    if model.sol_status not in (pulp.LpSolutionOptimal,
+                                pulp.LpSolutionIntegerFeasible):
+        return None
+    return ([round(x.varValue) for x in x_coord],
+            [round(y.varValue) for y in y_coord],
+            model.sol_status == pulp.LpSolutionOptimal)
+
+# ------------------ END FUNCTION --------------------
+
+def reoptimize_cp(cp_instance, widths, heights, window, fixed, min_height,
+                  step_time, seed):
+    # same as reoptimize_mip with LNS.mzn; cp_instance holds model and
+    # solver, every move works on a branch of it
+    import minizinc
+    x0, y0, x1, y1 = window
+    with cp_instance.branch() as instance:
+        instance["n_blocks"] = len(widths)
+        instance["width"] = widths
+        instance["height"] = heights
+        instance["x0"], instance["y0"], instance["x1"], instance["y1"] = x0, y0, x1, y1
+        instance["min_height"] = min_height
+        instance["n_obstacles"] = len(fixed)
+        instance["obstacle_x"] = [o[0] for o in fixed]
+        instance["obstacle_y"] = [o[1] for o in fixed]
+        instance["obstacle_w"] = [o[2] for o in fixed]
+        instance["obstacle_h"] = [o[3] for o in fixed]
+        res = instance.solve(time_limit=timedelta(seconds=step_time), random_seed=seed)
+    if res.solution is None:
+        return None
+    return (list(res["cornerx"]), list(res["cornery"]),
+            res.status is minizinc.Status.OPTIMAL_SOLUTION)
+
+# ------------------ END FUNCTION --------------------
+
+def lns(instance, engine="mip", neighbourhoods=NEIGHBOURHOODS, budget=60,
+        step_time=5, n_free=8, max_free=40, seed=0, cp_solver="gecode",
+        layout=None):
+    # returns the best layout {"height", "corner_x", "corner_y"} and the
+    # statistics of the moves; layout: incumbent (default: the skyline one)
+    rng = np.random.default_rng(seed)
+    start_time = time.time()
+    layout = layout or instance.skyline_layout()
+    corner_x = np.array(layout["corner_x"], dtype=np.int64)
+    corner_y = np.array(layout["corner_y"], dtype=np.int64)
+    height = int((corner_y + instance.heights).max())
+    start_height = height
+    widths, heights = instance.widths, instance.heights
+    n_free = min(n_free, instance.n_blocks)
+    max_free = min(max_free, instance.n_blocks)
+
+    cp_instance = None
+    if engine == "cp":
+        import minizinc
+        cp_instance = minizinc.Instance(
+            minizinc.Solver.lookup(cp_solver),
+            minizinc.Model(os.path.join(ROOT, "CP", "src", "LNS.mzn")))
+
+    moves = {kind: {"tried": 0, "improved": 0} for kind in neighbourhoods}
+    step = 0
+    while height > instance.lower_bound and instance.n_blocks > 1:
+        time_left = budget - (time.time() - start_time)
+        if time_left < 1:
+            break
+        kind = neighbourhoods[step % len(neighbourhoods)]
+        step += 1
+        free, window = neighbourhood(kind, instance, corner_x, corner_y, n_free, rng)
+        fixed = obstacles(instance, corner_x, corner_y, free, window)
+        tops = corner_y + heights
+        tops[free] = 0
+        min_height = max(int(tops.max()), instance.max_block_height)
+
+        free_widths, free_heights = widths[free].tolist(), heights[free].tolist()
+        limit = max(1, int(min(step_time, time_left)))
+        if engine == "mip":
+            res = reoptimize_mip(free_widths, free_heights, window, fixed, min_height,
+                                 (corner_x[free].tolist(), corner_y[free].tolist()),
+                                 limit, seed + step)
+        else:
+            res = reoptimize_cp(cp_instance, free_widths, free_heights, window, fixed,
+                                min_height, limit, seed + step)
+        moves[kind]["tried"] += 1
+
+        # adaptive size: larger when the sub-model is easy, smaller when not
+        if res is None or not res[2]:
+            n_free = max(2, int(n_free * 0.8))
+        else:
+            n_free = min(max_free, n_free + 1 + n_free // 5)
+        if res is None:
+            continue
+
+        new_x, new_y = corner_x.copy(), corner_y.copy()
+        new_x[free], new_y[free] = res[0], res[1]
+        new_height = int((new_y + heights).max())
+        if new_height <= height:
+            if new_height < height:
+                moves[kind]["improved"] += 1
+            corner_x, corner_y, height = new_x, new_y, new_height
+
+    return ({"height": height,
+             "corner_x": corner_x.tolist(),
+             "corner_y": corner_y.tolist()},
+            {"start_height": start_height,
+             "steps": step,
+             "final_free": n_free,
+             "moves": moves})
+
+# ------------------ END FUNCTION --------------------
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="large neighbourhood search")
+    parser.add_argument("--engine", default="mip", choices=ENGINES,
+                        help="sub-model: mip (CBC) or cp (LNS.mzn)")
+    parser.add_argument("--neighbourhoods", nargs="+", default=NEIGHBOURHOODS,
+                        choices=NEIGHBOURHOODS, help="moves, used in turn")
+    parser.add_argument("--budget", type=float, default=60,
+                        help="seconds per instance")
+    parser.add_argument("--step-time", type=float, default=5,
+                        help="time limit of a sub-model (seconds)")
+    parser.add_argument("--free", type=int, default=8,
+                        help="initial number of free blocks")
+    parser.add_argument("--max-free", type=int, default=40,
+                        help="maximum number of free blocks")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cp-solver", default="gecode")
+    parser.add_argument("--instance-dir", default=os.path.join(ROOT, "CP", "src", "instances"),
+                        help="directory of the ins-N.txt files (e.g. generated ones)")
+    parser.add_argument("--instances", nargs="+", type=int,
+                        help="instance numbers to run (default: all)")
+    parser.add_argument("--out-dir", default=os.path.join(ROOT, "common", "out", "lns"))
+    parser.add_argument("--results-db", default=DB_PATH,
+                        help='results database ("" to disable)')
+    parser.add_argument("--run", default=default_run(),
+                        help="label of this run in the results database")
+    args = parser.parse_args()
+
+    n_files = len([f for f in os.listdir(args.instance_dir)
+                   if f.startswith("ins-") and f.endswith(".txt")])
+    numbers = args.instances or range(1, n_files + 1)
+    instances = load_instances([os.path.join(args.instance_dir, "ins-{}.txt".format(i))
+                                for i in numbers])
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    print("INSTANCE   --   SKYLINE   --   LNS   --   LOWER BOUND   --   TIME")
+    for i, instance in zip(numbers, instances):
+        start_time = time.time()
+        layout, statistics = lns(instance, args.engine, args.neighbourhoods,
+                                 args.budget, args.step_time, args.free,
+                                 args.max_free, args.seed, args.cp_solver)
+        time_spent = time.time() - start_time
+        print("ins-{}\t{}\t{}\t{}\t{:.2f}".format(i, statistics["start_height"],
+                                                layout["height"], instance.lower_bound,
+                                                time_spent))
+
+        if not valid_layout(instance.max_width, instance.widths, instance.heights,
+                            layout["corner_x"], layout["corner_y"]):
+            raise RuntimeError("ins-{}: invalid layout".format(i))
+
+        record_run(args.results_db, args.run, instance, "LNS",
+                   args.engine + "/" + "+".join(args.neighbourhoods),
+                   "cbc" if args.engine == "mip" else args.cp_solver,
+                   layout["height"],
+                   "OPTIMAL" if layout["height"] == instance.lower_bound else "SAT",
+                   time_spent, statistics=statistics)
+
+        with open(os.path.join(args.out_dir, "out-{}.txt".format(i)), "w") as output_file:
+            output_file.write(str(instance.max_width) + ' ' + str(layout["height"]) + '\n')
+            output_file.write(str(instance.n_blocks) + '\n')
+            for b in range(instance.n_blocks):
+                output_file.write("{} {} {} {}\n".format(
+                    instance.widths[b], instance.heights[b],
+                    layout["corner_x"][b], layout["corner_y"][b]))
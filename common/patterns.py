@@ -0,0 +1,83 @@
+import numpy as np
+
+# Normal patterns (Herz; Christofides and Whitlock): any layout can be pushed
+# left and down until every block touches another block or the border, and
+# then the coordinate of a block is the sum of the sizes of some other
+# blocks. So the x of block i can be restricted to the subset sums of the
+# other widths that leave room for block i (x <= max_width - width_i), and
+# the same holds for y with the heights, without losing any height.
+# Subset sums are computed on a bitset (a Python integer, bit k set when k
+# is reachable): adding a block of size s is reach |= reach << s. Blocks of
+# the same size share their patterns, so the sums are computed once for
+# every distinct size.
+
+def subset_sums(sizes, limit):
+    # bitset of the sums of subsets of sizes that are <= limit
+    limit = int(limit)
+    reach, mask = 1, (1 << (limit + 1)) - 1
+    for size in sizes:
+        reach = (reach | (reach << int(size))) & mask
+    return reach
+
+# ------------------ END FUNCTION --------------------
+
+def normal_patterns(sizes, limit):
+    # boolean matrix (n_blocks x limit): [i, k] is True when block i can be
+    # placed at k, i.e. k is a sum of the other sizes and k + sizes[i] <= limit
+    sizes = np.asarray(sizes, dtype=np.int64)
+    allowed = np.zeros((len(sizes), limit), dtype=bool)
+    for size in np.unique(sizes).tolist():
+        if size > limit:
+            continue
+        # the others: every block but one of this size
+        others = np.concatenate((sizes[sizes != size],
+                                 sizes[sizes == size][1:]))
+        reach = subset_sums(others, limit - size)
+        bits = np.frombuffer(reach.to_bytes((limit - size) // 8 + 1, "little"),
+                             dtype=np.uint8)
+        row = np.unpackbits(bits, bitorder="little")[:limit - size + 1].astype(bool)
+        allowed[sizes == size, :limit - size + 1] = row
+    return allowed
+
+# ------------------ END FUNCTION --------------------
+
+def positions(allowed):
+    # the allowed positions of every block, as sorted lists
+    return [np.flatnonzero(row).tolist() for row in allowed]
+
+# ------------------ END FUNCTION --------------------
+
+def position_domains(instance, positions="normal"):
+    # x and y domains (lists of sets) of every block for CP/src/GECODE.mzn:
+    # with positions="normal" the normal patterns keeping the block within
+    # max_width and within the height of the skyline layout
+    # (instance.upper_bound), with "all" every such position. A block whose
+    # x domain is a single position (no other block fits beside it) is
+    # fixed there
+    max_width, upper_bound = instance.max_width, instance.upper_bound
+    widths = instance.widths.tolist()
+    heights = instance.heights.tolist()
+    if positions == "all":
+        x_domain = [set(range(max_width - width + 1)) for width in widths]
+        y_domain = [set(range(upper_bound - height + 1)) for height in heights]
+        return x_domain, y_domain
+    x_domain = [set(row.nonzero()[0].tolist())
+                for row in normal_patterns(widths, max_width)]
+    y_domain = [set(row.nonzero()[0].tolist())
+                for row in normal_patterns(heights, upper_bound)]
+    return x_domain, y_domain
+
+# ------------------ END FUNCTION --------------------
+
+def domains_dzn(instance, positions="normal"):
+    # the position domains and the upper bound in dzn syntax, appended to
+    # the data of CP/src/txt_to_dzn.py
+    x_domain, y_domain = position_domains(instance, positions)
+    to_dzn = lambda domains: "[" + ", ".join(
+        "{" + ", ".join(str(p) for p in sorted(domain)) + "}"
+        for domain in domains) + "]"
+    return ('x_domain = {};\n'.format(to_dzn(x_domain)) +
+            'y_domain = {};\n'.format(to_dzn(y_domain)) +
+            'upper_bound = {};\n'.format(instance.upper_bound))
+
+# ------------------ END FUNCTION --------------------
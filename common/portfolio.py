@@ -0,0 +1,157 @@
+import argparse, os, shlex, shutil, signal, subprocess, sys, tempfile, time
+from batch import ROOT, APPROACHES, parse_instances
+from bound import read_bounds, update_bounds
+from instance import load_instance
+from results import default_run
+
+# Portfolio racing: the approaches are started together on the same instance,
+# each writing into its own directory and sharing the height bounds through a
+# bound file (see bound.py), so a layout found by one approach cuts the search
+# of the others and a height proven too low is skipped by everybody. As soon
+# as a finished approach reaches the shared lower bound (proven optimum) the
+# others are cancelled; the best layout becomes out-N.txt.
+
+POLL_INTERVAL = 0.2
+
+def instance_path(instance_dir, instance):
+    return os.path.join(instance_dir, "ins-{}.txt".format(instance))
+
+# ------------------ END FUNCTION --------------------
+
+def lower_bound(instance, instance_dir):
+    # max(tallest block, ceil(total area / width)) of the file the jobs receive
+    return load_instance(instance_path(instance_dir, instance)).lower_bound
+
+# ------------------ END FUNCTION --------------------
+
+def instance_args(approach, instance, instance_dir):
+    # CP reads the txt file given as input, the others take the number and
+    # the directory
+    if approach == "CP":
+        return [instance_path(instance_dir, instance)]
+    return ["--instances", str(instance), "--instance-dir", instance_dir]
+
+# ------------------ END FUNCTION --------------------
+
+def read_height(path):
+    # height of a written layout, None for TIMEOUT / UNSAT / missing file
+    if not os.path.isfile(path):
+        return None
+    with open(path) as file:
+        first_line = file.readline().split()
+    return int(first_line[1]) if len(first_line) == 2 else None
+
+# ------------------ END FUNCTION --------------------
+
+def cancel(process, grace=2.0):
+    # SIGTERM to the whole process group (solvers included), SIGKILL if it
+    # is still alive after the grace period
+    if process.poll() is not None:
+        return
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=grace)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+    except ProcessLookupError:
+        pass
+
+# ------------------ END FUNCTION --------------------
+
+def race(instance, approaches, timeout, out_dir, instance_dir, extra_args=None):
+    extra_args = extra_args or {}
+    work_dir = tempfile.mkdtemp(prefix="portfolio-{}-".format(instance))
+    bound_file = os.path.join(work_dir, "bounds.json")
+    update_bounds(bound_file, lower=lower_bound(instance, instance_dir))
+
+    # one process per approach, each in its own output directory
+    start_time = time.time()
+    processes = {}
+    for approach in approaches:
+        approach_dir = os.path.join(work_dir, approach)
+        os.makedirs(approach_dir)
+        command = [sys.executable, APPROACHES[approach]] + \
+                  instance_args(approach, instance, instance_dir) + \
+                  ["--out-dir", approach_dir,
+                   "--bound-file", bound_file] + list(extra_args.get(approach, []))
+        processes[approach] = subprocess.Popen(command,
+                                               cwd=os.path.join(ROOT, approach, "src"),
+                                               stdout=subprocess.DEVNULL,
+                                               stderr=subprocess.DEVNULL,
+                                               start_new_session=True)
+
+    def layout_path(approach):
+        return os.path.join(work_dir, approach, "out-{}.txt".format(instance))
+
+    # polling: a finished approach whose height meets the shared lower bound
+    # closes the race, otherwise it goes on until all are done or the timeout
+    winner, best_height, optimal = None, None, False
+    while True:
+        for approach, process in processes.items():
+            if process.poll() is None:
+                continue
+            height = read_height(layout_path(approach))
+            if height is not None and (best_height is None or height < best_height):
+                winner, best_height = approach, height
+        lower = read_bounds(bound_file)["lower"]
+        optimal = best_height is not None and best_height <= lower
+        running = [p for p in processes.values() if p.poll() is None]
+        if optimal or not running or time.time() - start_time > timeout:
+            break
+        time.sleep(POLL_INTERVAL)
+
+    for process in processes.values():
+        cancel(process)
+    wall_time = time.time() - start_time
+
+    # the winner's layout becomes out-N.txt
+    output_path = os.path.join(out_dir, "out-{}.txt".format(instance))
+    if winner is not None:
+        shutil.copyfile(layout_path(winner), output_path)
+    else:
+        with open(output_path, "w") as output_file:
+            output_file.write("TIMEOUT")
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {"instance": instance,
+            "winner": winner,
+            "height": best_height,
+            "optimal": optimal,
+            "wall_time": round(wall_time, 3)}
+
+# ------------------ END FUNCTION --------------------
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="portfolio racing of the approaches")
+    parser.add_argument("--approaches", nargs="+", default=list(APPROACHES),
+                        choices=list(APPROACHES))
+    parser.add_argument("--instances", default="1-40",
+                        help="e.g. 1-40 or 1,5,10-12")
+    parser.add_argument("--timeout", type=float, default=300,
+                        help="wall-clock limit of the race on one instance (seconds)")
+    parser.add_argument("--instance-dir", default=os.path.join(ROOT, "CP", "src", "instances"),
+                        help="directory of the ins-N.txt files given to every approach")
+    parser.add_argument("--out-dir", default=os.path.join(ROOT, "common", "out"),
+                        help="directory of the winning out-N.txt files")
+    parser.add_argument("--run", default=default_run(),
+                        help="run label shared by the jobs in the results database")
+    parser.add_argument("--args", nargs="*", default=[], metavar="APPROACH=ARGS",
+                        help='extra script options, e.g. SAT="--backend pysat"')
+    args = parser.parse_args()
+
+    extra_args = {approach: ["--run", args.run] for approach in APPROACHES}
+    for item in args.args:
+        approach, options = item.split("=", 1)
+        extra_args[approach] += shlex.split(options)
+    instance_dir = os.path.abspath(args.instance_dir)
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    print("INSTANCE   --   WINNER   --   HEIGHT   --   OPTIMAL   --   TIME")
+    for instance in parse_instances(args.instances):
+        result = race(instance, args.approaches, args.timeout, args.out_dir,
+                      instance_dir, extra_args)
+        print("ins-{}\t{}\t{}\t{}\t{:.2f}".format(
+            result["instance"], result["winner"], result["height"],
+            result["optimal"], result["wall_time"]), flush=True)
@@ -0,0 +1,242 @@
+import argparse, json, os, sqlite3, time
+
+# Results database: every run of an approach on an instance appends one
+# record to an SQLite file, so the history of heights and times survives the
+# out-N.txt files being overwritten. Records of the same invocation (or of
+# the same batch.py run) share a run label, and two runs can be compared
+# instance by instance to spot speedups and regressions.
+#
+# status is one of OPTIMAL, SAT (layout not proven optimal), UNSAT, TIMEOUT.
+# statistics is the JSON of the solver statistics and of the Python-side
+# counters of the run (see instrumentation.py).
+# With db_path None (or "") record_run is a no-op.
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results.db")
+
+STATUSES = ["OPTIMAL", "SAT", "UNSAT", "TIMEOUT"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp     REAL NOT NULL,
+    run           TEXT NOT NULL,
+    instance      TEXT NOT NULL,
+    instance_hash TEXT NOT NULL,
+    approach      TEXT NOT NULL,
+    variant       TEXT,
+    solver        TEXT,
+    height        INTEGER,
+    status        TEXT NOT NULL,
+    wall_time     REAL,
+    encode_time   REAL,
+    solve_time    REAL,
+    statistics    TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_run ON runs (run);
+CREATE INDEX IF NOT EXISTS runs_instance ON runs (instance_hash, approach);
+"""
+
+def default_run():
+    # label of the runs started now, e.g. "2024-05-01 12:30:05"
+    return time.strftime("%Y-%m-%d %H:%M:%S")
+
+# ------------------ END FUNCTION --------------------
+
+def connect(db_path=DB_PATH):
+    # the timeout lets the processes of batch.py / portfolio.py write together
+    connection = sqlite3.connect(db_path, timeout=30)
+    connection.row_factory = sqlite3.Row
+    connection.executescript(SCHEMA)
+    # databases created before the statistics column
+    columns = [row["name"] for row in connection.execute("PRAGMA table_info(runs)")]
+    if "statistics" not in columns:
+        connection.execute("ALTER TABLE runs ADD COLUMN statistics TEXT")
+    return connection
+
+# ------------------ END FUNCTION --------------------
+
+def record_run(db_path, run, instance, approach, variant, solver, height,
+               status, wall_time, encode_time=None, solve_time=None,
+               statistics=None):
+    # instance is an Instance of instance.py (name and content hash)
+    if not db_path:
+        return
+    assert status in STATUSES, status
+    with connect(db_path) as connection:
+        connection.execute(
+            "INSERT INTO runs (timestamp, run, instance, instance_hash, approach,"
+            " variant, solver, height, status, wall_time, encode_time, solve_time,"
+            " statistics) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (time.time(), run, instance.name, instance.digest, approach,
+             variant, solver, None if height is None else int(height), status,
+             wall_time, encode_time, solve_time,
+             None if statistics is None else json.dumps(statistics)))
+    connection.close()
+
+# ------------------ END FUNCTION --------------------
+
+def list_runs(db_path=DB_PATH):
+    # one row per (run, approach, variant, solver) with its totals
+    with connect(db_path) as connection:
+        rows = connection.execute(
+            "SELECT run, approach, variant, solver, COUNT(*) AS n_instances,"
+            " SUM(status = 'OPTIMAL') AS n_optimal, SUM(wall_time) AS total_time,"
+            " MIN(timestamp) AS started"
+            " FROM runs GROUP BY run, approach, variant, solver"
+            " ORDER BY started").fetchall()
+    connection.close()
+    return [dict(row) for row in rows]
+
+# ------------------ END FUNCTION --------------------
+
+def history(instance, approach=None, db_path=DB_PATH):
+    # every record of an instance (by name), oldest first
+    query = "SELECT * FROM runs WHERE instance = ?"
+    parameters = [instance]
+    if approach is not None:
+        query += " AND approach = ?"
+        parameters.append(approach)
+    with connect(db_path) as connection:
+        rows = connection.execute(query + " ORDER BY timestamp", parameters).fetchall()
+    connection.close()
+    return [dict(row) for row in rows]
+
+# ------------------ END FUNCTION --------------------
+
+def statistics(instance, approach=None, run=None, db_path=DB_PATH):
+    # statistics of the latest record of an instance (by name), None if
+    # there is no record or it has no statistics
+    query = "SELECT statistics FROM runs WHERE instance = ?"
+    parameters = [instance]
+    for column, value in [("approach", approach), ("run", run)]:
+        if value is not None:
+            query += " AND {} = ?".format(column)
+            parameters.append(value)
+    with connect(db_path) as connection:
+        row = connection.execute(query + " ORDER BY id DESC LIMIT 1",
+                                 parameters).fetchone()
+    connection.close()
+    if row is None or row["statistics"] is None:
+        return None
+    return json.loads(row["statistics"])
+
+# ------------------ END FUNCTION --------------------
+
+def compare(run_a, run_b, db_path=DB_PATH):
+    # records of run_b matched with those of run_a on the same instance
+    # contents, approach, variant and solver (the latest record of each run).
+    # speedup = time_a / time_b, above 1 when run_b is faster
+    query = """
+    WITH latest AS (
+        SELECT * FROM runs WHERE id IN (
+            SELECT MAX(id) FROM runs WHERE run IN (?, ?)
+            GROUP BY run, instance_hash, approach, variant, solver))
+    SELECT a.instance, a.approach, a.variant, a.solver,
+           a.status AS status_a, b.status AS status_b,
+           a.height AS height_a, b.height AS height_b,
+           a.wall_time AS time_a, b.wall_time AS time_b
+    FROM latest a JOIN latest b
+      ON a.instance_hash = b.instance_hash AND a.approach = b.approach
+     AND a.variant IS b.variant AND a.solver IS b.solver
+    WHERE a.run = ? AND b.run = ?
+    ORDER BY a.approach, a.variant, a.solver, a.instance
+    """
+    with connect(db_path) as connection:
+        rows = connection.execute(query, (run_a, run_b, run_a, run_b)).fetchall()
+    connection.close()
+    comparison = []
+    for row in rows:
+        row = dict(row)
+        if row["time_a"] and row["time_b"]:
+            row["speedup"] = row["time_a"] / row["time_b"]
+        else:
+            row["speedup"] = None
+        comparison.append(row)
+    return comparison
+
+# ------------------ END FUNCTION --------------------
+
+def classify(row, threshold=0.1):
+    # "better" / "worse" / "same" for a row of compare: a solved instance
+    # that is no longer solved (or gets a higher layout) is a regression
+    # whatever the times, otherwise the speedup decides
+    solved_a = row["status_a"] in ("OPTIMAL", "UNSAT")
+    solved_b = row["status_b"] in ("OPTIMAL", "UNSAT")
+    if solved_a != solved_b:
+        return "better" if solved_b else "worse"
+    if row["height_a"] is not None and row["height_b"] is not None \
+            and row["height_a"] != row["height_b"]:
+        return "better" if row["height_b"] < row["height_a"] else "worse"
+    if row["speedup"] is None:
+        return "same"
+    if row["speedup"] > 1 + threshold:
+        return "better"
+    if row["speedup"] < 1 / (1 + threshold):
+        return "worse"
+    return "same"
+
+# ------------------ END FUNCTION --------------------
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="results database queries")
+    parser.add_argument("--db", default=DB_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("runs", help="list the runs")
+    history_parser = commands.add_parser("history", help="records of an instance")
+    history_parser.add_argument("instance", help="e.g. ins-25")
+    history_parser.add_argument("--approach")
+    statistics_parser = commands.add_parser("statistics",
+                                            help="statistics of the latest record")
+    statistics_parser.add_argument("instance", help="e.g. ins-25")
+    statistics_parser.add_argument("--approach")
+    statistics_parser.add_argument("--run")
+    compare_parser = commands.add_parser("compare", help="run B against run A")
+    compare_parser.add_argument("run_a")
+    compare_parser.add_argument("run_b")
+    compare_parser.add_argument("--threshold", type=float, default=0.1,
+                                help="relative time change ignored as noise")
+    args = parser.parse_args()
+
+    if args.command == "runs":
+        print("RUN   --   APPROACH   --   VARIANT   --   SOLVER   --   OPTIMAL   --   TIME")
+        for row in list_runs(args.db):
+            print("{}\t{}\t{}\t{}\t{}/{}\t{:.2f}".format(
+                row["run"], row["approach"], row["variant"], row["solver"],
+                row["n_optimal"], row["n_instances"], row["total_time"] or 0))
+
+    elif args.command == "history":
+        print("RUN   --   APPROACH   --   VARIANT   --   SOLVER   --   STATUS   --   HEIGHT   --   TIME")
+        for row in history(args.instance, args.approach, args.db):
+            print("{}\t{}\t{}\t{}\t{}\t{}\t{:.2f}".format(
+                row["run"], row["approach"], row["variant"], row["solver"],
+                row["status"], row["height"], row["wall_time"] or 0))
+
+    elif args.command == "statistics":
+        stats = statistics(args.instance, args.approach, args.run, args.db)
+        if stats is None:
+            print("no statistics")
+        else:
+            for name, entry in sorted(stats["families"].items(),
+                                      key=lambda item: -item[1]["time"]):
+                print("family\t{}\t{}\t{:.4f}s".format(name, entry["count"], entry["time"]))
+            for key, value in stats["solver"].items():
+                print("solver\t{}\t{}".format(key, value))
+            for key, value in stats["memory"].items():
+                print("memory\t{}\t{}".format(key, value))
+
+    else:
+        rows = compare(args.run_a, args.run_b, args.db)
+        counts = {"better": 0, "worse": 0, "same": 0}
+        print("INSTANCE   --   APPROACH   --   STATUS   --   TIME A   --   TIME B   --   SPEEDUP")
+        for row in rows:
+            verdict = classify(row, args.threshold)
+            counts[verdict] += 1
+            print("{}\t{}/{}/{}\t{}->{}\t{:.2f}\t{:.2f}\t{}\t{}".format(
+                row["instance"], row["approach"], row["variant"], row["solver"],
+                row["status_a"], row["status_b"], row["time_a"] or 0,
+                row["time_b"] or 0,
+                "-" if row["speedup"] is None else "{:.2f}x".format(row["speedup"]),
+                "" if verdict == "same" else verdict.upper()))
+        print("\n{} instances: {} better, {} worse, {} unchanged".format(
+            len(rows), counts["better"], counts["worse"], counts["same"]))
@@ -0,0 +1,108 @@
+import numpy as np
+
+# Skyline / bottom-left-fill packing heuristic shared by CP, SAT, SMT and MIP.
+#
+# The strip is described by its skyline (the height reached in every column).
+# Blocks are placed one at a time, each one in the lowest position where it
+# lies on the skyline (leftmost among the lowest ones). The result is always a
+# valid layout, so its height is an upper bound for the exact models, a
+# starting solution, or a fallback output when they time out.
+
+ORDERINGS = ["area", "height", "width", "perimeter"]
+
+def window_max(skyline, width):
+    # max of every window skyline[x:x+width] in O(len(skyline)) (van Herk /
+    # Gil-Werman: prefix and suffix maxima on chunks of size width)
+    n_windows = len(skyline) - width + 1
+    if width == 1:
+        return skyline.copy()
+    padded = np.pad(skyline, (0, -len(skyline) % width)).reshape(-1, width)
+    prefix = np.maximum.accumulate(padded, axis=1).ravel()
+    suffix = np.maximum.accumulate(padded[:, ::-1], axis=1)[:, ::-1].ravel()
+    return np.maximum(suffix[:n_windows], prefix[width - 1:width - 1 + n_windows])
+
+# ------------------ END FUNCTION --------------------
+
+def skyline_pack(max_width, widths, heights, order):
+    # packs the blocks in the given order, returns (height, corner_x, corner_y)
+    skyline = np.zeros(max_width, dtype=np.int64)
+    corner_x = np.zeros(len(widths), dtype=np.int64)
+    corner_y = np.zeros(len(widths), dtype=np.int64)
+    for b in order:
+        levels = window_max(skyline, widths[b])
+        x = int(np.argmin(levels))
+        y = levels[x]
+        skyline[x:x + widths[b]] = y + heights[b]
+        corner_x[b], corner_y[b] = x, y
+    return int(skyline.max()), corner_x, corner_y
+
+# ------------------ END FUNCTION --------------------
+
+def ordering(name, widths, heights):
+    # blocks sorted by decreasing key, ties broken by decreasing height/width
+    keys = {"area": widths * heights,
+            "height": heights,
+            "width": widths,
+            "perimeter": widths + heights}[name]
+    return np.lexsort((-widths, -heights, -keys))
+
+# ------------------ END FUNCTION --------------------
+
+def best_packing(max_width, widths, heights, orderings=ORDERINGS,
+                 restarts=0, seed=0, first=None):
+    # tries every ordering (plus random restarts, obtained perturbing the
+    # area ordering) and returns the lowest layout as a dictionary with
+    # "height", "corner_x", "corner_y" (lists) and "ordering".
+    # With first=b the block b is always placed first, in (0,0).
+    widths = np.asarray(widths, dtype=np.int64)
+    heights = np.asarray(heights, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+
+    candidates = [(name, ordering(name, widths, heights)) for name in orderings]
+    for r in range(restarts):
+        noise = rng.uniform(0.7, 1.3, len(widths))
+        candidates.append(("random-{}".format(r),
+                           np.argsort(-(widths * heights * noise), kind="stable")))
+
+    best = None
+    for name, order in candidates:
+        if first is not None:
+            order = np.concatenate(([first], order[order != first]))
+        height, corner_x, corner_y = skyline_pack(max_width, widths, heights, order)
+        if best is None or height < best["height"]:
+            best = {"height": height,
+                    "corner_x": corner_x.tolist(),
+                    "corner_y": corner_y.tolist(),
+                    "ordering": name}
+    return best
+
+# ------------------ END FUNCTION --------------------
+
+if __name__ == "__main__":
+    import argparse, time
+
+    # packs an instance file and prints the layout in the output format
+    parser = argparse.ArgumentParser(description="skyline packing heuristic")
+    parser.add_argument("instance", help="ins-N.txt file")
+    parser.add_argument("--restarts", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with open(args.instance) as file:
+        max_width = int(file.readline())
+        n_blocks = int(file.readline())
+        dimensions = [[int(value) for value in line.split()] for line in file
+                      if line.strip()]
+    widths = [pair[0] for pair in dimensions]
+    heights = [pair[1] for pair in dimensions]
+
+    start_time = time.time()
+    layout = best_packing(max_width, widths, heights,
+                          restarts=args.restarts, seed=args.seed)
+    time_spent = time.time() - start_time
+
+    print(str(max_width) + ' ' + str(layout["height"]))
+    print(n_blocks)
+    for b in range(n_blocks):
+        print(widths[b], heights[b], layout["corner_x"][b], layout["corner_y"][b])
+    print("# ordering {} - {:.1f}ms".format(layout["ordering"], time_spent * 1000))
@@ -0,0 +1,232 @@
+import argparse, multiprocessing, os, random, sys, time
+from batch import ROOT, parse_instances
+from instance import load_instances
+from z3_config import (CACHE_PATH, DEFAULT_CONFIG, instance_class, instance_features,
+                       read_cache, tuned_params, write_cache)
+
+for approach in ["SAT", "SMT"]:
+    sys.path.append(os.path.join(ROOT, approach, "src"))
+import SAT, SMT
+from sat_backends import make_backend
+from smt_encodings import THEORIES
+
+# Offline tuner of the z3 parameters (and SMT preprocessing tactics) of
+# SAT.py (z3 backend) and SMT.py. The training instances are grouped by
+# class (z3_config.instance_class: n_blocks, max_width, aspect); on every
+# class --configs random configs (the default one first) are raced over the
+# instances of the class, smallest first:
+#   - the configs run on an instance in parallel (--jobs processes), each
+#     solve in its own process so that it can be stopped at any time
+#   - early cut-off: once a config has solved the instance in t seconds,
+#     the runs still going after --cut * t + --slack seconds are killed and
+#     their configs leave the race; after every instance the configs whose
+#     total time exceeds --cut * (best total) + --slack leave too
+#   - an instance no config solves within --timeout is left out
+# The config with the lowest total time of every class is stored in the
+# cache (--cache, default z3_tuning.json) with its score and the score of
+# the default config, and loaded by SAT.py and SMT.py at solve time; unless
+# it saves --min-gain of the total time of the default config and at least
+# --slack seconds, the default config is stored instead: a gain within the
+# timing noise of a few training instances does not carry over to other
+# instances of the class.
+# Example:
+#   python tuner.py --approach smt --theory lia --instances 1-20 --configs 24
+
+SPACES = {
+    "sat": {"params": {"sat.restart": ["luby", "geometric", "ema", "static"],
+                       "sat.phase": ["caching", "always_false", "always_true", "random"],
+                       "sat.random_seed": list(range(100)),
+                       "smt.phase_selection": list(range(7)),
+                       "smt.restart_strategy": list(range(5)),
+                       "smt.random_seed": list(range(100))},
+            "tactics": [[]]},
+    "smt": {"params": {"smt.phase_selection": list(range(7)),
+                       "smt.restart_strategy": list(range(5)),
+                       "smt.arith.solver": [2, 6],
+                       "smt.relevancy": [0, 1, 2],
+                       "smt.random_seed": list(range(100))},
+            "tactics": [[], ["simplify"], ["propagate-values", "simplify"],
+                        ["simplify", "solve-eqs"], ["ctx-simplify"]]},
+}
+
+def sample_configs(approach, n_configs, rng):
+    # the default config, then distinct random configs (every parameter
+    # set with probability 1/2, the others left to their default)
+    space = SPACES[approach]
+    configs, seen = [DEFAULT_CONFIG], {repr(DEFAULT_CONFIG)}
+    for _ in range(100 * n_configs):
+        if len(configs) >= n_configs:
+            break
+        config = {"params": {name: rng.choice(values)
+                             for name, values in sorted(space["params"].items())
+                             if rng.random() < 0.5},
+                  "tactics": rng.choice(space["tactics"])}
+        if repr(config) not in seen:
+            seen.add(repr(config))
+            configs.append(config)
+    return configs
+
+# ------------------ END FUNCTION --------------------
+
+def run_config(approach, theory, config, instance, timeout, connection):
+    # child process: one solve with the config, (time, optimal height or
+    # None) sent back on the connection
+    sys.stdout = open(os.devnull, "w")
+    min_height, max_height = instance.lower_bound, instance.upper_bound
+    start_time = time.time()
+    if approach == "sat":
+        with tuned_params(config):
+            res = SAT.solve(instance, min_height, max_height, make_backend("z3"),
+                            timeout=timeout)
+        height = res["height"] if res["solved"] else None
+    else:
+        res = SMT.solve(instance, min_height, max_height, theory=theory,
+                        timeout=timeout, config=config)
+        height = res["height"] if res["optimal"] else None
+    connection.send((time.time() - start_time, height))
+    connection.close()
+
+# ------------------ END FUNCTION --------------------
+
+def race_instance(approach, theory, configs, alive, instance, timeout, cut, slack, jobs):
+    # runs the alive configs on one instance, jobs at a time; returns
+    # {config index: (time, height)}, time None for a killed or failed run
+    pending, running, results = list(alive), {}, {}
+    fastest = None
+    while pending or running:
+        while pending and len(running) < jobs:
+            c = pending.pop(0)
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(
+                target=run_config, daemon=True,
+                args=(approach, theory, configs[c], instance, timeout, sender))
+            process.start()
+            sender.close()
+            running[c] = (process, receiver, time.time())
+
+        # early cut-off: cut * the fastest solve of the instance + slack
+        cap = timeout if fastest is None else min(timeout, cut * fastest + slack)
+        for c, (process, receiver, start_time) in list(running.items()):
+            if receiver.poll():
+                elapsed, height = receiver.recv()
+                results[c] = (elapsed, height) if height is not None else (None, None)
+                if height is not None:
+                    fastest = elapsed if fastest is None else min(fastest, elapsed)
+            elif not process.is_alive():
+                results[c] = (None, None)
+            elif time.time() - start_time > cap:
+                process.kill()
+                results[c] = (None, None)
+            else:
+                continue
+            process.join()
+            receiver.close()
+            del running[c]
+        time.sleep(0.01)
+    return results
+
+# ------------------ END FUNCTION --------------------
+
+def tune_class(approach, theory, configs, instances, timeout, cut, slack, jobs):
+    # race of the configs over the instances of a class; returns the index of
+    # the best config, the total time of every config and the configs that
+    # stayed in the race to the end
+    alive = list(range(len(configs)))
+    totals = [0.0] * len(configs)
+    for instance in sorted(instances, key=lambda ins: ins.n_blocks * ins.max_width):
+        results = race_instance(approach, theory, configs, alive, instance,
+                                timeout, cut, slack, jobs)
+        solved = [c for c in alive if results[c][0] is not None]
+        if not solved:
+            print("{}\tno config within {}s, left out".format(instance.name, timeout))
+            continue
+
+        # the optimal height is the same for every config
+        height = min(results[c][1] for c in solved)
+        for c in alive:
+            if c in solved and results[c][1] == height:
+                totals[c] += results[c][0]
+            else:
+                totals[c] = None
+        best = min(totals[c] for c in solved if totals[c] is not None)
+        survivors = [c for c in alive
+                     if totals[c] is not None and totals[c] <= cut * best + slack]
+        print("{}\tbest {:.2f}s\tconfigs {} -> {}".format(
+            instance.name, min(results[c][0] for c in solved), len(alive), len(survivors)))
+        alive = survivors
+    best = min(alive, key=lambda c: totals[c])
+    return best, totals, alive
+
+# ------------------ END FUNCTION --------------------
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="offline z3 tuner for SAT.py and SMT.py")
+    parser.add_argument("--approach", default="smt", choices=["sat", "smt"])
+    parser.add_argument("--theory", default="lia", choices=THEORIES,
+                        help="SMT encoding tuned (--approach smt)")
+    parser.add_argument("--instance-dir", default=None,
+                        help="training instances (default: <approach>/src/instances)")
+    parser.add_argument("--instances", default="1-20",
+                        help='training instances, e.g. "1-20" or "1-10,15"')
+    parser.add_argument("--configs", type=int, default=24,
+                        help="configs raced on every class (the default one included)")
+    parser.add_argument("--timeout", type=float, default=60,
+                        help="seconds per solve")
+    parser.add_argument("--cut", type=float, default=2.0,
+                        help="a config slower than cut x the best one leaves the race")
+    parser.add_argument("--slack", type=float, default=1.0,
+                        help="seconds added to every cut-off (noise on easy instances)")
+    parser.add_argument("--min-gain", type=float, default=0.2,
+                        help="share of the default total time a config must save to be stored")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(),
+                        help="solves running in parallel")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the config sampling")
+    parser.add_argument("--cache", default=CACHE_PATH,
+                        help="cache of the tuned configs (updated, other classes kept)")
+    args = parser.parse_args()
+
+    key = "sat" if args.approach == "sat" else "smt:" + args.theory
+    instance_dir = args.instance_dir or os.path.join(ROOT, args.approach.upper(), "src", "instances")
+    instances = load_instances([os.path.join(instance_dir, "ins-{}.txt".format(i))
+                                for i in parse_instances(args.instances)])
+    classes = {}
+    for instance in instances:
+        classes.setdefault(instance_class(instance), []).append(instance)
+    configs = sample_configs(args.approach, args.configs, random.Random(args.seed))
+
+    for name, members in sorted(classes.items(), key=lambda item: len(item[1])):
+        print("\nCLASS {} ({} instances, {} configs)".format(name, len(members), len(configs)))
+        best, totals, alive = tune_class(args.approach, args.theory, configs, members,
+                                  args.timeout, args.cut, args.slack, args.jobs)
+        if totals[best] == 0:
+            print("no instance solved, class not stored")
+            continue
+        default_score = round(totals[0], 3) if 0 in alive else None
+        print("best {}\ttotal {:.2f}s\tdefault {}".format(
+            configs[best], totals[best],
+            "cut off" if default_score is None else "{:.2f}s".format(default_score)))
+
+        # the default config was cut off: the best one is faster than it by
+        # more than --cut, otherwise it must save --min-gain of its time and
+        # at least --slack seconds (the timing noise)
+        if (best != 0 and default_score is not None and
+                totals[0] - totals[best] < max(args.min_gain * totals[0], args.slack)):
+            print("gain below {:.0%} or {}s, default config stored".format(
+                args.min_gain, args.slack))
+            best = 0
+
+        # one entry per class, read back and updated now so that a long
+        # tuning session keeps the classes already done
+        features = [instance_features(instance) for instance in members]
+        cache = read_cache(args.cache)
+        cache.setdefault(key, {})[name] = {
+            "features": [round(sum(column) / len(column), 3) for column in zip(*features)],
+            "config": configs[best],
+            "score": round(totals[best], 3),
+            "default_score": default_score,
+            "instances": [instance.name for instance in members],
+            "configs_tried": len(configs),
+            "timeout": args.timeout,
+            "tuned": time.strftime("%Y-%m-%d %H:%M:%S")}
+        write_cache(cache, args.cache)
@@ -0,0 +1,81 @@
+import json, math, os
+from contextlib import contextmanager
+
+# z3 configurations tuned offline by tuner.py, one per approach ("sat", or
+# "smt:<theory>") and instance class, stored in a JSON cache:
+#   {"smt:lia": {"n16-w16-tall": {"features": [n_blocks, max_width, aspect],
+#                                "config": {"params": {...}, "tactics": [...]},
+#                                "score": ..., "default_score": ..., ...}}}
+# A config is a set of global z3 parameters (set_param, so that they reach
+# both the SMT core and the SAT solver) and, for SMT, the preprocessing
+# tactics run before the "smt" tactic. SAT.py (z3 backend) and SMT.py load
+# the config of the class of every instance; a class not in the cache runs
+# with the z3 defaults. tuner.py stores the default config itself for a
+# class where no config beats it by --min-gain.
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "z3_tuning.json")
+
+DEFAULT_CONFIG = {"params": {}, "tactics": []}
+
+def instance_features(instance):
+    # n_blocks, max_width and aspect of the strip (area bound / max_width)
+    return [instance.n_blocks, instance.max_width,
+            round(instance.lower_bound / instance.max_width, 3)]
+
+# ------------------ END FUNCTION --------------------
+
+def instance_class(instance):
+    # n_blocks and max_width rounded up to a power of two, aspect in three
+    # bands, e.g. "n16-w16-tall"
+    n_blocks, max_width, aspect = instance_features(instance)
+    shape = "flat" if aspect < 0.75 else "square" if aspect <= 1.5 else "tall"
+    return "n{}-w{}-{}".format(1 << math.ceil(math.log2(max(n_blocks, 1))),
+                               1 << math.ceil(math.log2(max(max_width, 1))),
+                               shape)
+
+# ------------------ END FUNCTION --------------------
+
+def read_cache(path=CACHE_PATH):
+    if not path or not os.path.isfile(path):
+        return {}
+    with open(path) as cache_file:
+        return json.load(cache_file)
+
+# ------------------ END FUNCTION --------------------
+
+def write_cache(cache, path=CACHE_PATH):
+    # written aside and renamed, a reader never sees half a file
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as cache_file:
+        json.dump(cache, cache_file, indent=1, sort_keys=True)
+    os.replace(temp_path, path)
+
+# ------------------ END FUNCTION --------------------
+
+def load_config(approach, instance, path=CACHE_PATH):
+    # (class, config) for the instance, (None, None) if its class was not tuned
+    key = instance_class(instance)
+    entry = read_cache(path).get(approach, {}).get(key)
+    if entry is None:
+        return None, None
+    return key, entry["config"]
+
+# ------------------ END FUNCTION --------------------
+
+@contextmanager
+def tuned_params(config):
+    # global z3 parameters of the config for the solvers created inside the
+    # block, back to the z3 defaults when it ends. config None: nothing is
+    # set and nothing reset
+    if config is None:
+        yield
+        return
+    import z3
+    for name, value in config["params"].items():
+        z3.set_param(name, value)
+    try:
+        yield
+    finally:
+        z3.reset_params()
+
+# ------------------ END FUNCTION --------------------
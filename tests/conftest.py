@@ -0,0 +1,9 @@
+import os, sys
+
+# the approaches are scripts importing their siblings and the shared modules
+# by name, the tests do the same
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+for directory in ["common", os.path.join("SAT", "src"), os.path.join("MIP", "src")]:
+    sys.path.insert(0, os.path.join(ROOT, directory))
+
+INSTANCE_DIR = os.path.join(ROOT, "SAT", "src", "instances")
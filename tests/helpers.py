@@ -0,0 +1,30 @@
+import itertools
+import numpy as np
+from lns import valid_layout
+
+# brute force over tiny instances: every placement of every block within
+# max_width x max_height
+
+def all_placements(max_width, widths, heights, max_height):
+    # (corner_x, corner_y) tuples, overlapping or not
+    placements = [[(x, y) for x in range(max_width - w + 1) for y in range(max_height - h + 1)]
+                  for w, h in zip(widths, heights)]
+    for corners in itertools.product(*placements):
+        corner_x, corner_y = zip(*corners)
+        yield corner_x, corner_y
+
+# ------------------ END FUNCTION --------------------
+
+def all_layouts(max_width, widths, heights, max_height):
+    # the placements where no two blocks overlap
+    widths, heights = np.asarray(widths), np.asarray(heights)
+    return [(corner_x, corner_y)
+            for corner_x, corner_y in all_placements(max_width, widths, heights, max_height)
+            if valid_layout(max_width, widths, heights, corner_x, corner_y)]
+
+# ------------------ END FUNCTION --------------------
+
+def layout_height(heights, layout):
+    return max(y + h for y, h in zip(layout[1], heights))
+
+# ------------------ END FUNCTION --------------------
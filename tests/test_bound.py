@@ -0,0 +1,24 @@
+import json
+from bound import parse_bounds, read_bounds, update_bounds
+
+# the bound file in a temporary directory: only tightened, no-op without a path
+
+def test_bounds_only_tighten(tmp_path):
+    path = str(tmp_path / "bounds.json")
+    assert read_bounds(path) == {"lower": None, "upper": None}
+    assert update_bounds(path, lower=3) == {"lower": 3, "upper": None}
+    assert update_bounds(path, upper=10) == {"lower": 3, "upper": 10}
+    assert update_bounds(path, lower=2, upper=12) == {"lower": 3, "upper": 10}
+    assert update_bounds(path, lower=5, upper=8) == {"lower": 5, "upper": 8}
+    assert read_bounds(path) == {"lower": 5, "upper": 8}
+    with open(path) as file:
+        assert json.load(file) == {"lower": 5, "upper": 8}
+
+# ------------------ END FUNCTION --------------------
+
+def test_bounds_without_file():
+    assert update_bounds(None, lower=3, upper=4) == {"lower": None, "upper": None}
+    assert read_bounds(None) == {"lower": None, "upper": None}
+    assert parse_bounds("") == {"lower": None, "upper": None}
+
+# ------------------ END FUNCTION --------------------
@@ -0,0 +1,158 @@
+import itertools
+import numpy as np
+import pytest
+from pysat.solvers import Glucose4
+from clause_generator import VariableLayout, generate_clauses
+from instance import Instance
+from patterns import normal_patterns
+from sat_backends import make_backend
+from helpers import all_layouts, all_placements, layout_height
+import SAT
+
+# Every clause family of the SAT encoding checked against brute force on
+# tiny instances: the layouts a set of families admits (under "height <= H")
+# are found by fixing the order encoding of every corner with assumptions.
+#   - the core families admit exactly the valid layouts within H
+#   - the pairs family (wide and tall pairs) removes no valid layout
+#   - the symmetry family keeps one layout of every class of layouts equal
+#     up to a permutation of identical blocks
+#   - with normal positions (aliased variables) the admitted layouts are the
+#     valid ones whose corners are all normal patterns, the optimum included
+
+CORE = ["order_x", "order_y", "height", "relation", "non_overlap_x", "non_overlap_y"]
+
+# max_width, (width, height) of the blocks, max_height: identical blocks,
+# pairs too wide for max_width and pairs too tall for the lower heights
+INSTANCES = [(4, [(3, 1), (2, 2), (2, 2)], 5),
+             (5, [(3, 1), (3, 1), (2, 2), (1, 3)], 4),
+             (3, [(1, 2), (1, 2), (2, 1), (3, 1)], 5)]
+
+def make_instance(max_width, blocks):
+    widths, heights = zip(*blocks)
+    return Instance("tiny", max_width, widths, heights)
+
+# ------------------ END FUNCTION --------------------
+
+def admitted(instance, max_height, families, positions, height):
+    # layouts within max_height admitted by the clauses of the families
+    # under the assumption "height <= height"
+    widths, heights = instance.widths, instance.heights
+    min_height = instance.lower_bound
+    if positions == "normal":
+        layout = VariableLayout(instance.n_blocks, instance.max_width, min_height, max_height,
+                                normal_patterns(widths, instance.max_width),
+                                normal_patterns(heights, max_height))
+    else:
+        layout = VariableLayout(instance.n_blocks, instance.max_width, min_height, max_height)
+    solver = Glucose4()
+    for family, clauses in generate_clauses(widths, heights, instance.max_width,
+                                            min_height, max_height, layout,
+                                            instance.identical_groups,
+                                            instance.no_side_by_side):
+        if family in families:
+            solver.append_formula(clauses.tolist())
+
+    found = set()
+    for corner_x, corner_y in all_placements(instance.max_width, widths, heights, max_height):
+        # x_i <= w exactly from w = x_i on (an aliased variable asked to be
+        # both true and false makes the placement unsatisfiable)
+        assumptions = [int(layout.height_le(height))]
+        for b in range(instance.n_blocks):
+            assumptions += [int(layout.x_coord(b, w)) * (1 if w >= corner_x[b] else -1)
+                            for w in range(instance.max_width)]
+            assumptions += [int(layout.y_coord(b, h)) * (1 if h >= corner_y[b] else -1)
+                            for h in range(max_height)]
+        if solver.solve(assumptions=assumptions):
+            found.add((corner_x, corner_y))
+    solver.delete()
+    return found
+
+# ------------------ END FUNCTION --------------------
+
+def valid_within(instance, max_height, height):
+    return set(layout for layout in all_layouts(instance.max_width, instance.widths,
+                                                instance.heights, max_height)
+               if layout_height(instance.heights, layout) <= height)
+
+# ------------------ END FUNCTION --------------------
+
+def permutations(instance, layout):
+    # the layouts obtained exchanging the corners of identical blocks
+    groups = [group.tolist() for group in instance.identical_groups]
+    for orders in itertools.product(*[itertools.permutations(group) for group in groups]):
+        corner_x, corner_y = list(layout[0]), list(layout[1])
+        for group, order in zip(groups, orders):
+            for b, source in zip(group, order):
+                corner_x[b], corner_y[b] = layout[0][source], layout[1][source]
+        yield tuple(corner_x), tuple(corner_y)
+
+# ------------------ END FUNCTION --------------------
+
+def heights_to_check(instance, max_height):
+    return sorted({instance.lower_bound, max_height - 1, max_height})
+
+# ------------------ END FUNCTION --------------------
+
+@pytest.mark.parametrize("max_width, blocks, max_height", INSTANCES)
+def test_core_families_admit_the_valid_layouts(max_width, blocks, max_height):
+    instance = make_instance(max_width, blocks)
+    for height in heights_to_check(instance, max_height):
+        assert admitted(instance, max_height, CORE, "all", height) == \
+               valid_within(instance, max_height, height)
+
+# ------------------ END FUNCTION --------------------
+
+@pytest.mark.parametrize("max_width, blocks, max_height", INSTANCES)
+def test_pairs_remove_no_valid_layout(max_width, blocks, max_height):
+    instance = make_instance(max_width, blocks)
+    assert len(instance.no_side_by_side) > 0
+    for height in heights_to_check(instance, max_height):
+        assert admitted(instance, max_height, CORE + ["pairs"], "all", height) == \
+               valid_within(instance, max_height, height)
+
+# ------------------ END FUNCTION --------------------
+
+@pytest.mark.parametrize("max_width, blocks, max_height", INSTANCES)
+def test_symmetry_keeps_one_layout_per_permutation(max_width, blocks, max_height):
+    instance = make_instance(max_width, blocks)
+    assert len(instance.identical_groups) > 0
+    for height in heights_to_check(instance, max_height):
+        valid = valid_within(instance, max_height, height)
+        kept = admitted(instance, max_height, CORE + ["pairs", "symmetry"], "all", height)
+        assert kept <= valid
+        for layout in valid:
+            assert kept & set(permutations(instance, layout))
+        # some layouts are cut when a group can be exchanged
+        if valid:
+            assert len(kept) < len(valid)
+
+# ------------------ END FUNCTION --------------------
+
+@pytest.mark.parametrize("max_width, blocks, max_height", INSTANCES)
+def test_normal_positions_admit_the_normal_layouts(max_width, blocks, max_height):
+    instance = make_instance(max_width, blocks)
+    x_allowed = normal_patterns(instance.widths, max_width)
+    y_allowed = normal_patterns(instance.heights, max_height)
+    for height in heights_to_check(instance, max_height):
+        valid = valid_within(instance, max_height, height)
+        normal = set(layout for layout in valid
+                     if all(x_allowed[b, layout[0][b]] and y_allowed[b, layout[1][b]]
+                            for b in range(instance.n_blocks)))
+        assert admitted(instance, max_height, CORE + ["pairs"], "normal", height) == normal
+        # a valid layout within the height has a normal one within it
+        assert bool(normal) == bool(valid)
+
+# ------------------ END FUNCTION --------------------
+
+@pytest.mark.parametrize("positions", ["normal", "all"])
+@pytest.mark.parametrize("max_width, blocks, max_height", INSTANCES)
+def test_solve_finds_the_brute_force_optimum(max_width, blocks, max_height, positions):
+    instance = make_instance(max_width, blocks)
+    optimum = min(layout_height(instance.heights, layout)
+                  for layout in all_layouts(max_width, instance.widths, instance.heights,
+                                            instance.upper_bound))
+    res = SAT.solve(instance, instance.lower_bound, instance.upper_bound,
+                    make_backend("pysat"), positions=positions)
+    assert res["solved"] and res["height"] == optimum
+
+# ------------------ END FUNCTION --------------------
@@ -0,0 +1,103 @@
+import glob, os
+import numpy as np
+import pytest
+from instance import (Instance, load_instance, load_instances, natural_key,
+                      parse_instance, stream_instances)
+from lns import valid_layout
+from conftest import INSTANCE_DIR
+
+FILENAMES = sorted(glob.glob(os.path.join(INSTANCE_DIR, "ins-*.txt")), key=natural_key)
+
+def random_instance(seed):
+    rng = np.random.default_rng(seed)
+    max_width = int(rng.integers(3, 20))
+    n_blocks = int(rng.integers(1, 25))
+    widths = rng.integers(1, max_width + 1, n_blocks)
+    heights = rng.integers(1, 10, n_blocks)
+    return Instance("random-{}".format(seed), max_width, widths, heights)
+
+# ------------------ END FUNCTION --------------------
+
+def check_skyline(instance):
+    layout = instance.skyline_layout()
+    corner_x, corner_y = np.array(layout["corner_x"]), np.array(layout["corner_y"])
+    assert valid_layout(instance.max_width, instance.widths, instance.heights,
+                        corner_x, corner_y)
+    assert (corner_y + instance.heights).max() <= layout["height"] == instance.upper_bound
+    assert instance.lower_bound <= instance.upper_bound
+
+# ------------------ END FUNCTION --------------------
+
+def test_skyline_layout_of_the_instances():
+    assert len(FILENAMES) == 40
+    for instance in load_instances(FILENAMES, cache_path=None):
+        check_skyline(instance)
+
+# ------------------ END FUNCTION --------------------
+
+@pytest.mark.parametrize("seed", range(30))
+def test_skyline_layout_of_random_instances(seed):
+    check_skyline(random_instance(seed))
+
+# ------------------ END FUNCTION --------------------
+
+@pytest.mark.parametrize("seed", range(30))
+def test_groups_and_pairs(seed):
+    instance = random_instance(seed)
+    dims = list(zip(instance.widths.tolist(), instance.heights.tolist()))
+    groups = sorted(tuple(group.tolist()) for group in instance.identical_groups)
+    expected = sorted(set(tuple(b for b in range(len(dims)) if dims[b] == dim)
+                          for dim in dims if dims.count(dim) > 1))
+    assert groups == expected
+    pairs = [tuple(pair) for pair in instance.no_side_by_side.tolist()]
+    assert pairs == [(i, j) for i in range(len(dims)) for j in range(i + 1, len(dims))
+                     if dims[i][0] + dims[j][0] > instance.max_width]
+
+# ------------------ END FUNCTION --------------------
+
+def test_lower_bound():
+    instance = Instance("tiny", 4, [4, 1, 3], [1, 5, 2])
+    # area 15 over width 4, below the tallest block
+    assert instance.area_bound == 4 and instance.lower_bound == 5
+
+# ------------------ END FUNCTION --------------------
+
+def test_cache_round_trip(tmp_path, monkeypatch):
+    import instance as instance_module
+    cache_path = str(tmp_path / "cache.pkl")
+    monkeypatch.setattr(instance_module, "_cache", None)
+    first = load_instances(FILENAMES[:3], cache_path=cache_path)
+    assert os.path.isfile(cache_path)
+    monkeypatch.setattr(instance_module, "_cache", None)
+    second = load_instances(FILENAMES[:3], cache_path=cache_path)
+    for a, b in zip(first, second):
+        assert a.name == b.name and a.digest == b.digest
+        assert (a.widths == b.widths).all() and a.upper_bound == b.upper_bound
+
+# ------------------ END FUNCTION --------------------
+
+def test_no_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    instance = load_instance(FILENAMES[0], cache_path=None)
+    assert instance.name == "ins-1"
+    assert os.listdir(tmp_path) == []
+
+# ------------------ END FUNCTION --------------------
+
+def test_stream_instances(monkeypatch):
+    import io
+    names = [instance.name for instance in stream_instances([INSTANCE_DIR])]
+    assert names == ["ins-{}".format(i) for i in range(1, 41)]
+    names = [instance.name for instance in
+             stream_instances([os.path.join(INSTANCE_DIR, "ins-2?.txt")])]
+    assert names == ["ins-{}".format(i) for i in range(20, 30)]
+
+    # instances written back to back on stdin, blank lines ignored
+    texts = [open(filename).read() for filename in FILENAMES[:2]]
+    monkeypatch.setattr("sys.stdin", io.StringIO("\n".join(texts) + "\n\n"))
+    streamed = list(stream_instances(["-"]))
+    assert [instance.name for instance in streamed] == ["stdin-1", "stdin-2"]
+    for instance, text in zip(streamed, texts):
+        assert instance.to_dzn() == parse_instance(text).to_dzn()
+
+# ------------------ END FUNCTION --------------------
@@ -0,0 +1,99 @@
+import os
+import numpy as np
+import pulp
+import pytest
+from instance import Instance, load_instance
+from lns import valid_layout
+from conftest import INSTANCE_DIR
+from helpers import all_layouts, layout_height
+from test_clause_generator import INSTANCES as TINY
+import MIP
+
+# The pair preprocessing of the base MIP model (pair_relations: impossible
+# relative positions dropped, identical blocks ordered, big-M per pair)
+# against the loose model: same optimum, and the identical blocks of a
+# heuristic layout reordered by order_identical satisfy the ordering rows.
+
+# max_width, (width, height) of the blocks: identical groups (side by side
+# or not), pairs too wide and pairs too tall for the skyline height
+INSTANCES = [(6, [(4, 2), (3, 1), (3, 1), (2, 3), (2, 3), (1, 1)]),
+             (5, [(3, 2), (3, 2), (2, 1), (2, 1), (1, 4)]),
+             (4, [(2, 2), (2, 2), (2, 2), (1, 3), (4, 1)])]
+
+def solve(model):
+    model.solve(MIP.make_solver("cbc"))
+    assert MIP.solution_status(model) == "OPTIMAL"
+    return round(pulp.value(model.objective))
+
+# ------------------ END FUNCTION --------------------
+
+def make_instance(max_width, blocks):
+    widths, heights = zip(*blocks)
+    return Instance("tiny", max_width, widths, heights)
+
+# ------------------ END FUNCTION --------------------
+
+def file_instances():
+    return [load_instance(os.path.join(INSTANCE_DIR, "ins-{}.txt".format(i)), cache_path=None)
+            for i in [1, 2, 3]]
+
+# ------------------ END FUNCTION --------------------
+
+@pytest.mark.parametrize("instance", [make_instance(*data) for data in INSTANCES] +
+                         file_instances(), ids=lambda instance: instance.name)
+def test_tight_model_keeps_the_loose_optimum(instance):
+    loose = solve(MIP.build_pulp_model(instance, instance.upper_bound, tighten=False))
+    tight = solve(MIP.build_pulp_model(instance, instance.upper_bound, tighten=True))
+    assert tight == loose
+
+# ------------------ END FUNCTION --------------------
+
+@pytest.mark.parametrize("max_width, blocks, max_height", TINY)
+def test_tight_model_finds_the_brute_force_optimum(max_width, blocks, max_height):
+    instance = make_instance(max_width, blocks)
+    optimum = min(layout_height(instance.heights, layout)
+                  for layout in all_layouts(max_width, instance.widths, instance.heights,
+                                            instance.upper_bound))
+    model = MIP.build_pulp_model(instance, instance.upper_bound)
+    assert solve(model) == optimum
+    coordinates, _ = MIP.extract(model, instance.n_blocks)
+    assert valid_layout(max_width, instance.widths, instance.heights,
+                        coordinates["x"], coordinates["y"])
+
+# ------------------ END FUNCTION --------------------
+
+@pytest.mark.parametrize("max_width, blocks", INSTANCES)
+def test_pair_relations_follow_the_instance(max_width, blocks):
+    instance = make_instance(max_width, blocks)
+    relations, ordered = MIP.pair_relations(instance, instance.upper_bound)
+    wide = set(map(tuple, instance.no_side_by_side.tolist()))
+    same = set((i, j) for group in instance.identical_groups
+               for i in group.tolist() for j in group.tolist() if i < j)
+    assert len(relations) == instance.n_blocks * (instance.n_blocks - 1) // 2
+    for (i, j), options in relations.items():
+        axes = [axis for _, _, axis, _ in options]
+        assert (0 not in axes) == ((i, j) in wide)
+        assert len(options) == (2 * len(set(axes)) - ((i, j) in same))
+        for first, second, axis, big_m in options:
+            assert big_m == (max_width, instance.upper_bound)[axis]
+    assert set((i, j) for i, j, _ in ordered) == same
+
+# ------------------ END FUNCTION --------------------
+
+@pytest.mark.parametrize("instance", [make_instance(*data) for data in INSTANCES] +
+                         file_instances(), ids=lambda instance: instance.name)
+def test_order_identical_gives_a_start_of_the_tight_model(instance):
+    layout = MIP.order_identical(instance.skyline_layout(), instance)
+    corner_x, corner_y = np.array(layout["corner_x"]), np.array(layout["corner_y"])
+    assert valid_layout(instance.max_width, instance.widths, instance.heights,
+                        corner_x, corner_y)
+    assert sorted(zip(corner_x, corner_y)) == \
+           sorted(zip(instance.skyline_x, instance.skyline_y))
+    _, ordered = MIP.pair_relations(instance, instance.upper_bound)
+    coords = (corner_x, corner_y)
+    for i, j, axis in ordered:
+        assert coords[axis][i] <= coords[axis][j]
+        if axis == 0 and corner_x[i] == corner_x[j]:
+            assert corner_y[i] <= corner_y[j]
+
+# ------------------ END FUNCTION --------------------
@@ -0,0 +1,54 @@
+import itertools
+import numpy as np
+import pytest
+from instance import Instance
+from patterns import domains_dzn, normal_patterns, position_domains, subset_sums
+
+# normal patterns against the subset sums enumerated one subset at a time
+
+def brute_force_patterns(sizes, limit):
+    allowed = np.zeros((len(sizes), limit), dtype=bool)
+    for i, size in enumerate(sizes):
+        others = sizes[:i] + sizes[i + 1:]
+        for r in range(len(others) + 1):
+            for subset in itertools.combinations(others, r):
+                if sum(subset) + size <= limit:
+                    allowed[i, sum(subset)] = True
+    return allowed
+
+# ------------------ END FUNCTION --------------------
+
+@pytest.mark.parametrize("seed", range(20))
+def test_normal_patterns_are_the_subset_sums_of_the_others(seed):
+    rng = np.random.default_rng(seed)
+    sizes = rng.integers(1, 7, rng.integers(1, 8)).tolist()
+    limit = int(rng.integers(max(sizes), sum(sizes) + 2))
+    assert (normal_patterns(sizes, limit) == brute_force_patterns(sizes, limit)).all()
+
+# ------------------ END FUNCTION --------------------
+
+def test_normal_patterns_of_a_block_larger_than_the_limit():
+    allowed = normal_patterns([2, 9, 3], 6)
+    assert not allowed[1].any()
+    assert allowed[0].tolist() == [True, False, False, True, False, False]
+
+# ------------------ END FUNCTION --------------------
+
+def test_subset_sums_bitset():
+    assert subset_sums([2, 3], 10) == 0b101101
+    assert subset_sums([4, 4], 5) == 0b10001
+
+# ------------------ END FUNCTION --------------------
+
+def test_position_domains_and_dzn():
+    instance = Instance("tiny", 8, [3, 3, 5, 5], [3, 5, 3, 5])
+    x_domain, y_domain = position_domains(instance)
+    assert x_domain == [{0, 3, 5}, {0, 3, 5}, {0, 3}, {0, 3}]
+    assert y_domain == [{0, 3, 5}, {0, 3}, {0, 3, 5}, {0, 3}]
+    x_all, y_all = position_domains(instance, "all")
+    assert x_all[2] == set(range(4)) and y_all[3] == set(range(instance.upper_bound - 4))
+    assert domains_dzn(instance) == ("x_domain = [{0, 3, 5}, {0, 3, 5}, {0, 3}, {0, 3}];\n"
+                                     "y_domain = [{0, 3, 5}, {0, 3}, {0, 3, 5}, {0, 3}];\n"
+                                     "upper_bound = 8;\n")
+
+# ------------------ END FUNCTION --------------------
@@ -0,0 +1,22 @@
+import os
+from instance import Instance
+from portfolio import instance_args, lower_bound
+
+# the bound and the command lines of a race come from the same instance file
+
+def test_lower_bound_of_the_instance_dir(tmp_path):
+    (tmp_path / "ins-1.txt").write_text("4\n3\n4 1\n1 5\n3 2\n")
+    assert lower_bound(1, str(tmp_path)) == Instance("ins-1", 4, [4, 1, 3], [1, 5, 2]).lower_bound
+    (tmp_path / "ins-1.txt").write_text("2\n2\n2 3\n2 4\n")
+    assert lower_bound(1, str(tmp_path)) == 7
+
+# ------------------ END FUNCTION --------------------
+
+def test_instance_args(tmp_path):
+    instance_dir = str(tmp_path)
+    assert instance_args("CP", 3, instance_dir) == [os.path.join(instance_dir, "ins-3.txt")]
+    for approach in ["SAT", "SMT", "MIP"]:
+        assert instance_args(approach, 3, instance_dir) == \
+               ["--instances", "3", "--instance-dir", instance_dir]
+
+# ------------------ END FUNCTION --------------------
@@ -0,0 +1,49 @@
+from instance import Instance
+from results import classify, compare, history, list_runs, record_run, statistics
+
+# round trip through the results database in a temporary directory
+
+def make_instance(name, max_width):
+    instance = Instance(name, max_width, [2, 3], [2, 1])
+    instance.digest = "digest-{}-{}".format(name, max_width)
+    return instance
+
+# ------------------ END FUNCTION --------------------
+
+def test_results_round_trip(tmp_path):
+    db_path = str(tmp_path / "results.db")
+    a, b = make_instance("ins-1", 5), make_instance("ins-2", 4)
+    record_run(db_path, "run-a", a, "SAT", "incremental", "z3", 3, "OPTIMAL", 2.0,
+               0.5, 1.5, {"conflicts": 10})
+    record_run(db_path, "run-a", b, "SAT", "incremental", "z3", None, "TIMEOUT", 300.0)
+    record_run(db_path, "run-b", a, "SAT", "incremental", "z3", 3, "OPTIMAL", 1.0,
+               statistics={"conflicts": 4})
+    record_run(db_path, "run-b", b, "SAT", "incremental", "z3", 3, "OPTIMAL", 50.0)
+
+    runs = list_runs(db_path)
+    assert [(run["run"], run["n_instances"], run["n_optimal"]) for run in runs] == \
+           [("run-a", 2, 1), ("run-b", 2, 2)]
+    records = history("ins-1", db_path=db_path)
+    assert [(record["run"], record["height"], record["status"]) for record in records] == \
+           [("run-a", 3, "OPTIMAL"), ("run-b", 3, "OPTIMAL")]
+    assert records[0]["encode_time"] == 0.5 and records[0]["instance_hash"] == a.digest
+    assert statistics("ins-1", db_path=db_path) == {"conflicts": 4}
+    assert statistics("ins-1", run="run-a", db_path=db_path) == {"conflicts": 10}
+    assert statistics("ins-2", db_path=db_path) is None
+
+    rows = {row["instance"]: row for row in compare("run-a", "run-b", db_path)}
+    assert rows["ins-1"]["speedup"] == 2.0
+    assert classify(rows["ins-1"]) == "better"
+    assert classify(rows["ins-2"]) == "better"
+    rows = {row["instance"]: row for row in compare("run-b", "run-a", db_path)}
+    assert classify(rows["ins-1"]) == "worse" and classify(rows["ins-2"]) == "worse"
+
+# ------------------ END FUNCTION --------------------
+
+def test_no_database(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    record_run("", "run", make_instance("ins-1", 5), "SAT", None, None, 3, "OPTIMAL", 1.0)
+    record_run(None, "run", make_instance("ins-1", 5), "SAT", None, None, 3, "OPTIMAL", 1.0)
+    assert list(tmp_path.iterdir()) == []
+
+# ------------------ END FUNCTION --------------------
@@ -0,0 +1,68 @@
+import glob, os, sys, tempfile
+import numpy as np
+import pytest
+from sat_backends import interruptible, make_backend
+
+# an external "solver" answering in the SAT competition format, through pysat
+SOLVER = """import sys
+from pysat.formula import CNF
+from pysat.solvers import Glucose4
+solver = Glucose4(bootstrap_with=CNF(from_file=sys.argv[1]).clauses)
+if solver.solve():
+    print("s SATISFIABLE")
+    print("v " + " ".join(map(str, solver.get_model())) + " 0")
+else:
+    print("s UNSATISFIABLE")
+"""
+
+def dimacs_backend(tmp_path, dimacs_path=None):
+    solver_path = tmp_path / "solver.py"
+    solver_path.write_text(SOLVER)
+    backend = make_backend("dimacs", dimacs_solver="{} {}".format(sys.executable, solver_path),
+                           dimacs_path=dimacs_path)
+    first = backend.new_vars(3)
+    backend.add_clauses(np.array([[first, first + 1], [-first, first + 2]]))
+    return backend, first
+
+# ------------------ END FUNCTION --------------------
+
+def cnf_files():
+    return set(glob.glob(os.path.join(tempfile.gettempdir(), "*.cnf")))
+
+# ------------------ END FUNCTION --------------------
+
+def test_dimacs_backend_on_a_temporary_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    before = cnf_files()
+    backend, first = dimacs_backend(tmp_path)
+    assert backend.solve([first], 10) is True
+    assert backend.value(first) and backend.value(first + 2)
+    assert backend.solve([first, -(first + 2)], 10) is False
+    # no file left behind, none written in the working directory
+    assert cnf_files() == before
+    assert sorted(os.listdir(tmp_path)) == ["solver.py"]
+
+# ------------------ END FUNCTION --------------------
+
+def test_dimacs_backend_keeps_a_given_path(tmp_path):
+    path = str(tmp_path / "model.cnf")
+    backend, first = dimacs_backend(tmp_path, path)
+    assert backend.solve([-first], 10) is True
+    assert backend.value(first + 1)
+    with open(path) as dimacs_file:
+        assert dimacs_file.read().splitlines() == ["p cnf 3 3", "1 2 0", "-1 3 0", "-1 0"]
+
+# ------------------ END FUNCTION --------------------
+
+def test_pysat_backend_rejects_uninterruptible_solvers():
+    assert interruptible("glucose4") and not interruptible("cadical195")
+    with pytest.raises(ValueError):
+        make_backend("pysat", pysat_solver="cadical195")
+    backend = make_backend("pysat", pysat_solver="glucose4")
+    first = backend.new_vars(2)
+    backend.add_clause([first])
+    backend.add_clauses(np.array([[-first, first + 1]]))
+    assert backend.solve([], 10) is True and backend.value(first + 1)
+    assert backend.solve([-(first + 1)], 10) is False
+
+# ------------------ END FUNCTION --------------------